@@ -0,0 +1,93 @@
+"""add query indexes
+
+Revision ID: 5b2e8f0c1d3a
+Revises: 7d497eb3bfa7
+Create Date: 2026-10-18 19:30:12.118204
+
+"""
+from alembic import op
+
+import sys
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b2e8f0c1d3a"
+down_revision = "7d497eb3bfa7"
+branch_labels = None
+depends_on = None
+
+sys.path = ["", ".."] + sys.path[1:]
+
+# Keyset pagination orders by the sort column and then id, so the sortable
+# timestamps are indexed together with it.
+SORT_INDEXES = [
+    (table, column)
+    for table in ("recipes", "ingredients")
+    for column in ("created_at", "updated_at")
+]
+TRIGRAM_TABLES = ("recipes", "ingredients")
+
+
+def has_trigram_extension():
+    # Managed databases and minimal builds may not ship the contrib modules,
+    # the name filters then keep scanning rather than failing the upgrade.
+    available = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+
+    return available.first() is not None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction, but keeps the tables
+    # writable while large indexes build.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_recipes_ingredients_ingredient_id",
+            "recipes_ingredients",
+            ["ingredient_id", "recipe_id"],
+            postgresql_concurrently=True,
+        )
+
+        for table, column in SORT_INDEXES:
+            op.create_index(
+                "ix_{0}_{1}".format(table, column),
+                table,
+                [column, "id"],
+                postgresql_concurrently=True,
+            )
+
+        if has_trigram_extension():
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+            for table in TRIGRAM_TABLES:
+                op.create_index(
+                    "ix_{0}_name_trgm".format(table),
+                    table,
+                    ["name"],
+                    postgresql_using="gin",
+                    postgresql_ops={"name": "gin_trgm_ops"},
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in TRIGRAM_TABLES:
+            op.execute(
+                "DROP INDEX CONCURRENTLY IF EXISTS ix_{0}_name_trgm".format(table)
+            )
+
+        for table, column in SORT_INDEXES:
+            op.drop_index(
+                "ix_{0}_{1}".format(table, column),
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+
+        op.drop_index(
+            "ix_recipes_ingredients_ingredient_id",
+            table_name="recipes_ingredients",
+            postgresql_concurrently=True,
+        )
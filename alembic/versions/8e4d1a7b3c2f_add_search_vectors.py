@@ -0,0 +1,59 @@
+"""add search vectors
+
+Revision ID: 8e4d1a7b3c2f
+Revises: 5b2e8f0c1d3a
+Create Date: 2026-10-18 20:05:41.502913
+
+"""
+from alembic import op
+
+import sys
+
+
+# revision identifiers, used by Alembic.
+revision = "8e4d1a7b3c2f"
+down_revision = "5b2e8f0c1d3a"
+branch_labels = None
+depends_on = None
+
+sys.path = ["", ".."] + sys.path[1:]
+
+SEARCH_TABLES = ("recipes", "ingredients")
+
+# Names rank above descriptions. A stored generated column is kept current
+# by Postgres on every insert and update, including COPY and bulk inserts.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, name), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, description), 'B')"
+)
+
+
+def upgrade():
+    for table in SEARCH_TABLES:
+        op.execute(
+            "ALTER TABLE {0} ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ({1}) STORED".format(table, SEARCH_VECTOR)
+        )
+
+    with op.get_context().autocommit_block():
+        for table in SEARCH_TABLES:
+            op.create_index(
+                "ix_{0}_search_vector".format(table),
+                table,
+                ["search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in SEARCH_TABLES:
+            op.drop_index(
+                "ix_{0}_search_vector".format(table),
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+
+    for table in SEARCH_TABLES:
+        op.drop_column(table, "search_vector")
@@ -4,6 +4,7 @@ from databases import Database
 from fastapi import Depends
 from starlette.requests import Request
 
+from app.db.pool import InstrumentedPool
 from app.db.repositories.base import BaseRepository
 
 
@@ -11,6 +12,10 @@ def _get_db(request: Request) -> Database:
     return request.app.state.db
 
 
+def get_db_pool(request: Request) -> InstrumentedPool:
+    return request.app.state.db_pool
+
+
 def get_repository(
     repo_type: Type[BaseRepository],
 ) -> Callable[[Database], BaseRepository]:
@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.routes import ingredients, recipes
+from app.api.routes import ingredients, recipes, status
 from app.resources.ingredient_constants import TAG_INGREDIENTS
 from app.resources.recipe_constants import TAG_RECIPES
+from app.resources.status_constants import TAG_STATUS
 
 router = APIRouter()
 router.include_router(recipes.router, tags=[TAG_RECIPES], prefix="/recipes")
 router.include_router(ingredients.router, tags=[TAG_INGREDIENTS], prefix="/ingredients")
+router.include_router(status.router, tags=[TAG_STATUS], prefix="/status")
@@ -1,28 +1,152 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.api.dependencies.database import get_repository
 from app.db.repositories.ingredient_repository import IngredientRepository
-from app.models.ingredient import IngredientModel, UpdatedIngredientModel
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.batch import BatchResult
+from app.models.ingredient import (
+    IngredientModel,
+    IngredientSearchResult,
+    UpdatedIngredientModel,
+)
+from app.models.recipe import RecipeModel
 from app.resources.common_constants import (
+    BATCH_MAX_ITEMS,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_REGEX,
+    HEADER_ETAG,
+    HEADER_IF_NONE_MATCH,
+    HEADER_LINK,
+    HEADER_NEXT_CURSOR,
+    HEADER_TOTAL_COUNT,
+    QUERY_COUNT_REGEX,
     QUERY_DEFAULT_LIMIT,
     QUERY_DEFAULT_OFFSET,
+    QUERY_INVALID_CURSOR,
+    QUERY_INVALID_FILTER,
+    QUERY_MAX_LIMIT,
+    SEARCH_CURSOR_SORT,
+    SEARCH_QUERY_MAX_LENGTH,
     STATUS_CREATED,
     STATUS_NOT_FOUND,
+    STATUS_UNPROCESSABLE_ENTITY,
 )
 from app.resources.ingredient_constants import (
     ALIAS_INGREDIENT,
+    ALIAS_INGREDIENTS,
     INGREDIENT_DOES_NOT_EXIST,
     QUERY_INGREDIENT_FILTER_REGEX,
     QUERY_INGREDIENT_SORT_REGEX,
     TAG_INGREDIENTS,
 )
+from app.utils.etag import collection_etag, etag_matches, model_etag, not_modified
+from app.utils.export import export_response
+from app.utils.filters import parse_filters
+from app.utils.pagination import (
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    pagination_links,
+)
+from app.utils.responses import json_response
 
 router = APIRouter()
 
 
+@router.get(
+    "/search",
+    name="ingredients:search-ingredients",
+    tags=[TAG_INGREDIENTS],
+    response_class=JSONResponse,
+    response_model=List[IngredientSearchResult],
+)
+async def search_ingredients(
+    response: Response,
+    q: str = Query(
+        ...,
+        alias="q",
+        min_length=1,
+        max_length=SEARCH_QUERY_MAX_LENGTH,
+        description="Search terms, web search syntax",
+    ),
+    limit: int = Query(
+        QUERY_DEFAULT_LIMIT,
+        le=QUERY_MAX_LIMIT,
+        alias="limit",
+        description="Ingredients per page",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination cursor",
+    ),
+    ingredient_repo: IngredientRepository = Depends(
+        get_repository(IngredientRepository),
+    ),
+) -> Union[List[IngredientSearchResult], Response]:
+    cursor_values = None
+
+    if cursor:
+        try:
+            cursor_values = decode_search_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_CURSOR,
+            )
+
+    ingredients = await ingredient_repo.search_ingredients(
+        q,
+        limit,
+        cursor=cursor_values,
+    )
+
+    if ingredients and len(ingredients) == limit:
+        response.headers[HEADER_NEXT_CURSOR] = encode_cursor(
+            ingredients[-1],
+            SEARCH_CURSOR_SORT,
+        )
+
+    return json_response(ingredients, response)
+
+
+@router.get(
+    "/export",
+    name="ingredients:export-ingredients",
+    tags=[TAG_INGREDIENTS],
+    response_class=StreamingResponse,
+)
+async def export_ingredients(
+    export_format: str = Query(
+        EXPORT_FORMAT_NDJSON,
+        alias="format",
+        description="Export format, ndjson or csv",
+        regex=EXPORT_FORMAT_REGEX,
+    ),
+    ingredient_repo: IngredientRepository = Depends(
+        get_repository(IngredientRepository),
+    ),
+) -> StreamingResponse:
+    return export_response(
+        ingredient_repo.export_ingredients(),
+        list(IngredientModel.__fields__),
+        export_format,
+        ALIAS_INGREDIENTS,
+    )
+
+
 @router.get(
     "/{id}",
     name="ingredients:get-one-ingredient",
@@ -32,10 +156,17 @@ router = APIRouter()
 )
 async def get_one_ingredient(
     id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias=HEADER_IF_NONE_MATCH),
     ingredient_repo: IngredientRepository = Depends(
         get_repository(IngredientRepository),
     ),
-) -> IngredientModel:
+) -> Union[IngredientModel, Response]:
+    if if_none_match:
+        etag = await ingredient_repo.get_ingredient_etag(id)
+
+        if etag is not None and etag_matches(if_none_match, etag):
+            return not_modified(etag)
 
     ingredient = await ingredient_repo.get_one_ingredient(id)
 
@@ -45,7 +176,65 @@ async def get_one_ingredient(
             detail=INGREDIENT_DOES_NOT_EXIST,
         )
 
-    return ingredient
+    response.headers[HEADER_ETAG] = model_etag(ingredient)
+
+    return json_response(ingredient, response)
+
+
+@router.get(
+    "/{id}/recipes",
+    name="ingredients:get-ingredient-recipes",
+    tags=[TAG_INGREDIENTS],
+    response_class=JSONResponse,
+    response_model=List[RecipeModel],
+)
+async def get_ingredient_recipes(
+    id: str,
+    response: Response,
+    limit: int = Query(
+        QUERY_DEFAULT_LIMIT,
+        le=QUERY_MAX_LIMIT,
+        alias="limit",
+        description="Recipes per page",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination cursor",
+    ),
+    ingredient_repo: IngredientRepository = Depends(
+        get_repository(IngredientRepository),
+    ),
+    recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
+) -> Union[List[RecipeModel], Response]:
+    cursor_values = None
+
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor, {})
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_CURSOR,
+            )
+
+    recipes = await recipe_repo.get_recipes_for_ingredient(
+        id,
+        limit,
+        cursor=cursor_values,
+    )
+
+    # Only an empty page needs to tell a missing ingredient from an unused one.
+    if not recipes and await ingredient_repo.get_one_ingredient(id) is None:
+        raise HTTPException(
+            status_code=STATUS_NOT_FOUND,
+            detail=INGREDIENT_DOES_NOT_EXIST,
+        )
+
+    if recipes and len(recipes) == limit:
+        response.headers[HEADER_NEXT_CURSOR] = encode_cursor(recipes[-1], {})
+
+    return json_response(recipes, response)
 
 
 @router.get(
@@ -56,6 +245,8 @@ async def get_one_ingredient(
     response_model=List[IngredientModel],
 )
 async def get_ingredients(
+    request: Request,
+    response: Response,
     limit: int = Query(
         QUERY_DEFAULT_LIMIT,
         alias="limit",
@@ -78,23 +269,88 @@ async def get_ingredients(
         description="Filters for collection",
         regex=QUERY_INGREDIENT_FILTER_REGEX,
     ),
+    cursor: Optional[str] = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination cursor, replaces offset",
+    ),
+    count: Optional[str] = Query(
+        None,
+        alias="count",
+        description="Adds X-Total-Count and Link headers, counted auto, "
+        "estimated or exact",
+        regex=QUERY_COUNT_REGEX,
+    ),
+    if_none_match: Optional[str] = Header(None, alias=HEADER_IF_NONE_MATCH),
     ingredient_repo: IngredientRepository = Depends(
         get_repository(IngredientRepository),
     ),
-) -> List[IngredientModel]:
+) -> Union[List[IngredientModel], Response]:
     sort_params = {}
 
     if sort:
         param_list = [sort_param.split(":") for sort_param in sort]
         sort_params = {sort_param[0]: sort_param[1] for sort_param in param_list}
 
-    return await ingredient_repo.get_ingredients(
+    filter_params = None
+
+    if filters:
+        try:
+            filter_params = parse_filters(filters)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_FILTER,
+            )
+
+    cursor_values = None
+
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor, sort_params)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_CURSOR,
+            )
+
+    ingredients = await ingredient_repo.get_ingredients(
         limit,
         offset,
         sort_params=sort_params,
-        filters=filters,
+        filters=filter_params,
+        cursor=cursor_values,
     )
 
+    headers = {}
+
+    if ingredients and len(ingredients) == limit:
+        headers[HEADER_NEXT_CURSOR] = encode_cursor(ingredients[-1], sort_params)
+
+    if count:
+        total = await ingredient_repo.count_ingredients(
+            filters=filter_params,
+            mode=count,
+        )
+        headers[HEADER_TOTAL_COUNT] = str(total)
+        headers[HEADER_LINK] = pagination_links(
+            request.url,
+            total,
+            limit,
+            offset,
+            next_cursor=headers.get(HEADER_NEXT_CURSOR),
+        )
+
+    # The page still has to be read, a match only skips serializing it.
+    etag = collection_etag(model_etag(ingredient) for ingredient in ingredients)
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+
+    response.headers.update({**headers, HEADER_ETAG: etag})
+
+    return json_response(ingredients, response)
+
 
 @router.post(
     "",
@@ -109,8 +365,36 @@ async def create_ingredient(
     ingredient_repo: IngredientRepository = Depends(
         get_repository(IngredientRepository),
     ),
-) -> IngredientModel:
-    return await ingredient_repo.create_ingredient(ingredient)
+) -> Union[IngredientModel, Response]:
+    return json_response(
+        await ingredient_repo.create_ingredient(ingredient),
+        status_code=STATUS_CREATED,
+    )
+
+
+@router.post(
+    "/batch",
+    name="ingredients:create-ingredients-batch",
+    tags=[TAG_INGREDIENTS],
+    response_class=JSONResponse,
+    response_model=BatchResult,
+    status_code=STATUS_CREATED,
+)
+async def create_ingredients_batch(
+    ingredients: List[IngredientModel] = Body(
+        ...,
+        alias=ALIAS_INGREDIENTS,
+        min_items=1,
+        max_items=BATCH_MAX_ITEMS,
+    ),
+    ingredient_repo: IngredientRepository = Depends(
+        get_repository(IngredientRepository),
+    ),
+) -> Union[BatchResult, Response]:
+    return json_response(
+        await ingredient_repo.create_ingredients(ingredients),
+        status_code=STATUS_CREATED,
+    )
 
 
 @router.patch(
@@ -126,13 +410,13 @@ async def update_ingredient(
     ingredient_repo: IngredientRepository = Depends(
         get_repository(IngredientRepository),
     ),
-) -> IngredientModel:
+) -> Union[IngredientModel, Response]:
     ingredient = await ingredient_repo.update_ingredient(id, updated_ingredient)
 
     if ingredient is None:
         raise HTTPException(STATUS_NOT_FOUND, detail=INGREDIENT_DOES_NOT_EXIST)
 
-    return ingredient
+    return json_response(ingredient)
 
 
 @router.delete(
@@ -147,10 +431,10 @@ async def delete_ingredient(
     ingredient_repo: IngredientRepository = Depends(
         get_repository(IngredientRepository),
     ),
-) -> IngredientModel:
+) -> Union[IngredientModel, Response]:
     ingredient = await ingredient_repo.delete_ingredient(id)
 
     if ingredient is None:
         raise HTTPException(STATUS_NOT_FOUND, detail=INGREDIENT_DOES_NOT_EXIST)
 
-    return ingredient
+    return json_response(ingredient)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import metrics_registry
+from app.resources.metrics_constants import TAG_METRICS
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    name="metrics:get-metrics",
+    tags=[TAG_METRICS],
+    response_class=Response,
+)
+async def get_metrics() -> Response:
+    # The content type already carries the charset, so it is set as a header
+    # rather than a media type starlette would append one to.
+    return Response(
+        generate_latest(metrics_registry),
+        headers={"Content-Type": CONTENT_TYPE_LATEST},
+    )
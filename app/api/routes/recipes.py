@@ -1,33 +1,160 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.api.dependencies.database import get_repository
 from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.batch import BatchResult
 from app.models.recipe import (
+    PantryModel,
     RecipeModel,
     RecipeModelWithIngredients,
+    RecipePantryMatch,
+    RecipeSearchResult,
     UpdatedRecipeModel,
 )
 from app.resources.common_constants import (
+    BATCH_MAX_ITEMS,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_REGEX,
+    HEADER_ETAG,
+    HEADER_IF_NONE_MATCH,
+    HEADER_LINK,
+    HEADER_NEXT_CURSOR,
+    HEADER_TOTAL_COUNT,
+    QUERY_COUNT_REGEX,
     QUERY_DEFAULT_LIMIT,
     QUERY_DEFAULT_OFFSET,
+    QUERY_INVALID_CURSOR,
+    QUERY_INVALID_FILTER,
     QUERY_MAX_LIMIT,
+    SEARCH_CURSOR_SORT,
+    SEARCH_QUERY_MAX_LENGTH,
     STATUS_CREATED,
     STATUS_NOT_FOUND,
+    STATUS_UNPROCESSABLE_ENTITY,
 )
 from app.resources.recipe_constants import (
+    ALIAS_PANTRY,
     ALIAS_RECIPE,
+    ALIAS_RECIPES,
+    EXPAND_INGREDIENTS,
+    QUERY_RECIPE_EXPAND_REGEX,
     QUERY_RECIPE_FILTER_REGEX,
     QUERY_RECIPE_SORT_REGEX,
     RECIPE_DOES_NOT_EXIST,
     TAG_RECIPES,
 )
+from app.utils.etag import collection_etag, etag_matches, model_etag, not_modified
+from app.utils.export import export_response
+from app.utils.filters import parse_filters
+from app.utils.pagination import (
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    pagination_links,
+)
+from app.utils.responses import json_response
 
 router = APIRouter()
 
 
+@router.get(
+    "/search",
+    name="recipes:search-recipes",
+    tags=[TAG_RECIPES],
+    response_class=JSONResponse,
+    response_model=List[RecipeSearchResult],
+)
+async def search_recipes(
+    response: Response,
+    q: str = Query(
+        ...,
+        alias="q",
+        min_length=1,
+        max_length=SEARCH_QUERY_MAX_LENGTH,
+        description="Search terms, web search syntax",
+    ),
+    limit: int = Query(
+        QUERY_DEFAULT_LIMIT,
+        le=QUERY_MAX_LIMIT,
+        alias="limit",
+        description="Recipes per page",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination cursor",
+    ),
+    recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
+) -> Union[List[RecipeSearchResult], Response]:
+    cursor_values = None
+
+    if cursor:
+        try:
+            cursor_values = decode_search_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_CURSOR,
+            )
+
+    recipes = await recipe_repo.search_recipes(q, limit, cursor=cursor_values)
+
+    if recipes and len(recipes) == limit:
+        response.headers[HEADER_NEXT_CURSOR] = encode_cursor(
+            recipes[-1],
+            SEARCH_CURSOR_SORT,
+        )
+
+    return json_response(recipes, response)
+
+
+@router.get(
+    "/export",
+    name="recipes:export-recipes",
+    tags=[TAG_RECIPES],
+    response_class=StreamingResponse,
+)
+async def export_recipes(
+    export_format: str = Query(
+        EXPORT_FORMAT_NDJSON,
+        alias="format",
+        description="Export format, ndjson or csv",
+        regex=EXPORT_FORMAT_REGEX,
+    ),
+    expand: Optional[str] = Query(
+        None,
+        alias="expand",
+        description="Related collections to embed in each recipe",
+        regex=QUERY_RECIPE_EXPAND_REGEX,
+    ),
+    recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
+) -> StreamingResponse:
+    expand_ingredients = expand == EXPAND_INGREDIENTS
+    columns = list(RecipeModel.__fields__)
+
+    if expand_ingredients:
+        columns.append(EXPAND_INGREDIENTS)
+
+    return export_response(
+        recipe_repo.export_recipes(expand_ingredients=expand_ingredients),
+        columns,
+        export_format,
+        ALIAS_RECIPES,
+    )
+
+
 @router.get(
     "/{id}",
     name="recipes:get-one-recipe",
@@ -37,15 +164,24 @@ router = APIRouter()
 )
 async def get_one_recipe(
     id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias=HEADER_IF_NONE_MATCH),
     recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
-) -> RecipeModelWithIngredients:
+) -> Union[RecipeModelWithIngredients, Response]:
+    if if_none_match:
+        etag = await recipe_repo.get_recipe_etag(id)
+
+        if etag is not None and etag_matches(if_none_match, etag):
+            return not_modified(etag)
 
     recipe = await recipe_repo.get_one_recipe(id)
 
     if recipe is None:
         raise HTTPException(status_code=STATUS_NOT_FOUND, detail=RECIPE_DOES_NOT_EXIST)
 
-    return recipe
+    response.headers[HEADER_ETAG] = model_etag(recipe)
+
+    return json_response(recipe, response)
 
 
 @router.get(
@@ -53,9 +189,11 @@ async def get_one_recipe(
     name="recipes:get-recipes",
     tags=[TAG_RECIPES],
     response_class=JSONResponse,
-    response_model=List[RecipeModel],
+    response_model=Union[List[RecipeModelWithIngredients], List[RecipeModel]],
 )
 async def get_recipes(
+    request: Request,
+    response: Response,
     limit: int = Query(
         QUERY_DEFAULT_LIMIT,
         le=QUERY_MAX_LIMIT,
@@ -79,21 +217,90 @@ async def get_recipes(
         description="Filters for collection",
         regex=QUERY_RECIPE_FILTER_REGEX,
     ),
+    cursor: Optional[str] = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination cursor, replaces offset",
+    ),
+    count: Optional[str] = Query(
+        None,
+        alias="count",
+        description="Adds X-Total-Count and Link headers, counted auto, "
+        "estimated or exact",
+        regex=QUERY_COUNT_REGEX,
+    ),
+    expand: Optional[str] = Query(
+        None,
+        alias="expand",
+        description="Related collections to embed in each recipe",
+        regex=QUERY_RECIPE_EXPAND_REGEX,
+    ),
+    if_none_match: Optional[str] = Header(None, alias=HEADER_IF_NONE_MATCH),
     recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
-) -> List[RecipeModel]:
+) -> Union[List[RecipeModel], List[RecipeModelWithIngredients], Response]:
     sort_params = {}
 
     if sort:
         param_list = [sort_param.split(":") for sort_param in sort]
         sort_params = {sort_param[0]: sort_param[1] for sort_param in param_list}
 
-    return await recipe_repo.get_recipes(
+    filter_params = None
+
+    if filters:
+        try:
+            filter_params = parse_filters(filters)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_FILTER,
+            )
+
+    cursor_values = None
+
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor, sort_params)
+        except ValueError:
+            raise HTTPException(
+                STATUS_UNPROCESSABLE_ENTITY,
+                detail=QUERY_INVALID_CURSOR,
+            )
+
+    recipes = await recipe_repo.get_recipes(
         limit,
         offset,
         sort_params=sort_params,
-        filters=filters,
+        filters=filter_params,
+        cursor=cursor_values,
+        expand_ingredients=expand == EXPAND_INGREDIENTS,
     )
 
+    headers = {}
+
+    if recipes and len(recipes) == limit:
+        headers[HEADER_NEXT_CURSOR] = encode_cursor(recipes[-1], sort_params)
+
+    if count:
+        total = await recipe_repo.count_recipes(filters=filter_params, mode=count)
+        headers[HEADER_TOTAL_COUNT] = str(total)
+        headers[HEADER_LINK] = pagination_links(
+            request.url,
+            total,
+            limit,
+            offset,
+            next_cursor=headers.get(HEADER_NEXT_CURSOR),
+        )
+
+    # The page still has to be read, a match only skips serializing it.
+    etag = collection_etag(model_etag(recipe) for recipe in recipes)
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+
+    response.headers.update({**headers, HEADER_ETAG: etag})
+
+    return json_response(recipes, response)
+
 
 @router.post(
     "",
@@ -106,9 +313,61 @@ async def get_recipes(
 async def create_recipe(
     recipe: RecipeModelWithIngredients = Body(..., alias=ALIAS_RECIPE),
     recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
-) -> RecipeModelWithIngredients:
+) -> Union[RecipeModelWithIngredients, Response]:
+    return json_response(
+        await recipe_repo.create_recipe(recipe),
+        status_code=STATUS_CREATED,
+        exclude={EXPAND_INGREDIENTS},
+    )
+
+
+@router.post(
+    "/batch",
+    name="recipes:create-recipes-batch",
+    tags=[TAG_RECIPES],
+    response_model=BatchResult,
+    response_class=JSONResponse,
+    status_code=STATUS_CREATED,
+)
+async def create_recipes_batch(
+    recipes: List[RecipeModelWithIngredients] = Body(
+        ...,
+        alias=ALIAS_RECIPES,
+        min_items=1,
+        max_items=BATCH_MAX_ITEMS,
+    ),
+    recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
+) -> Union[BatchResult, Response]:
+    return json_response(
+        await recipe_repo.create_recipes(recipes),
+        status_code=STATUS_CREATED,
+    )
+
+
+@router.post(
+    "/cookable",
+    name="recipes:get-cookable-recipes",
+    tags=[TAG_RECIPES],
+    response_model=List[RecipePantryMatch],
+    response_class=JSONResponse,
+)
+async def get_cookable_recipes(
+    pantry: PantryModel = Body(..., alias=ALIAS_PANTRY),
+    limit: int = Query(
+        QUERY_DEFAULT_LIMIT,
+        le=QUERY_MAX_LIMIT,
+        alias="limit",
+        description="Recipes to return",
+    ),
+    recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
+) -> Union[List[RecipePantryMatch], Response]:
+    recipes = await recipe_repo.get_cookable_recipes(
+        [str(ingredient_id) for ingredient_id in pantry.ingredients],
+        pantry.max_missing,
+        limit,
+    )
 
-    return await recipe_repo.create_recipe(recipe)
+    return json_response(recipes)
 
 
 @router.patch(
@@ -122,13 +381,13 @@ async def update_recipe(
     id: str,
     updated_recipe: UpdatedRecipeModel = Body(..., alias=ALIAS_RECIPE),
     recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
-) -> RecipeModelWithIngredients:
+) -> Union[RecipeModelWithIngredients, Response]:
     recipe = await recipe_repo.update_recipe(id, updated_recipe)
 
     if recipe is None:
         raise HTTPException(STATUS_NOT_FOUND, detail=RECIPE_DOES_NOT_EXIST)
 
-    return recipe
+    return json_response(recipe)
 
 
 @router.delete(
@@ -141,10 +400,10 @@ async def update_recipe(
 async def delete_recipe(
     id: str,
     recipe_repo: RecipeRepository = Depends(get_repository(RecipeRepository)),
-) -> RecipeModelWithIngredients:
+) -> Union[RecipeModelWithIngredients, Response]:
     recipe = await recipe_repo.delete_recipe(id)
 
     if recipe is None:
         raise HTTPException(STATUS_NOT_FOUND, detail=RECIPE_DOES_NOT_EXIST)
 
-    return recipe
+    return json_response(recipe, exclude={EXPAND_INGREDIENTS})
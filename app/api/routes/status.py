@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.api.dependencies.database import get_db_pool
+from app.db.pool import InstrumentedPool
+from app.models.status import PoolStats
+from app.resources.status_constants import TAG_STATUS
+
+router = APIRouter()
+
+
+@router.get(
+    "/pool",
+    name="status:get-pool-stats",
+    tags=[TAG_STATUS],
+    response_class=JSONResponse,
+    response_model=PoolStats,
+)
+async def get_pool_stats(
+    pool: InstrumentedPool = Depends(get_db_pool),
+) -> PoolStats:
+    return PoolStats(**pool.stats())
@@ -1,5 +1,6 @@
 import logging
 import sys
+from typing import Optional
 
 from loguru import logger
 from starlette.config import Config
@@ -25,6 +26,96 @@ DB_NAME: str = config("DB_NAME", default="food")
 DB_USER: str = config("DB_USER", default="root")
 DB_PASSWORD: str = config("DB_PASSWORD", default="password")
 
+# Connection pool, sized per worker process (scripts/prod.sh runs 4 workers)
+DB_POOL_MIN_SIZE: int = config("DB_POOL_MIN_SIZE", cast=int, default=2)
+DB_POOL_MAX_SIZE: int = config("DB_POOL_MAX_SIZE", cast=int, default=10)
+# Connections open and checked at startup; the pool already opens
+# DB_POOL_MIN_SIZE, so only a larger value opens any more
+DB_POOL_PREWARM: int = config("DB_POOL_PREWARM", cast=int, default=0)
+DB_POOL_MAX_INACTIVE_LIFETIME: float = config(
+    "DB_POOL_MAX_INACTIVE_LIFETIME",
+    cast=float,
+    default=300.0,
+)
+DB_POOL_ACQUIRE_TIMEOUT: float = config(
+    "DB_POOL_ACQUIRE_TIMEOUT",
+    cast=float,
+    default=10.0,
+)
+DB_COMMAND_TIMEOUT: Optional[float] = config(
+    "DB_COMMAND_TIMEOUT",
+    cast=float,
+    default=None,
+)
+DB_STATEMENT_CACHE_SIZE: int = config(
+    "DB_STATEMENT_CACHE_SIZE",
+    cast=int,
+    default=100,
+)
+
+# Entity cache, per worker process so keep the TTL short when running several
+CACHE_ENABLED: bool = config("CACHE_ENABLED", cast=bool, default=False)
+CACHE_MAX_SIZE: int = config("CACHE_MAX_SIZE", cast=int, default=10000)
+CACHE_TTL_SECONDS: float = config("CACHE_TTL_SECONDS", cast=float, default=30.0)
+
+# Exact collection counts, cached briefly per worker; 0 turns the cache off
+COUNT_CACHE_MAX_SIZE: int = config("COUNT_CACHE_MAX_SIZE", cast=int, default=1000)
+COUNT_CACHE_TTL_SECONDS: float = config(
+    "COUNT_CACHE_TTL_SECONDS",
+    cast=float,
+    default=5.0,
+)
+
+# Pantry search index, an in-memory snapshot of recipes_ingredients reloaded
+# on an interval; pantry scores may lag writes by up to one interval
+PANTRY_INDEX_ENABLED: bool = config("PANTRY_INDEX_ENABLED", cast=bool, default=False)
+PANTRY_INDEX_REFRESH_SECONDS: float = config(
+    "PANTRY_INDEX_REFRESH_SECONDS",
+    cast=float,
+    default=300.0,
+)
+PANTRY_INDEX_STOP_TIMEOUT_SECONDS: float = config(
+    "PANTRY_INDEX_STOP_TIMEOUT_SECONDS",
+    cast=float,
+    default=10.0,
+)
+
+# Serialize API responses with orjson and skip re-validating the models the
+# repositories return against each route's response_model
+FAST_JSON_RESPONSES: bool = config("FAST_JSON_RESPONSES", cast=bool, default=False)
+
+# Prometheus metrics at /metrics, kept per worker process so scrape each one
+METRICS_ENABLED: bool = config("METRICS_ENABLED", cast=bool, default=True)
+
+# Request profiling, installed only when DEBUG. Requests carrying the header
+# or picked at the sample rate get a cProfile written per route.
+PROFILING_SAMPLE_RATE: float = config(
+    "PROFILING_SAMPLE_RATE",
+    cast=float,
+    default=0.0,
+)
+PROFILING_HEADER: str = config("PROFILING_HEADER", default="X-Profile")
+PROFILING_DIRECTORY: str = config("PROFILING_DIRECTORY", default="tmp/profiles")
+
+# Slow query log, statements over the threshold are logged with their params
+# and repository method; 0 turns it off. The sampled share of them is also
+# run under EXPLAIN (ANALYZE, BUFFERS) on a separate connection and rolled back
+SLOW_QUERY_THRESHOLD_MS: float = config(
+    "SLOW_QUERY_THRESHOLD_MS",
+    cast=float,
+    default=200.0,
+)
+SLOW_QUERY_EXPLAIN_RATE: float = config(
+    "SLOW_QUERY_EXPLAIN_RATE",
+    cast=float,
+    default=0.0,
+)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS: float = config(
+    "SLOW_QUERY_EXPLAIN_TIMEOUT_MS",
+    cast=float,
+    default=10000.0,
+)
+
 
 # Log settings
 LOGGING_LEVEL = logging.DEBUG if DEBUG else logging.INFO
@@ -1,19 +1,37 @@
+import time
 from typing import Callable
 
 from fastapi import FastAPI
+from loguru import logger
 
-from app.db.events import close_db_connection, connect_to_db
+from app.db.events import (
+    close_db_connection,
+    connect_to_db,
+    start_pantry_index,
+    stop_pantry_index,
+)
+
+MS = 1000
 
 
 def create_startup_handler(app: FastAPI) -> Callable:  # type: ignore
     async def start_app() -> None:
+        started = time.perf_counter()
+
         await connect_to_db(app)
+        start_pantry_index(app)
+
+        logger.info(
+            "Application startup finished in {0:.1f} ms",
+            (time.perf_counter() - started) * MS,
+        )
 
     return start_app
 
 
 def create_shutdown_handler(app: FastAPI) -> Callable:  # type: ignore
     async def stop_app() -> None:
+        await stop_pantry_index(app)
         await close_db_connection(app)
 
     return stop_app
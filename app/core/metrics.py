@@ -0,0 +1,231 @@
+import functools
+import time
+from typing import Any, Callable, Iterable
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.metrics_core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.cache import count_cache, ingredient_cache, recipe_cache
+from app.db.pantry_index import pantry_index
+from app.db.pool import MS
+from app.resources.metrics_constants import LATENCY_BUCKETS, UNMATCHED_ROUTE
+
+STATUS_SERVER_ERROR = 500
+
+metrics_registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+    registry=metrics_registry,
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served.",
+    registry=metrics_registry,
+)
+REPOSITORY_CALL_DURATION = Histogram(
+    "repository_call_duration_seconds",
+    "Repository method latency, including every query the method runs.",
+    ("repository", "method"),
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+
+CACHES = {
+    "ingredient": ingredient_cache,
+    "recipe": recipe_cache,
+    "count": count_cache,
+}
+CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations")
+PANTRY_GAUGES = ("recipes", "ingredients")
+
+POOL_METRICS = (
+    ("size", "db_pool_connections", GaugeMetricFamily, "Open pool connections.", 1),
+    (
+        "in_use",
+        "db_pool_connections_in_use",
+        GaugeMetricFamily,
+        "Checked out connections.",
+        1,
+    ),
+    (
+        "idle",
+        "db_pool_connections_idle",
+        GaugeMetricFamily,
+        "Idle pool connections.",
+        1,
+    ),
+    ("max_size", "db_pool_max_connections", GaugeMetricFamily, "Pool size limit.", 1),
+    (
+        "waiting",
+        "db_pool_waiting",
+        GaugeMetricFamily,
+        "Requests waiting to acquire.",
+        1,
+    ),
+    ("acquires", "db_pool_acquires_total", CounterMetricFamily, "Pool acquires.", 1),
+    (
+        "acquire_timeouts",
+        "db_pool_acquire_timeouts_total",
+        CounterMetricFamily,
+        "Acquires that timed out.",
+        1,
+    ),
+    (
+        "acquire_p95_ms",
+        "db_pool_acquire_p95_seconds",
+        GaugeMetricFamily,
+        "95th percentile acquire wait over recent acquires.",
+        1 / MS,
+    ),
+    (
+        "acquire_max_ms",
+        "db_pool_acquire_max_seconds",
+        GaugeMetricFamily,
+        "Longest acquire wait since startup.",
+        1 / MS,
+    ),
+)
+
+
+class StateCollector(Collector):
+    # Read at scrape time from state that is already tracked elsewhere, so
+    # the hot path pays nothing for it.
+    def collect(self) -> Iterable[Metric]:
+        stats = {name: cache.stats() for name, cache in CACHES.items()}
+        entries = GaugeMetricFamily(
+            "cache_entries",
+            "Entries held by each in-process cache.",
+            labels=("cache",),
+        )
+
+        for name, cache_stats in stats.items():
+            entries.add_metric((name,), cache_stats["size"])
+
+        yield entries
+
+        for stat in CACHE_COUNTERS:
+            counter = CounterMetricFamily(
+                "cache_{0}".format(stat),
+                "Cache {0} by cache.".format(stat),
+                labels=("cache",),
+            )
+
+            for name, cache_stats in stats.items():
+                counter.add_metric((name,), cache_stats[stat])
+
+            yield counter
+
+        pantry_stats = pantry_index.stats()
+
+        yield GaugeMetricFamily(
+            "pantry_index_ready",
+            "Whether pantry searches are served from the in-memory index.",
+            value=int(pantry_index.ready),
+        )
+
+        for stat in PANTRY_GAUGES:
+            yield GaugeMetricFamily(
+                "pantry_index_{0}".format(stat),
+                "{0} in the loaded pantry index.".format(stat.capitalize()),
+                value=pantry_stats[stat],
+            )
+
+
+class DatabaseCollector(Collector):
+    # The pool belongs to the running application rather than the process,
+    # so this is registered on connect and unregistered on disconnect.
+    def __init__(self, pool: Any, database: Any) -> None:
+        self.pool = pool
+        self.database = database
+
+    def collect(self) -> Iterable[Metric]:
+        stats = self.pool.stats()
+
+        for stat, name, family, documentation, scale in POOL_METRICS:
+            yield family(name, documentation, value=stats[stat] * scale)
+
+        yield CounterMetricFamily(
+            "db_statements_total",
+            "Statements run through the repositories' database.",
+            value=self.database.statements,
+        )
+        yield CounterMetricFamily(
+            "db_slow_statements_total",
+            "Statements over the slow query threshold.",
+            value=self.database.slow_statements,
+        )
+
+
+metrics_registry.register(StateCollector())
+
+
+def time_repository_method(
+    repository: str,
+    method_name: str,
+    method: Callable[..., Any],
+) -> Callable[..., Any]:
+    duration = REPOSITORY_CALL_DURATION.labels(repository, method_name)
+
+    @functools.wraps(method)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    return timed
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, which costs a task and a
+    # memory stream per request and buffers streamed responses.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = STATUS_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope, its path is
+            # the template, so ids do not turn into one series per entity.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
@@ -0,0 +1,93 @@
+import cProfile
+import os
+import pstats
+import random
+import re
+import time
+from typing import Dict
+
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.resources.metrics_constants import UNMATCHED_ROUTE
+
+MS = 1000
+REPORT_LINES = 60
+
+
+def route_slug(method: str, route: str) -> str:
+    return "{0}_{1}".format(method, re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_"))
+
+
+class ProfilingMiddleware:
+    # cProfile hooks the whole thread, so a profile taken across the awaits of
+    # one request also records whatever else the event loop ran meanwhile.
+    # Only one request is profiled at a time and the rest pass straight
+    # through, which keeps the profiles readable on a quiet DEBUG server.
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        sample_rate: float = 0.0,
+        header: str = "",
+        sort_by: str = "cumulative",
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+        self.sort_by = sort_by
+        self._active = False
+        self._stats: Dict[str, pstats.Stats] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        self._active = True
+        started = time.perf_counter()
+        profiler.enable()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            self._active = False
+            self._save(scope, profiler, time.perf_counter() - started)
+
+    def _selected(self, scope: Scope) -> bool:
+        if self.header and any(name == self.header for name, _ in scope["headers"]):
+            return True
+
+        return random.random() < self.sample_rate
+
+    def _save(self, scope: Scope, profiler: cProfile.Profile, elapsed: float) -> None:
+        # Profiles are added up per route for the life of the process, so
+        # every write holds all the samples taken so far for that route.
+        route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+        slug = route_slug(scope["method"], route)
+        stats = self._stats.get(slug)
+
+        if stats is None:
+            stats = self._stats[slug] = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, slug)
+        stats_path = "{0}.pstats".format(path)
+        stats.dump_stats(stats_path)
+
+        with open("{0}.txt".format(path), "w") as report:
+            report_stats = pstats.Stats(stats_path, stream=report)
+            report_stats.sort_stats(self.sort_by).print_stats(REPORT_LINES)
+
+        logger.info(
+            "Profiled {0} {1} in {2:.1f} ms, written to {3}.pstats",
+            scope["method"],
+            scope["path"],
+            elapsed * MS,
+            path,
+        )
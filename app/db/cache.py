@@ -0,0 +1,140 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.core.config import (
+    CACHE_ENABLED,
+    CACHE_MAX_SIZE,
+    CACHE_TTL_SECONDS,
+    COUNT_CACHE_MAX_SIZE,
+    COUNT_CACHE_TTL_SECONDS,
+)
+
+
+def entity_key(id: Any) -> str:
+    try:
+        return str(uuid.UUID(str(id)))
+    except ValueError:
+        return str(id)
+
+
+class EntityCache:
+    def __init__(self, max_size: int, ttl: float, enabled: bool = True) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Set[Hashable]]]" = (
+            OrderedDict()
+        )
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def token(self) -> int:
+        # Taken before a read-through query; set() drops the value if anything
+        # was invalidated meanwhile, so a slow read cannot cache a stale row.
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value, _ = entry
+
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        token: int,
+        tags: Iterable[Hashable] = (),
+    ) -> None:
+        if not self.enabled or token != self._generation:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        tag_set = set(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tag_set)
+
+        for tag in tag_set:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._generation += 1
+        self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        self._generation += 1
+
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+
+            if keys is None:
+                continue
+
+            keys.discard(key)
+
+            if not keys:
+                self._tags.pop(tag)
+
+
+ingredient_cache = EntityCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS, CACHE_ENABLED)
+recipe_cache = EntityCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS, CACHE_ENABLED)
+count_cache = EntityCache(
+    COUNT_CACHE_MAX_SIZE,
+    COUNT_CACHE_TTL_SECONDS,
+    COUNT_CACHE_TTL_SECONDS > 0,
+)
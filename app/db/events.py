@@ -1,9 +1,36 @@
-import sqlalchemy  # type: ignore
+import asyncio
+import time
+
 from databases import Database
 from fastapi import FastAPI
 from loguru import logger
 
-from app.core.config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+from app.core.config import (
+    DB_COMMAND_TIMEOUT,
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_POOL_ACQUIRE_TIMEOUT,
+    DB_POOL_MAX_INACTIVE_LIFETIME,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_PREWARM,
+    DB_PORT,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_USER,
+    PANTRY_INDEX_REFRESH_SECONDS,
+    PANTRY_INDEX_STOP_TIMEOUT_SECONDS,
+    SLOW_QUERY_EXPLAIN_RATE,
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+from app.core.metrics import DatabaseCollector, metrics_registry
+from app.db.pantry_index import pantry_index
+from app.db.pool import instrument_pool
+from app.db.query_log import InstrumentedDatabase
+from app.db.repositories.recipe_repository import RecipeRepository
+
+MS = 1000
 
 
 async def connect_to_db(app: FastAPI) -> None:
@@ -16,7 +43,6 @@ async def connect_to_db(app: FastAPI) -> None:
         repr(DB_HOST),
         repr(DB_PORT),
     )
-    metadata = sqlalchemy.MetaData()
     db_url = "postgresql://{user}:{password}@{host}:{port}/{name}".format(
         user=DB_USER,
         password=DB_PASSWORD,
@@ -24,20 +50,99 @@ async def connect_to_db(app: FastAPI) -> None:
         port=DB_PORT,
         name=DB_NAME,
     )
-    database = Database(db_url)
-    engine = sqlalchemy.create_engine(db_url)
-    metadata.create_all(engine)
+    database = Database(
+        db_url,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+        command_timeout=DB_COMMAND_TIMEOUT,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    )
 
+    # The schema belongs to Alembic, startup only opens the pool.
+    started = time.perf_counter()
     await database.connect()
+    connected = time.perf_counter()
 
-    app.state.db = database
+    pool = instrument_pool(database, DB_POOL_ACQUIRE_TIMEOUT)
+    prewarmed = await pool.prewarm(DB_POOL_PREWARM)
+    finished = time.perf_counter()
+
+    app.state.db = InstrumentedDatabase(
+        database,
+        SLOW_QUERY_THRESHOLD_MS,
+        SLOW_QUERY_EXPLAIN_RATE,
+        SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+    )
+    app.state.db_pool = pool
+    app.state.db_collector = DatabaseCollector(pool, app.state.db)
+    metrics_registry.register(app.state.db_collector)
 
-    logger.info("Connection established")
+    logger.info(
+        "Connection established in {0:.1f} ms: pool connect {1:.1f} ms, "
+        "prewarm of {2} connections {3:.1f} ms",
+        (finished - started) * MS,
+        (connected - started) * MS,
+        prewarmed,
+        (finished - connected) * MS,
+    )
 
 
 async def close_db_connection(app: FastAPI) -> None:
     logger.info("Closing connection to database.")
 
+    metrics_registry.unregister(app.state.db_collector)
+    await app.state.db.wait_for_explains()
     await app.state.db.disconnect()
 
     logger.info("Connection closed.")
+
+
+async def refresh_pantry_index(database: Database, stop: asyncio.Event) -> None:
+    repository = RecipeRepository(database)
+
+    while not stop.is_set():
+        started = time.perf_counter()
+
+        try:
+            await repository.refresh_pantry_index()
+        except Exception:
+            # Keeps serving the previous snapshot, or the SQL path if none.
+            logger.exception("Pantry index refresh failed.")
+        else:
+            logger.info(
+                "Pantry index loaded {0} in {1:.2f}s.",
+                pantry_index.stats(),
+                time.perf_counter() - started,
+            )
+
+        try:
+            await asyncio.wait_for(stop.wait(), PANTRY_INDEX_REFRESH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_pantry_index(app: FastAPI) -> None:
+    app.state.pantry_index_task = None
+    app.state.pantry_index_stop = asyncio.Event()
+
+    if pantry_index.enabled:
+        app.state.pantry_index_task = asyncio.create_task(
+            refresh_pantry_index(app.state.db, app.state.pantry_index_stop),
+        )
+
+
+async def stop_pantry_index(app: FastAPI) -> None:
+    task = app.state.pantry_index_task
+
+    if task is None:
+        return
+
+    # A cancel can be swallowed while a refresh opens its transaction, so
+    # the loop is stopped through the event and only cancelled on timeout.
+    app.state.pantry_index_stop.set()
+
+    try:
+        await asyncio.wait_for(task, PANTRY_INDEX_STOP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Pantry index refresh did not stop in time, cancelled.")
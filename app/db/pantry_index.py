@@ -0,0 +1,232 @@
+import time
+import uuid
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import PANTRY_INDEX_ENABLED
+
+# A bitmap takes one bit per recipe, a posting list four bytes per entry, so
+# from this share of recipes on a bitmap is the smaller of the two.
+DENSE_POSTINGS_RATIO = 32
+UUID_BYTES = 16
+
+
+class PantryMatch(NamedTuple):
+    recipe_id: str
+    matched: int
+    missing: int
+
+
+class PantrySnapshot(NamedTuple):
+    size: int
+    everything: int
+    recipe_ids: bytes
+    total_slices: Tuple[int, ...]
+    postings: Dict[str, "array[int]"]
+    bitmaps: Dict[str, int]
+    loaded_at: Optional[float]
+
+
+EMPTY_SNAPSHOT = PantrySnapshot(0, 0, b"", (), {}, {}, None)
+
+
+def postings_bitmap(postings: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+
+    for index in postings:
+        bits[index >> 3] |= 1 << (index & 7)
+
+    return int.from_bytes(bits, "little")
+
+
+def bit_slices(values: Sequence[int]) -> List[int]:
+    width = max(values, default=0).bit_length()
+    slices = [bytearray((len(values) + 7) // 8) for _ in range(width)]
+
+    for index, value in enumerate(values):
+        bit = 0
+
+        while value:
+            if value & 1:
+                slices[bit][index >> 3] |= 1 << (index & 7)
+
+            value >>= 1
+            bit += 1
+
+    return [int.from_bytes(bits, "little") for bits in slices]
+
+
+class PantryIndex:
+    # Recipes are numbered in recipe id order and every set of recipes is a
+    # Python int used as a bitmap. Per recipe counts are kept bit-sliced,
+    # slice i holding bit i of the count for every recipe, so scoring a
+    # pantry is a few dozen whole-bitmap operations rather than a loop over
+    # each recipe or posting.
+    #
+    # load() runs in an executor thread while score() runs on the event loop,
+    # so everything one load builds lives in a single snapshot that is
+    # published with one reference assignment and never changed afterwards.
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._snapshot = EMPTY_SNAPSHOT
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        return self._snapshot.loaded_at
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.loaded_at is not None
+
+    def load(
+        self,
+        recipe_ids: bytes,
+        totals: Sequence[int],
+        postings: Dict[str, "array[int]"],
+    ) -> None:
+        size = len(totals)
+        dense_size = size // DENSE_POSTINGS_RATIO
+        bitmaps = {
+            ingredient_id: postings_bitmap(ingredient_postings, size)
+            for ingredient_id, ingredient_postings in postings.items()
+            if len(ingredient_postings) > dense_size
+        }
+        sparse = {
+            ingredient_id: ingredient_postings
+            for ingredient_id, ingredient_postings in postings.items()
+            if ingredient_id not in bitmaps
+        }
+        self._snapshot = PantrySnapshot(
+            size=size,
+            everything=(1 << size) - 1,
+            recipe_ids=recipe_ids,
+            total_slices=tuple(bit_slices(totals)),
+            postings=sparse,
+            bitmaps=bitmaps,
+            loaded_at=time.monotonic(),
+        )
+
+    def clear(self) -> None:
+        self._snapshot = EMPTY_SNAPSHOT
+
+    def stats(self) -> Dict[str, int]:
+        snapshot = self._snapshot
+
+        return {
+            "recipes": snapshot.size,
+            "ingredients": len(snapshot.postings) + len(snapshot.bitmaps),
+            "dense_ingredients": len(snapshot.bitmaps),
+        }
+
+    def score(
+        self,
+        ingredient_ids: Iterable[str],
+        max_missing: int,
+        limit: int,
+    ) -> List[PantryMatch]:
+        snapshot = self._snapshot
+        everything = snapshot.everything
+        matched_slices: List[int] = []
+
+        for ingredient_id in set(ingredient_ids):
+            bitmap = self._bitmap(snapshot, ingredient_id)
+            bit = 0
+
+            # Adds the ingredient to every recipe count it appears in.
+            while bitmap:
+                if bit == len(matched_slices):
+                    matched_slices.append(bitmap)
+                    break
+
+                matched_slices[bit], bitmap = (
+                    matched_slices[bit] ^ bitmap,
+                    matched_slices[bit] & bitmap,
+                )
+                bit += 1
+
+        candidates = 0
+
+        for matched_slice in matched_slices:
+            candidates |= matched_slice
+
+        if not candidates:
+            return []
+
+        missing_slices = self._subtract(snapshot.total_slices, matched_slices)
+        max_missing = min(max_missing, (1 << len(missing_slices)) - 1)
+        max_matched = (1 << len(matched_slices)) - 1
+        matches: List[PantryMatch] = []
+
+        for missing in range(max_missing + 1):
+            missing_mask = candidates & self._equal(
+                missing_slices,
+                missing,
+                everything,
+            )
+
+            for matched in range(max_matched, 0, -1):
+                if not missing_mask or len(matches) == limit:
+                    break
+
+                mask = missing_mask & self._equal(matched_slices, matched, everything)
+                missing_mask &= ~mask
+
+                while mask and len(matches) < limit:
+                    lowest = mask & -mask
+                    mask ^= lowest
+                    matches.append(
+                        PantryMatch(
+                            self._recipe_id(snapshot, lowest.bit_length() - 1),
+                            matched,
+                            missing,
+                        ),
+                    )
+
+            if len(matches) == limit:
+                break
+
+        return matches
+
+    @staticmethod
+    def _bitmap(snapshot: PantrySnapshot, ingredient_id: str) -> int:
+        bitmap = snapshot.bitmaps.get(ingredient_id)
+
+        if bitmap is not None:
+            return bitmap
+
+        return postings_bitmap(snapshot.postings.get(ingredient_id, ()), snapshot.size)
+
+    @staticmethod
+    def _recipe_id(snapshot: PantrySnapshot, index: int) -> str:
+        start = index * UUID_BYTES
+        end = start + UUID_BYTES
+
+        return str(uuid.UUID(bytes=snapshot.recipe_ids[start:end]))
+
+    @staticmethod
+    def _subtract(minuend: Sequence[int], subtrahend: Sequence[int]) -> List[int]:
+        difference = []
+        borrow = 0
+
+        for bit in range(max(len(minuend), len(subtrahend))):
+            left = minuend[bit] if bit < len(minuend) else 0
+            right = subtrahend[bit] if bit < len(subtrahend) else 0
+            difference.append(left ^ right ^ borrow)
+            borrow = (~left & right) | (~(left ^ right) & borrow)
+
+        return difference
+
+    @staticmethod
+    def _equal(slices: List[int], value: int, everything: int) -> int:
+        if value >> len(slices):
+            return 0
+
+        mask = everything
+
+        for bit, bit_slice in enumerate(slices):
+            mask &= bit_slice if value >> bit & 1 else ~bit_slice
+
+        return mask
+
+
+pantry_index = PantryIndex(PANTRY_INDEX_ENABLED)
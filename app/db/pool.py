@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from asyncpg import Connection  # type: ignore
+from asyncpg.pool import Pool  # type: ignore
+from databases import Database
+
+MS = 1000
+ACQUIRE_SAMPLES = 1000
+
+
+class InstrumentedPool:
+    # Stands in for the asyncpg pool behind a databases.Database, which
+    # acquires with no timeout and exposes nothing about waiting requests.
+    def __init__(self, pool: Pool, acquire_timeout: Optional[float]) -> None:
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.waiting = 0
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self.acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+        self._samples: Deque[float] = deque(maxlen=ACQUIRE_SAMPLES)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    async def acquire(self) -> Connection:
+        # Only acquires that find every connection in use have to wait.
+        blocked = self._in_use() >= self._pool.get_max_size()
+        self.waiting += blocked
+        started = time.perf_counter()
+
+        try:
+            connection = await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        finally:
+            self.waiting -= blocked
+
+        elapsed = time.perf_counter() - started
+        self.acquires += 1
+        self.acquire_seconds += elapsed
+        self.max_acquire_seconds = max(self.max_acquire_seconds, elapsed)
+        self._samples.append(elapsed)
+
+        return connection
+
+    async def prewarm(self, connections: int) -> int:
+        # Opens and checks connections up front so the first requests after a
+        # boot do not pay for the handshake; bypasses the acquire metrics.
+        count = min(connections, self._pool.get_max_size())
+        results = await asyncio.gather(
+            *[self._pool.acquire() for _ in range(count)],
+            return_exceptions=True,
+        )
+        acquired = [
+            result for result in results if not isinstance(result, BaseException)
+        ]
+
+        try:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            await asyncio.gather(
+                *[connection.execute("SELECT 1") for connection in acquired],
+            )
+        finally:
+            for connection in acquired:
+                await self._pool.release(connection)
+
+        return count
+
+    def _in_use(self) -> int:
+        return self._pool.get_size() - self._pool.get_idle_size()
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        samples = sorted(self._samples)
+
+        return {
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_mean_ms": (
+                self.acquire_seconds / self.acquires * MS if self.acquires else 0.0
+            ),
+            "acquire_p95_ms": (
+                samples[int(0.95 * (len(samples) - 1))] * MS if samples else 0.0
+            ),
+            "acquire_max_ms": self.max_acquire_seconds * MS,
+        }
+
+
+def instrument_pool(database: Database, acquire_timeout: float) -> InstrumentedPool:
+    backend = database._backend
+    pool = InstrumentedPool(backend._pool, acquire_timeout)
+    backend._pool = pool
+
+    return pool
@@ -0,0 +1,187 @@
+import asyncio
+import random
+import reprlib
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+from databases import Database
+from databases.core import Connection
+from loguru import logger
+from sqlalchemy.sql import ClauseElement  # type: ignore
+
+from app.db.repositories.base import BaseRepository
+
+MS = 1000
+EXPLAIN = "EXPLAIN"
+UNKNOWN_CALLER = "unknown"
+
+PARAMS_REPR = reprlib.Repr()
+PARAMS_REPR.maxstring = 120
+PARAMS_REPR.maxother = 120
+PARAMS_REPR.maxlist = 20
+
+Query = Union[ClauseElement, str]
+
+
+def calling_method(frame: Any) -> str:
+    # Only walked for statements over the threshold. The innermost frame that
+    # runs on a repository is the method that issued the statement.
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+
+        if isinstance(owner, BaseRepository):
+            return "{0}.{1}".format(type(owner).__name__, frame.f_code.co_name)
+
+        frame = frame.f_back
+
+    return UNKNOWN_CALLER
+
+
+class InstrumentedDatabase:
+    # Stands in for the databases.Database the repositories are given and
+    # times every execute and fetch once its connection is held, so waiting
+    # on the pool, which the pool stats report, is not counted as slow SQL.
+    def __init__(
+        self,
+        database: Database,
+        threshold_ms: float,
+        explain_rate: float,
+        explain_timeout_ms: float,
+    ) -> None:
+        self._database = database
+        self.threshold = threshold_ms / MS if threshold_ms > 0 else float("inf")
+        self.explain_rate = explain_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self.statements = 0
+        self.slow_statements = 0
+        self.explains: Set["asyncio.Task[None]"] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._database, name)
+
+    async def fetch_all(
+        self,
+        query: Query,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        async with self._database.connection() as connection:
+            started = time.perf_counter()
+            rows = await connection.fetch_all(query, values)
+            self._record(query, values, started, sys._getframe(1))
+
+        return rows
+
+    async def fetch_one(
+        self,
+        query: Query,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        async with self._database.connection() as connection:
+            started = time.perf_counter()
+            row = await connection.fetch_one(query, values)
+            self._record(query, values, started, sys._getframe(1))
+
+        return row
+
+    async def fetch_val(
+        self,
+        query: Query,
+        values: Optional[Dict[str, Any]] = None,
+        column: Any = 0,
+    ) -> Any:
+        async with self._database.connection() as connection:
+            started = time.perf_counter()
+            value = await connection.fetch_val(query, values, column=column)
+            self._record(query, values, started, sys._getframe(1))
+
+        return value
+
+    async def execute(
+        self,
+        query: Query,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        async with self._database.connection() as connection:
+            started = time.perf_counter()
+            result = await connection.execute(query, values)
+            self._record(query, values, started, sys._getframe(1))
+
+        return result
+
+    def _record(
+        self,
+        query: Query,
+        values: Optional[Dict[str, Any]],
+        started: float,
+        frame: Any,
+    ) -> None:
+        elapsed = time.perf_counter() - started
+        self.statements += 1
+
+        if elapsed < self.threshold:
+            return
+
+        self.slow_statements += 1
+        caller = calling_method(frame)
+        sql, args, _ = self._database._backend.connection()._compile(
+            Connection._build_query(query, values),
+        )
+        logger.warning(
+            "Slow query in {0} took {1:.1f} ms: {2} params {3}",
+            caller,
+            elapsed * MS,
+            " ".join(sql.split()),
+            PARAMS_REPR.repr(args),
+        )
+
+        if not sql.lstrip().upper().startswith(EXPLAIN) and (
+            random.random() < self.explain_rate
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(caller, sql, args),
+            )
+            self.explains.add(task)
+            task.add_done_callback(self.explains.discard)
+
+    async def _explain(self, caller: str, sql: str, args: List[Any]) -> None:
+        # EXPLAIN ANALYZE runs the statement again, so it gets its own pool
+        # connection off the request path and a transaction that is always
+        # rolled back, which keeps a sampled write from being applied twice.
+        pool = self._database._backend._pool
+
+        try:
+            connection = await pool.acquire()
+
+            try:
+                transaction = connection.transaction()
+                await transaction.start()
+
+                try:
+                    await connection.execute(
+                        "SET LOCAL statement_timeout = {0}; "
+                        "SET LOCAL lock_timeout = {0}".format(
+                            int(self.explain_timeout_ms),
+                        ),
+                    )
+                    plan = await connection.fetch(
+                        "{0} (ANALYZE, BUFFERS) {1}".format(EXPLAIN, sql),
+                        *args,
+                    )
+                finally:
+                    await transaction.rollback()
+            finally:
+                await pool.release(connection)
+        except Exception as error:
+            logger.warning("EXPLAIN of slow query in {0} failed: {1}", caller, error)
+            return
+
+        logger.warning(
+            "EXPLAIN of slow query in {0}:\n{1}",
+            caller,
+            "\n".join(row[0] for row in plan),
+        )
+
+    async def wait_for_explains(self) -> None:
+        if self.explains:
+            await asyncio.gather(*self.explains)
@@ -1,12 +1,185 @@
-from typing import Dict, List
+import inspect
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from databases import Database
+from pydantic import BaseModel
 from sqlalchemy import Table  # type: ignore
-from sqlalchemy import text
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    and_,
+    bindparam,
+    cast,
+    false,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql  # type: ignore
 from sqlalchemy.orm import Query  # type: ignore
+from sqlalchemy.sql import operators  # type: ignore
+from sqlalchemy.sql.elements import ClauseElement, TextClause  # type: ignore
+
+from app.core.config import METRICS_ENABLED
+from app.core.metrics import time_repository_method
+from app.db.cache import count_cache
+from app.resources.common_constants import (
+    BATCH_COPY_THRESHOLD,
+    COUNT_AUTO,
+    COUNT_ESTIMATED,
+    COUNT_EXACT,
+    EXPORT_CHUNK_ROWS,
+)
+from app.utils.filters import FilterParam
+from app.utils.pagination import CURSOR_ID_KEY, CURSOR_RANK_KEY
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+SORT_ASC = "asc"
+SORT_DESC = "desc"
+
+STATEMENT_DIALECT = postgresql.dialect(paramstyle="named")
+
+FILTER_OPERATORS = {
+    "LIKE": operators.like_op,
+    "ILIKE": operators.ilike_op,
+    "=": operators.eq,
+    "!=": operators.ne,
+    "<": operators.lt,
+    "<=": operators.le,
+    ">": operators.gt,
+    ">=": operators.ge,
+}
+
+
+def compile_statement(statement: ClauseElement) -> TextClause:
+    # Compiling a SQLAlchemy construct on every call costs more than a local
+    # round trip, so hot fixed-shape queries are compiled once at import and
+    # executed as text with per-request bind params.
+    return text(str(statement.compile(dialect=STATEMENT_DIALECT)))
+
+
+def row_model(model: Type[ModelT], row: Any, **values: Any) -> ModelT:
+    # Rows read back from our own tables were validated on the way in and
+    # are held to the models' types by the columns, so validating them again
+    # only costs time on every page. Fields are filled in model order from
+    # the keyword values, then the row, and extra row columns are dropped.
+    fields = {
+        name: values[name] if name in values else row[name] for name in model.__fields__
+    }
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", fields)
+    object.__setattr__(instance, "__fields_set__", set(fields))
+
+    return instance
+
+
+# The planner's own row estimate for a whole table: tuples per page from the
+# last ANALYZE scaled to the table's current size. NULL before the first one.
+ESTIMATED_COUNT_QUERY = text(
+    "SELECT (reltuples / relpages * (pg_relation_size(oid) / "
+    "current_setting('block_size')::integer))::bigint "
+    "FROM pg_class "
+    "WHERE oid = CAST(:table_name AS regclass) AND relpages > 0 AND reltuples >= 0",
+)
+
+BULK_INSERT_STATEMENTS: Dict[str, TextClause] = {}
+
+
+def bulk_insert_statement(table: Table) -> TextClause:
+    if table.name not in BULK_INSERT_STATEMENTS:
+        columns = list(table.c)
+        rows = func.unnest(
+            *[
+                cast(bindparam(column.name), postgresql.ARRAY(column.type))
+                for column in columns
+            ],
+        ).table_valued(*[column.name for column in columns])
+        rows = rows.render_derived(name="rows")
+        statement = (
+            postgresql.insert(table)
+            .from_select([column.name for column in columns], select(rows))
+            .on_conflict_do_nothing()
+            .returning(*table.primary_key.columns)
+        )
+        BULK_INSERT_STATEMENTS[table.name] = compile_statement(statement)
+
+    return BULK_INSERT_STATEMENTS[table.name]
+
+
+SEARCH_VECTOR = "search_vector"
+SEARCH_QUERY = "search_query"
+SEARCH_STATEMENTS: Dict[Tuple[str, bool], TextClause] = {}
+
+
+def search_statement(table: Table, after_cursor: bool) -> TextClause:
+    # Ranked full-text search over the generated search_vector column, ties
+    # broken by id. The cursor variant seeks past the last (rank, id) seen.
+    key = (table.name, after_cursor)
+
+    if key not in SEARCH_STATEMENTS:
+        search_vector = literal_column(
+            "{0}.{1}".format(table.name, SEARCH_VECTOR),
+            type_=postgresql.TSVECTOR,
+        )
+        # Called in FROM so the query text is parsed once, not once per row
+        # as it would be in a generic plan of the prepared statement.
+        ts_query = func.websearch_to_tsquery(
+            literal_column("'english'::regconfig"),
+            bindparam("q", type_=String),
+        ).column_valued(SEARCH_QUERY)
+        rank = func.ts_rank_cd(search_vector, ts_query, type_=Float)
+        statement = (
+            select([table, rank.label(CURSOR_RANK_KEY)])
+            .select_from(table)
+            .where(search_vector.op("@@")(ts_query))
+            .order_by(rank.desc(), table.c.id.desc())
+            .limit(bindparam("limit", type_=Integer))
+        )
+
+        if after_cursor:
+            statement = statement.where(
+                tuple_(rank, table.c.id)
+                < tuple_(
+                    bindparam(CURSOR_RANK_KEY, type_=Float),
+                    bindparam(CURSOR_ID_KEY, type_=postgresql.UUID),
+                ),
+            )
+
+        SEARCH_STATEMENTS[key] = compile_statement(statement)
+
+    return SEARCH_STATEMENTS[key]
 
 
 class BaseRepository:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        # Every public coroutine of a repository is timed, async generators
+        # are left alone since they return before any query runs.
+        super().__init_subclass__(**kwargs)
+
+        if not METRICS_ENABLED:
+            return
+
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, time_repository_method(cls.__name__, name, method))
+
     def __init__(self, db: Database) -> None:
         self._db = db
 
@@ -14,6 +187,168 @@ class BaseRepository:
     def db(self) -> Database:
         return self._db
 
+    async def _bulk_insert(
+        self,
+        table: Table,
+        rows: List[Dict[str, Any]],
+    ) -> List[Any]:
+        # Skips rows that hit a unique constraint and returns the primary keys
+        # of the inserted ones. Callers must hold a transaction, the COPY path
+        # stages rows in a temp table that lives until commit.
+        if not rows:
+            return []
+
+        if len(rows) < BATCH_COPY_THRESHOLD:
+            values = {
+                column.name: [row[column.name] for row in rows] for column in table.c
+            }
+
+            return await self.db.fetch_all(
+                bulk_insert_statement(table).bindparams(**values),
+            )
+
+        return await self._copy_insert(table, rows)
+
+    def _find_batch_duplicates(
+        self,
+        items: Sequence[BaseModel],
+        unique_fields: Sequence[str],
+    ) -> Set[int]:
+        seen: Dict[str, Set[Any]] = {field: set() for field in unique_fields}
+        duplicates = set()
+
+        for index, item in enumerate(items):
+            values = {field: getattr(item, field) for field in unique_fields}
+
+            if any(values[field] in seen[field] for field in unique_fields):
+                duplicates.add(index)
+                continue
+
+            for field, value in values.items():
+                seen[field].add(value)
+
+        return duplicates
+
+    async def _search(
+        self,
+        table: Table,
+        q: str,
+        limit: int,
+        cursor: Dict[str, Any] = None,
+    ) -> List[Any]:
+        if cursor is None:
+            query = search_statement(table, False).bindparams(q=q, limit=limit)
+        else:
+            query = search_statement(table, True).bindparams(
+                q=q,
+                limit=limit,
+                **cursor,
+            )
+
+        return await self.db.fetch_all(query)
+
+    async def _count(
+        self,
+        table: Table,
+        filters: Optional[List[FilterParam]] = None,
+        mode: str = COUNT_AUTO,
+    ) -> int:
+        if mode == COUNT_AUTO:
+            mode = COUNT_EXACT if filters else COUNT_ESTIMATED
+
+        # Estimates come from the catalog or the planner and cost about as
+        # much as a primary key lookup, so only exact counts are cached.
+        if mode == COUNT_ESTIMATED:
+            if filters:
+                return await self._planned_count(
+                    self._add_filters(table.select(), filters, table),
+                )
+
+            estimate = await self.db.fetch_val(
+                ESTIMATED_COUNT_QUERY.bindparams(table_name=table.name),
+            )
+
+            if estimate is not None:
+                return estimate
+
+        key = (table.name, tuple(filters or ()))
+        total = count_cache.get(key)
+
+        if total is not None:
+            return total
+
+        token = count_cache.token()
+        query = select([func.count()]).select_from(table)
+
+        if filters:
+            query = self._add_filters(query, filters, table)
+
+        total = await self.db.fetch_val(query)
+        count_cache.set(key, total, token, tags=(table.name,))
+
+        return total
+
+    async def _planned_count(self, query: Query) -> int:
+        compiled = query.compile(dialect=STATEMENT_DIALECT)
+        plan = await self.db.fetch_val(
+            text("EXPLAIN (FORMAT JSON) {0}".format(compiled)).bindparams(
+                **compiled.params,
+            ),
+        )
+
+        return int(json.loads(plan)[0]["Plan"]["Plan Rows"])
+
+    async def _stream(self, query: TextClause) -> AsyncIterator[Any]:
+        # A server side cursor hands over EXPORT_CHUNK_ROWS rows per round trip
+        # so memory stays flat whatever the table size. The connection is only
+        # taken once the first row is wanted and goes back to the pool when
+        # the last one is read or the consumer stops early.
+        async with self.db.connection() as connection:
+            async with connection.transaction(
+                isolation="repeatable_read",
+                readonly=True,
+            ):
+                async for row in connection.raw_connection.cursor(
+                    str(query),
+                    prefetch=EXPORT_CHUNK_ROWS,
+                ):
+                    yield row
+
+    async def _copy_insert(
+        self,
+        table: Table,
+        rows: List[Dict[str, Any]],
+    ) -> List[Any]:
+        connection = self.db.connection().raw_connection
+        staging = "{0}_staging".format(table.name)
+        columns = [column.name for column in table.c]
+        column_list = ", ".join(columns)
+        primary_key = ", ".join(column.name for column in table.primary_key.columns)
+
+        await connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS {0} (LIKE {1}) ON COMMIT DROP".format(
+                staging,
+                table.name,
+            ),
+        )
+        await connection.copy_records_to_table(
+            staging,
+            records=[tuple(row[column] for column in columns) for row in rows],
+            columns=columns,
+        )
+        inserted = await connection.fetch(
+            "INSERT INTO {0} ({1}) SELECT {1} FROM {2} "
+            "ON CONFLICT DO NOTHING RETURNING {3}".format(
+                table.name,
+                column_list,
+                staging,
+                primary_key,
+            ),
+        )
+        await connection.execute("TRUNCATE {0}".format(staging))
+
+        return inserted
+
     def _add_sorting(
         self,
         query: Query,
@@ -21,16 +356,107 @@ class BaseRepository:
         table: Table,
     ) -> Query:
         for sort_key, sort_value in sort_params.items():
-            if sort_value == "asc":
+            if sort_value == SORT_ASC:
                 query = query.order_by(table.c[sort_key].asc())
-            elif sort_value == "desc":
+            elif sort_value == SORT_DESC:
                 query = query.order_by(table.c[sort_key].desc())
 
         return query
 
-    def _add_filters(self, query: Query, filters: List[str], table: Table) -> Query:
-
+    def _add_filters(
+        self,
+        query: Query,
+        filters: List[FilterParam],
+        table: Table,
+    ) -> Query:
+        # Values are bound, so requests that differ only in filter values
+        # produce the same SQL text and reuse one prepared statement.
         for filter_param in filters:
-            query = query.where(text(filter_param))
+            condition = FILTER_OPERATORS[filter_param.operator]
+            query = query.where(
+                condition(table.c[filter_param.field], filter_param.value),
+            )
 
         return query
+
+    def _add_pagination(
+        self,
+        query: Query,
+        limit: int,
+        offset: int,
+        table: Table,
+        sort_params: Dict[str, str] = None,
+        cursor: Dict[str, Any] = None,
+    ) -> Query:
+        sort_params = sort_params or {}
+        directions = list(sort_params.values()) or [SORT_ASC]
+        keyset = {**sort_params, CURSOR_ID_KEY: directions[-1]}
+
+        query = self._add_sorting(
+            query,
+            {CURSOR_ID_KEY: keyset[CURSOR_ID_KEY]},
+            table,
+        )
+
+        if cursor is None:
+            return query.limit(limit).offset(offset)
+
+        return query.where(self._seek_condition(keyset, cursor, table)).limit(limit)
+
+    def _seek_condition(
+        self,
+        keyset: Dict[str, str],
+        cursor: Dict[str, Any],
+        table: Table,
+    ) -> Any:
+        columns = [table.c[key] for key in keyset]
+        values = [cursor[key] for key in keyset]
+        directions = set(keyset.values())
+
+        if len(directions) == 1 and not any(
+            column.nullable or value is None for column, value in zip(columns, values)
+        ):
+            if directions == {SORT_ASC}:
+                return tuple_(*columns) > tuple_(*values)
+
+            return tuple_(*columns) < tuple_(*values)
+
+        # Mixed directions and NULLs cannot use a row comparison, so expand it
+        # into "(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..." following Postgres
+        # NULLS LAST / NULLS FIRST ordering for asc / desc.
+        clauses = []
+
+        for index, (column, value) in enumerate(zip(columns, values)):
+            equal_prefix = [
+                self._equal_to(prev_column, prev_value)
+                for prev_column, prev_value in zip(columns[:index], values[:index])
+            ]
+            clauses.append(
+                and_(
+                    *equal_prefix,
+                    self._after(column, value, keyset[column.name]),
+                ),
+            )
+
+        return or_(*clauses)
+
+    def _equal_to(self, column: Any, value: Any) -> Any:
+        if value is None:
+            return column.is_(None)
+
+        return column == value
+
+    def _after(self, column: Any, value: Any, direction: str) -> Any:
+        if direction == SORT_ASC:
+            if value is None:
+                return false()
+
+            if column.nullable:
+                return or_(column > value, column.is_(None))
+
+            return column > value
+
+        if value is None:
+            return column.isnot(None)
+
+        return column < value
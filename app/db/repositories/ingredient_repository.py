@@ -1,7 +1,52 @@
-from typing import Dict, List, Optional
-
-from app.db.repositories.base import BaseRepository
-from app.models.ingredient import IngredientModel, IngredientOrm, UpdatedIngredientModel
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import any_, bindparam, select  # type: ignore
+
+from app.db.cache import count_cache, entity_key, ingredient_cache, recipe_cache
+from app.db.repositories.base import BaseRepository, compile_statement, row_model
+from app.models.batch import BatchItemResult, BatchResult
+from app.models.ingredient import (
+    IngredientModel,
+    IngredientOrm,
+    IngredientSearchResult,
+    UpdatedIngredientModel,
+)
+from app.resources.common_constants import (
+    BATCH_DUPLICATE_ITEM,
+    BATCH_STATUS_CONFLICT,
+    BATCH_STATUS_CREATED,
+    COUNT_AUTO,
+)
+from app.resources.ingredient_constants import (
+    INGREDIENT_ID_ALREADY_EXISTS,
+    INGREDIENT_NAME_ALREADY_EXISTS,
+)
+from app.utils.etag import entity_etag, model_etag
+from app.utils.filters import FilterParam
+
+UNIQUE_FIELDS = ("id", "name")
+
+GET_INGREDIENT_VERSION_QUERY = compile_statement(
+    select(
+        [
+            IngredientOrm.table().c.id,
+            IngredientOrm.table().c.created_at,
+            IngredientOrm.table().c.updated_at,
+        ],
+    ).where(IngredientOrm.table().c.id == bindparam("ingredient_id")),
+)
+
+
+DELETE_INGREDIENT_QUERY = compile_statement(
+    IngredientOrm.table()
+    .delete()
+    .where(IngredientOrm.table().c.id == bindparam("ingredient_id"))
+    .returning(*IngredientOrm.table().c),
+)
+
+EXPORT_INGREDIENTS_QUERY = compile_statement(
+    IngredientOrm.table().select().order_by(IngredientOrm.table().c.id),
+)
 
 
 class IngredientRepository(BaseRepository):
@@ -10,18 +55,84 @@ class IngredientRepository(BaseRepository):
         sql = ingredients_table.insert().values(**ingredient.dict())
 
         await self.db.execute(sql)
+        count_cache.invalidate_tag(ingredients_table.name)
 
         return ingredient
 
+    async def create_ingredients(
+        self,
+        ingredients: List[IngredientModel],
+    ) -> BatchResult:
+        ingredients_table = IngredientOrm.table()
+        duplicates = self._find_batch_duplicates(ingredients, UNIQUE_FIELDS)
+        candidates = [
+            ingredient
+            for index, ingredient in enumerate(ingredients)
+            if index not in duplicates
+        ]
+
+        async with self.db.transaction():
+            inserted = await self._bulk_insert(
+                ingredients_table,
+                [ingredient.dict() for ingredient in candidates],
+            )
+
+        count_cache.invalidate_tag(ingredients_table.name)
+        inserted_ids = {str(row["id"]) for row in inserted}
+        existing_names = set()
+
+        if len(inserted_ids) < len(candidates):
+            query = select([ingredients_table.c.name]).where(
+                ingredients_table.c.name
+                == any_(
+                    [
+                        ingredient.name
+                        for ingredient in candidates
+                        if str(ingredient.id) not in inserted_ids
+                    ],
+                ),
+            )
+            existing_names = {row["name"] for row in await self.db.fetch_all(query)}
+
+        items = []
+
+        for index, ingredient in enumerate(ingredients):
+            status, detail = BATCH_STATUS_CONFLICT, None
+
+            if index in duplicates:
+                detail = BATCH_DUPLICATE_ITEM
+            elif str(ingredient.id) in inserted_ids:
+                status = BATCH_STATUS_CREATED
+            elif ingredient.name in existing_names:
+                detail = INGREDIENT_NAME_ALREADY_EXISTS
+            else:
+                detail = INGREDIENT_ID_ALREADY_EXISTS
+
+            items.append(
+                BatchItemResult(
+                    id=ingredient.id,
+                    name=ingredient.name,
+                    status=status,
+                    detail=detail,
+                ),
+            )
+
+        return BatchResult(
+            created=len(inserted_ids),
+            conflicts=len(ingredients) - len(inserted_ids),
+            items=items,
+        )
+
     async def get_ingredients(
         self,
         limit: int,
         offset: int,
         sort_params: Dict[str, str] = None,
-        filters: List[str] = None,
+        filters: List[FilterParam] = None,
+        cursor: Dict[str, Any] = None,
     ) -> List[IngredientModel]:
         ingredients_table = IngredientOrm.table()
-        query = ingredients_table.select().limit(limit).offset(offset)
+        query = ingredients_table.select()
 
         if sort_params:
             query = self._add_sorting(query, sort_params, ingredients_table)
@@ -29,11 +140,51 @@ class IngredientRepository(BaseRepository):
         if filters:
             query = self._add_filters(query, filters, ingredients_table)
 
+        query = self._add_pagination(
+            query,
+            limit,
+            offset,
+            ingredients_table,
+            sort_params=sort_params,
+            cursor=cursor,
+        )
+
         ingredients = await self.db.fetch_all(query)
 
-        return [IngredientModel(**ingredient) for ingredient in ingredients]
+        return [row_model(IngredientModel, ingredient) for ingredient in ingredients]
+
+    async def count_ingredients(
+        self,
+        filters: List[FilterParam] = None,
+        mode: str = COUNT_AUTO,
+    ) -> int:
+        return await self._count(IngredientOrm.table(), filters=filters, mode=mode)
+
+    async def search_ingredients(
+        self,
+        q: str,
+        limit: int,
+        cursor: Dict[str, Any] = None,
+    ) -> List[IngredientSearchResult]:
+        ingredients_table = IngredientOrm.table()
+        ingredients = await self._search(ingredients_table, q, limit, cursor=cursor)
+
+        return [
+            row_model(IngredientSearchResult, ingredient) for ingredient in ingredients
+        ]
+
+    async def export_ingredients(self) -> AsyncIterator[Dict[str, Any]]:
+        async for ingredient in self._stream(EXPORT_INGREDIENTS_QUERY):
+            yield dict(ingredient)
 
     async def get_one_ingredient(self, id: str) -> Optional[IngredientModel]:
+        key = entity_key(id)
+        cached: Optional[IngredientModel] = ingredient_cache.get(key)
+
+        if cached is not None:
+            return cached
+
+        token = ingredient_cache.token()
         ingredients_table = IngredientOrm.table()
         query = ingredients_table.select().where(ingredients_table.c.id == id)
         ingredient = await self.db.fetch_one(query)
@@ -41,42 +192,64 @@ class IngredientRepository(BaseRepository):
         if ingredient is None:
             return None
 
-        return IngredientModel(**ingredient)
+        model = row_model(IngredientModel, ingredient)
+        ingredient_cache.set(key, model, token)
+
+        return model
+
+    async def get_ingredient_etag(self, id: str) -> Optional[str]:
+        cached: Optional[IngredientModel] = ingredient_cache.get(entity_key(id))
+
+        if cached is not None:
+            return model_etag(cached)
+
+        query = GET_INGREDIENT_VERSION_QUERY.bindparams(ingredient_id=id)
+        version = await self.db.fetch_one(query)
+
+        if version is None:
+            return None
+
+        return entity_etag(
+            version["id"],
+            version["created_at"],
+            version["updated_at"],
+        )
 
     async def update_ingredient(
         self,
         id: str,
         updated_ingredient: UpdatedIngredientModel,
     ) -> Optional[IngredientModel]:
-        ingredient: Optional[IngredientModel] = await self.get_one_ingredient(id)
         ingredients_table = IngredientOrm.table()
-
-        if ingredient is None:
-            return None
-
-        update_values = {
-            ingredient_key: ingredient_val
-            for ingredient_key, ingredient_val in updated_ingredient.dict().items()
-            if ingredient_val is not None
-        }
-
         sql = (
             ingredients_table.update()
             .where(ingredients_table.c.id == id)
-            .values(**update_values)
+            .values(**updated_ingredient.dict(exclude_none=True))
+            .returning(*ingredients_table.c)
         )
-        await self.db.execute(sql)
+        ingredient = await self.db.fetch_one(sql)
+
+        if ingredient is None:
+            return None
+
+        self._invalidate_cache(id)
 
-        return await self.get_one_ingredient(id)
+        return row_model(IngredientModel, ingredient)
 
     async def delete_ingredient(self, id: str) -> Optional[IngredientModel]:
-        ingredient: Optional[IngredientModel] = await self.get_one_ingredient(id)
-        ingredients_table = IngredientOrm.table()
+        query = DELETE_INGREDIENT_QUERY.bindparams(ingredient_id=id)
+        ingredient = await self.db.fetch_one(query)
 
         if ingredient is None:
             return None
 
-        sql = ingredients_table.delete().where(IngredientOrm.table().c.id == id)
-        await self.db.execute(sql)
+        self._invalidate_cache(id)
 
-        return ingredient
+        return row_model(IngredientModel, ingredient)
+
+    def _invalidate_cache(self, id: str) -> None:
+        key = entity_key(id)
+        ingredient_cache.invalidate(key)
+        # Recipe details embed ingredient names and lose join rows on delete.
+        recipe_cache.invalidate_tag(key)
+        count_cache.invalidate_tag(IngredientOrm.table().name)
@@ -1,19 +1,290 @@
-from typing import Dict, List, Optional
-
-from sqlalchemy import select  # type: ignore
-
-from app.db.repositories.base import BaseRepository
+import asyncio
+import json
+import uuid
+from array import array
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
+
+from sqlalchemy import Table  # type: ignore
+from sqlalchemy import and_, any_, bindparam, cast, func, literal_column, select, true
+from sqlalchemy.dialects import postgresql  # type: ignore
+from sqlalchemy.dialects.postgresql import aggregate_order_by  # type: ignore
+from sqlalchemy.sql.elements import Label  # type: ignore
+from sqlalchemy.sql.selectable import Select  # type: ignore
+
+from app.db.cache import count_cache, entity_key, recipe_cache
+from app.db.pantry_index import pantry_index
+from app.db.repositories.base import BaseRepository, compile_statement, row_model
+from app.models.batch import BatchItemResult, BatchResult
 from app.models.ingredient import IngredientForRecipe, IngredientOrm
 from app.models.recipe import (
     RecipeModel,
     RecipeModelWithIngredients,
     RecipeOrm,
+    RecipePantryMatch,
+    RecipeSearchResult,
     UpdatedRecipeModel,
 )
 from app.models.recipes_ingredients import recipes_ingredients
+from app.resources.common_constants import (
+    BATCH_DUPLICATE_ITEM,
+    BATCH_STATUS_CONFLICT,
+    BATCH_STATUS_CREATED,
+    BATCH_STATUS_INVALID,
+    COUNT_AUTO,
+)
+from app.resources.ingredient_constants import INGREDIENT_DOES_NOT_EXIST
+from app.resources.recipe_constants import RECIPE_ALREADY_EXISTS
+from app.utils.etag import entity_etag, model_etag
+from app.utils.filters import FilterParam
 
 RECIPES_TABLE = "recipes"
 INGREDIENTS = "ingredients"
+ID = "id"
+RECIPE_ID = "recipe_id"
+INGREDIENT_ID = "ingredient_id"
+NAME = "name"
+CREATED_AT = "created_at"
+UPDATED_AT = "updated_at"
+MATCHED = "matched"
+MISSING = "missing"
+TOTAL = "total"
+POSITION = "position"
+POSITIONS = "positions"
+UNIQUE_FIELDS = ("id", "name")
+
+
+def ingredients_json(recipes_table: Table) -> Label:
+    ingredients_table = IngredientOrm.table()
+    ingredient_json = func.json_build_object(
+        literal_column("'{0}'".format(ID)),
+        ingredients_table.c.id,
+        literal_column("'{0}'".format(NAME)),
+        ingredients_table.c.name,
+    )
+
+    # Correlated on the outer recipe row, so it only runs for recipes that
+    # exist and returns the whole ingredient list in the same round trip.
+    ingredients_query = (
+        select(
+            [
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(ingredient_json, ingredients_table.c.name),
+                    ),
+                    literal_column("'[]'::json"),
+                ),
+            ],
+        )
+        .select_from(
+            ingredients_table.join(
+                recipes_ingredients,
+                ingredients_table.c.id == recipes_ingredients.c.ingredient_id,
+            ),
+        )
+        .where(recipes_ingredients.c.recipe_id == recipes_table.c.id)
+        .scalar_subquery()
+    )
+
+    return ingredients_query.label(INGREDIENTS)
+
+
+GET_ONE_RECIPE_QUERY = compile_statement(
+    select(
+        [RecipeOrm.table(), ingredients_json(RecipeOrm.table())],
+    ).where(RecipeOrm.table().c.id == bindparam("recipe_id")),
+)
+
+# Everything the detail ETag depends on, without the description.
+GET_RECIPE_VERSION_QUERY = compile_statement(
+    select(
+        [
+            RecipeOrm.table().c.id,
+            RecipeOrm.table().c.created_at,
+            RecipeOrm.table().c.updated_at,
+            ingredients_json(RecipeOrm.table()),
+        ],
+    ).where(RecipeOrm.table().c.id == bindparam("recipe_id")),
+)
+
+# One query for a whole page of recipes; "= ANY(:recipe_ids)" keeps the SQL
+# text identical for every page size so the prepared statement is reused.
+GET_RECIPES_INGREDIENTS_QUERY = compile_statement(
+    select(
+        [
+            recipes_ingredients.c.recipe_id,
+            IngredientOrm.table().c.id,
+            IngredientOrm.table().c.name,
+        ],
+    )
+    .select_from(
+        IngredientOrm.table().join(
+            recipes_ingredients,
+            IngredientOrm.table().c.id == recipes_ingredients.c.ingredient_id,
+        ),
+    )
+    .where(recipes_ingredients.c.recipe_id == any_(bindparam("recipe_ids")))
+    .order_by(IngredientOrm.table().c.name),
+)
+
+EXPORT_RECIPES_QUERY = compile_statement(
+    RecipeOrm.table().select().order_by(RecipeOrm.table().c.id),
+)
+EXPORT_RECIPES_WITH_INGREDIENTS_QUERY = compile_statement(
+    select([RecipeOrm.table(), ingredients_json(RecipeOrm.table())]).order_by(
+        RecipeOrm.table().c.id,
+    ),
+)
+
+
+def ingredient_recipes_statement(after_cursor: bool) -> Select:
+    # Walks the (ingredient_id, recipe_id) index in recipe_id order and stops
+    # at the page size, so popular ingredients cost the same as rare ones.
+    recipes_table = RecipeOrm.table()
+    statement = (
+        select([recipes_table])
+        .select_from(
+            recipes_ingredients.join(
+                recipes_table,
+                recipes_table.c.id == recipes_ingredients.c.recipe_id,
+            ),
+        )
+        .where(recipes_ingredients.c.ingredient_id == bindparam("ingredient_id"))
+        .order_by(recipes_ingredients.c.recipe_id)
+        .limit(bindparam("limit"))
+    )
+
+    if after_cursor:
+        statement = statement.where(
+            recipes_ingredients.c.recipe_id > bindparam("recipe_id"),
+        )
+
+    return statement
+
+
+GET_INGREDIENT_RECIPES_QUERY = compile_statement(ingredient_recipes_statement(False))
+GET_INGREDIENT_RECIPES_AFTER_QUERY = compile_statement(
+    ingredient_recipes_statement(True),
+)
+
+
+def deleted_recipe_statement() -> Select:
+    # The outer select reads the statement snapshot, so it still sees the
+    # join rows the cascade removes and returns the recipe as it was.
+    recipes_table = RecipeOrm.table()
+    deleted = (
+        recipes_table.delete()
+        .where(recipes_table.c.id == bindparam("recipe_id"))
+        .returning(*recipes_table.c)
+        .cte("deleted")
+    )
+
+    return select([deleted, ingredients_json(deleted)])
+
+
+DELETE_RECIPE_QUERY = compile_statement(deleted_recipe_statement())
+
+REMOVE_RECIPE_INGREDIENTS_QUERY = compile_statement(
+    recipes_ingredients.delete().where(
+        and_(
+            recipes_ingredients.c.recipe_id == bindparam("recipe_id"),
+            recipes_ingredients.c.ingredient_id == any_(bindparam("ingredient_ids")),
+        ),
+    ),
+)
+
+# Ids that match no ingredient are skipped instead of failing the update.
+ADD_RECIPE_INGREDIENTS_QUERY = compile_statement(
+    postgresql.insert(recipes_ingredients)
+    .from_select(
+        [RECIPE_ID, INGREDIENT_ID],
+        select(
+            [
+                cast(bindparam("recipe_id"), postgresql.UUID),
+                IngredientOrm.table().c.id,
+            ],
+        ).where(IngredientOrm.table().c.id == any_(bindparam("ingredient_ids"))),
+    )
+    .on_conflict_do_nothing(),
+)
+
+GET_RECIPES_BY_IDS_QUERY = compile_statement(
+    select([RecipeOrm.table()]).where(
+        RecipeOrm.table().c.id == any_(bindparam("recipe_ids")),
+    ),
+)
+
+
+def pantry_statement() -> Select:
+    # Counts pantry matches from the ingredient_id index, then looks up the
+    # ingredient count of each matched recipe from the primary key.
+    recipes_table = RecipeOrm.table()
+    matches = (
+        select([recipes_ingredients.c.recipe_id, func.count().label(MATCHED)])
+        .where(recipes_ingredients.c.ingredient_id == any_(bindparam("ingredient_ids")))
+        .group_by(recipes_ingredients.c.recipe_id)
+        .subquery("matches")
+    )
+    recipe_ingredients = recipes_ingredients.alias("recipe_ingredients")
+    totals = (
+        select([func.count().label(TOTAL)])
+        .where(recipe_ingredients.c.recipe_id == matches.c.recipe_id)
+        .lateral("totals")
+    )
+    missing = totals.c.total - matches.c.matched
+
+    return (
+        select([recipes_table, matches.c.matched, missing.label(MISSING)])
+        .select_from(
+            matches.join(totals, true()).join(
+                recipes_table,
+                recipes_table.c.id == matches.c.recipe_id,
+            ),
+        )
+        .where(missing <= bindparam("max_missing"))
+        .order_by(missing, matches.c.matched.desc(), recipes_table.c.id)
+        .limit(bindparam("limit"))
+    )
+
+
+GET_PANTRY_RECIPES_QUERY = compile_statement(pantry_statement())
+
+# Recipes numbered in id order, the positions the pantry index works with.
+PANTRY_POSITIONS = (
+    select(
+        [
+            recipes_ingredients.c.recipe_id,
+            func.count().label(TOTAL),
+            (
+                func.row_number().over(order_by=recipes_ingredients.c.recipe_id)
+                - literal_column("1")
+            ).label(POSITION),
+        ],
+    )
+    .group_by(recipes_ingredients.c.recipe_id)
+    .subquery("positions")
+)
+
+PANTRY_INDEX_RECIPES_QUERY = compile_statement(
+    select([PANTRY_POSITIONS.c.recipe_id, PANTRY_POSITIONS.c.total]).order_by(
+        PANTRY_POSITIONS.c.position,
+    ),
+)
+
+PANTRY_INDEX_POSTINGS_QUERY = compile_statement(
+    select(
+        [
+            recipes_ingredients.c.ingredient_id,
+            func.array_agg(PANTRY_POSITIONS.c.position).label(POSITIONS),
+        ],
+    )
+    .select_from(
+        recipes_ingredients.join(
+            PANTRY_POSITIONS,
+            PANTRY_POSITIONS.c.recipe_id == recipes_ingredients.c.recipe_id,
+        ),
+    )
+    .group_by(recipes_ingredients.c.ingredient_id),
+)
 
 
 class RecipeRepository(BaseRepository):
@@ -29,61 +300,350 @@ class RecipeRepository(BaseRepository):
         recipe_values.pop(INGREDIENTS)
 
         sql1 = RecipeOrm.table().insert().values(recipe_values)
-        sql2 = recipes_ingredients.insert().values(ingredients)
 
-        await self.db.execute(sql1)
-        await self.db.execute(sql2)
+        async with self.db.transaction():
+            await self.db.execute(sql1)
+
+            if ingredients:
+                sql2 = recipes_ingredients.insert().values(ingredients)
+                await self.db.execute(sql2)
+
+        count_cache.invalidate_tag(RECIPES_TABLE)
 
         return recipe
 
+    async def create_recipes(
+        self,
+        recipes: List[RecipeModelWithIngredients],
+    ) -> BatchResult:
+        duplicates = self._find_batch_duplicates(recipes, UNIQUE_FIELDS)
+        ingredient_ids = {
+            str(ingredient.id)
+            for recipe in recipes
+            for ingredient in recipe.ingredients
+        }
+        existing_ingredient_ids = await self._get_existing_ingredient_ids(
+            list(ingredient_ids),
+        )
+        invalid = {
+            index
+            for index, recipe in enumerate(recipes)
+            if any(
+                str(ingredient.id) not in existing_ingredient_ids
+                for ingredient in recipe.ingredients
+            )
+        }
+        candidates = [
+            recipe
+            for index, recipe in enumerate(recipes)
+            if index not in duplicates and index not in invalid
+        ]
+
+        async with self.db.transaction():
+            inserted = await self._bulk_insert(
+                RecipeOrm.table(),
+                [recipe.dict(exclude={INGREDIENTS}) for recipe in candidates],
+            )
+            inserted_ids = {str(row[ID]) for row in inserted}
+
+            await self._bulk_insert(
+                recipes_ingredients,
+                [
+                    {RECIPE_ID: recipe.id, INGREDIENT_ID: ingredient.id}
+                    for recipe in candidates
+                    if str(recipe.id) in inserted_ids
+                    for ingredient in recipe.ingredients
+                ],
+            )
+
+        count_cache.invalidate_tag(RECIPES_TABLE)
+        items = []
+
+        for index, recipe in enumerate(recipes):
+            status = BATCH_STATUS_CONFLICT
+            detail: Optional[str] = RECIPE_ALREADY_EXISTS
+
+            if index in duplicates:
+                detail = BATCH_DUPLICATE_ITEM
+            elif index in invalid:
+                status, detail = BATCH_STATUS_INVALID, INGREDIENT_DOES_NOT_EXIST
+            elif str(recipe.id) in inserted_ids:
+                status, detail = BATCH_STATUS_CREATED, None
+
+            items.append(
+                BatchItemResult(
+                    id=recipe.id,
+                    name=recipe.name,
+                    status=status,
+                    detail=detail,
+                ),
+            )
+
+        statuses = [item.status for item in items]
+
+        return BatchResult(
+            created=statuses.count(BATCH_STATUS_CREATED),
+            conflicts=statuses.count(BATCH_STATUS_CONFLICT),
+            invalid=statuses.count(BATCH_STATUS_INVALID),
+            items=items,
+        )
+
+    async def _get_existing_ingredient_ids(self, ingredient_ids: List[str]) -> Set[str]:
+        if not ingredient_ids:
+            return set()
+
+        ingredients_table = IngredientOrm.table()
+        query = select([ingredients_table.c.id]).where(
+            ingredients_table.c.id == any_(ingredient_ids),
+        )
+
+        return {str(row[ID]) for row in await self.db.fetch_all(query)}
+
     async def get_recipes(
         self,
         limit: int,
         offset: int,
         sort_params: Dict[str, str] = None,
-        filters: List[str] = None,
-    ) -> List[RecipeModel]:
-
-        query = RecipeOrm.table().select().limit(limit).offset(offset)
+        filters: List[FilterParam] = None,
+        cursor: Dict[str, Any] = None,
+        expand_ingredients: bool = False,
+    ) -> Union[List[RecipeModel], List[RecipeModelWithIngredients]]:
+        recipes_table = RecipeOrm.table()
+        query = recipes_table.select()
 
         if sort_params:
-            query = self._add_sorting(query, sort_params, RecipeOrm.table())
+            query = self._add_sorting(query, sort_params, recipes_table)
 
         if filters:
-            query = self._add_filters(query, filters, RecipeOrm.table())
+            query = self._add_filters(query, filters, recipes_table)
+
+        query = self._add_pagination(
+            query,
+            limit,
+            offset,
+            recipes_table,
+            sort_params=sort_params,
+            cursor=cursor,
+        )
 
         recipes = await self.db.fetch_all(query)
 
-        return [RecipeModel(**recipe) for recipe in recipes]
+        if not expand_ingredients:
+            return [row_model(RecipeModel, recipe) for recipe in recipes]
 
-    async def get_one_recipe(self, id: str) -> Optional[RecipeModelWithIngredients]:
-        recipes_table = RecipeOrm.table()
-        ingredients_table = IngredientOrm.table()
+        recipe_ingredients = await self._get_ingredients_for_recipes(
+            [str(recipe[ID]) for recipe in recipes],
+        )
 
-        join = ingredients_table.join(
-            recipes_ingredients,
-            (ingredients_table.c.id == recipes_ingredients.c.ingredient_id)
-            & (recipes_ingredients.c.recipe_id == id),
-            isouter=False,
+        return [
+            row_model(
+                RecipeModelWithIngredients,
+                recipe,
+                ingredients=recipe_ingredients.get(str(recipe[ID]), []),
+            )
+            for recipe in recipes
+        ]
+
+    async def count_recipes(
+        self,
+        filters: List[FilterParam] = None,
+        mode: str = COUNT_AUTO,
+    ) -> int:
+        return await self._count(RecipeOrm.table(), filters=filters, mode=mode)
+
+    async def get_recipes_for_ingredient(
+        self,
+        ingredient_id: str,
+        limit: int,
+        cursor: Dict[str, Any] = None,
+    ) -> List[RecipeModel]:
+        if cursor is None:
+            query = GET_INGREDIENT_RECIPES_QUERY.bindparams(
+                ingredient_id=ingredient_id,
+                limit=limit,
+            )
+        else:
+            query = GET_INGREDIENT_RECIPES_AFTER_QUERY.bindparams(
+                ingredient_id=ingredient_id,
+                limit=limit,
+                recipe_id=cursor[ID],
+            )
+
+        recipes = await self.db.fetch_all(query)
+
+        return [row_model(RecipeModel, recipe) for recipe in recipes]
+
+    async def get_cookable_recipes(
+        self,
+        ingredient_ids: List[str],
+        max_missing: int,
+        limit: int,
+    ) -> List[RecipePantryMatch]:
+        if pantry_index.ready:
+            return await self._get_indexed_cookable_recipes(
+                ingredient_ids,
+                max_missing,
+                limit,
+            )
+
+        query = GET_PANTRY_RECIPES_QUERY.bindparams(
+            ingredient_ids=ingredient_ids,
+            max_missing=max_missing,
+            limit=limit,
+        )
+        recipes = await self.db.fetch_all(query)
+
+        return [row_model(RecipePantryMatch, recipe) for recipe in recipes]
+
+    async def _get_indexed_cookable_recipes(
+        self,
+        ingredient_ids: List[str],
+        max_missing: int,
+        limit: int,
+    ) -> List[RecipePantryMatch]:
+        matches = pantry_index.score(ingredient_ids, max_missing, limit)
+
+        if not matches:
+            return []
+
+        query = GET_RECIPES_BY_IDS_QUERY.bindparams(
+            recipe_ids=[match.recipe_id for match in matches],
         )
+        recipes = {str(recipe[ID]): recipe for recipe in await self.db.fetch_all(query)}
+
+        # Recipes deleted since the index was loaded are skipped.
+        return [
+            row_model(
+                RecipePantryMatch,
+                recipes[match.recipe_id],
+                matched=match.matched,
+                missing=match.missing,
+            )
+            for match in matches
+            if match.recipe_id in recipes
+        ]
 
-        ingredients_query = select(
-            [ingredients_table.c.id, ingredients_table.c.name],
-        ).select_from(join)
-        recipe_query = recipes_table.select().where(recipes_table.c.id == id)
+    async def refresh_pantry_index(self) -> None:
+        recipe_ids = bytearray()
+        totals = array("H")
+        postings: Dict[str, "array[int]"] = {}
+
+        # Both reads share one snapshot so the recipe positions line up.
+        async with self.db.transaction(isolation="repeatable_read", readonly=True):
+            async for recipe in self.db.iterate(PANTRY_INDEX_RECIPES_QUERY):
+                recipe_ids += recipe[RECIPE_ID].bytes
+                totals.append(recipe[TOTAL])
+
+            async for ingredient in self.db.iterate(PANTRY_INDEX_POSTINGS_QUERY):
+                postings[str(ingredient[INGREDIENT_ID])] = array(
+                    "I",
+                    ingredient[POSITIONS],
+                )
+
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            pantry_index.load,
+            bytes(recipe_ids),
+            totals,
+            postings,
+        )
 
-        ingredients = await self.db.fetch_all(ingredients_query)
-        recipe = await self.db.fetch_one(recipe_query)
+    async def search_recipes(
+        self,
+        q: str,
+        limit: int,
+        cursor: Dict[str, Any] = None,
+    ) -> List[RecipeSearchResult]:
+        recipes = await self._search(RecipeOrm.table(), q, limit, cursor=cursor)
+
+        return [row_model(RecipeSearchResult, recipe) for recipe in recipes]
+
+    async def export_recipes(
+        self,
+        expand_ingredients: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        if not expand_ingredients:
+            async for recipe in self._stream(EXPORT_RECIPES_QUERY):
+                yield dict(recipe)
+
+            return
+
+        async for recipe in self._stream(EXPORT_RECIPES_WITH_INGREDIENTS_QUERY):
+            yield {**recipe, INGREDIENTS: json.loads(recipe[INGREDIENTS])}
+
+    async def _get_ingredients_for_recipes(
+        self,
+        recipe_ids: List[str],
+    ) -> Dict[str, List[IngredientForRecipe]]:
+        recipe_ingredients: Dict[str, List[IngredientForRecipe]] = {}
+
+        if not recipe_ids:
+            return recipe_ingredients
+
+        query = GET_RECIPES_INGREDIENTS_QUERY.bindparams(recipe_ids=recipe_ids)
+
+        for row in await self.db.fetch_all(query):
+            recipe_ingredients.setdefault(str(row[RECIPE_ID]), []).append(
+                row_model(IngredientForRecipe, row),
+            )
+
+        return recipe_ingredients
+
+    async def get_one_recipe(self, id: str) -> Optional[RecipeModelWithIngredients]:
+        key = entity_key(id)
+        cached: Optional[RecipeModelWithIngredients] = recipe_cache.get(key)
+
+        if cached is not None:
+            return cached
+
+        token = recipe_cache.token()
+        query = GET_ONE_RECIPE_QUERY.bindparams(recipe_id=id)
+        recipe = await self.db.fetch_one(query)
 
         if recipe is None:
             return None
 
-        return RecipeModelWithIngredients(
-            id=recipe.get("id"),
-            name=recipe.get("name"),
-            description=recipe.get("description"),
+        model = self._recipe_with_ingredients(recipe)
+        recipe_cache.set(
+            key,
+            model,
+            token,
+            tags=[entity_key(ingredient.id) for ingredient in model.ingredients],
+        )
+
+        return model
+
+    def _recipe_with_ingredients(self, recipe: Any) -> RecipeModelWithIngredients:
+        # Ingredient ids come back from json_build_object as strings.
+        return row_model(
+            RecipeModelWithIngredients,
+            recipe,
             ingredients=[
-                IngredientForRecipe(**ingredient) for ingredient in ingredients
+                row_model(IngredientForRecipe, ingredient, id=uuid.UUID(ingredient[ID]))
+                for ingredient in json.loads(recipe[INGREDIENTS])
+            ],
+        )
+
+    async def get_recipe_etag(self, id: str) -> Optional[str]:
+        cached: Optional[RecipeModelWithIngredients] = recipe_cache.get(entity_key(id))
+
+        if cached is not None:
+            return model_etag(cached)
+
+        query = GET_RECIPE_VERSION_QUERY.bindparams(recipe_id=id)
+        version = await self.db.fetch_one(query)
+
+        if version is None:
+            return None
+
+        return entity_etag(
+            version[ID],
+            version[CREATED_AT],
+            version[UPDATED_AT],
+            *[
+                part
+                for ingredient in json.loads(version[INGREDIENTS])
+                for part in (ingredient[ID], ingredient[NAME])
             ],
         )
 
@@ -93,47 +653,66 @@ class RecipeRepository(BaseRepository):
         updated_recipe: UpdatedRecipeModel,
     ) -> Optional[RecipeModelWithIngredients]:
         recipe_table = RecipeOrm.table()
-        recipe: Optional[RecipeModelWithIngredients] = await self.get_one_recipe(id)
-
-        if recipe is None:
-            return None
-
-        update_values = {
-            recipe_key: recipe_val
-            for recipe_key, recipe_val in updated_recipe.dict().items()
-            if recipe_val is not None
+        update_values = updated_recipe.dict(
+            exclude={INGREDIENTS},
+            exclude_none=True,
+        )
+        removed = {
+            str(ingredient.id)
+            for ingredient in updated_recipe.ingredients
+            if ingredient.is_deleted
+        }
+        added = {
+            str(ingredient.id)
+            for ingredient in updated_recipe.ingredients
+            if str(ingredient.id) not in removed
         }
-
-        ingredients_to_delete = [
-            ingredient
-            for ingredient in update_values.get(INGREDIENTS)  # type: ignore
-            if ingredient.get("is_deleted") is True
-        ]
-
-        update_values.pop(INGREDIENTS)
-
         sql = (
-            recipe_table.update().where(recipe_table.c.id == id).values(**update_values)
+            recipe_table.update()
+            .where(recipe_table.c.id == id)
+            .values(**update_values)
+            .returning(recipe_table.c.id)
         )
 
-        for ingredient in ingredients_to_delete:
-            ingredient_sql = recipes_ingredients.delete().where(
-                recipes_ingredients.c.ingredient_id == ingredient.get("id"),
+        # Everything is scoped to this recipe and commits together, the
+        # UPDATE doubles as the existence check.
+        async with self.db.transaction():
+            if await self.db.fetch_one(sql) is None:
+                return None
+
+            if removed:
+                await self.db.execute(
+                    REMOVE_RECIPE_INGREDIENTS_QUERY.bindparams(
+                        recipe_id=id,
+                        ingredient_ids=list(removed),
+                    ),
+                )
+
+            if added:
+                await self.db.execute(
+                    ADD_RECIPE_INGREDIENTS_QUERY.bindparams(
+                        recipe_id=id,
+                        ingredient_ids=list(added),
+                    ),
+                )
+
+            recipe = await self.db.fetch_one(
+                GET_ONE_RECIPE_QUERY.bindparams(recipe_id=id),
             )
-            await self.db.execute(ingredient_sql)
 
-        await self.db.execute(sql)
+        recipe_cache.invalidate(entity_key(id))
+        count_cache.invalidate_tag(RECIPES_TABLE)
 
-        return await self.get_one_recipe(id)
+        return self._recipe_with_ingredients(recipe)
 
     async def delete_recipe(self, id: str) -> Optional[RecipeModelWithIngredients]:
-        recipe: Optional[RecipeModelWithIngredients] = await self.get_one_recipe(id)
-        recipe_table = RecipeOrm.table()
+        query = DELETE_RECIPE_QUERY.bindparams(recipe_id=id)
+        recipe = await self.db.fetch_one(query)
 
         if recipe is None:
             return None
 
-        sql = recipe_table.delete().where(RecipeOrm.table().c.id == id)
-        await self.db.execute(sql)
+        recipe_cache.invalidate(entity_key(id))
+        count_cache.invalidate_tag(RECIPES_TABLE)
 
-        return recipe
+        return self._recipe_with_ingredients(recipe)
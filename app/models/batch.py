@@ -0,0 +1,18 @@
+import uuid
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchItemResult(BaseModel):
+    id: uuid.UUID
+    name: str
+    status: str
+    detail: Optional[str] = Field(default=None)
+
+
+class BatchResult(BaseModel):
+    created: int
+    conflicts: int
+    invalid: int = Field(default=0)
+    items: List[BatchItemResult]
@@ -42,6 +42,10 @@ class IngredientModel(BaseModel):
         orm_mode = True
 
 
+class IngredientSearchResult(IngredientModel):
+    rank: float
+
+
 class UpdatedIngredientModel(BaseModel):
     name: Optional[str] = Field(max_length=INGREDIENT_NAME_MAX)
     description: Optional[str] = Field(max_length=INGREDIENT_DESCRIPTION_MAX)
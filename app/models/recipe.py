@@ -12,7 +12,11 @@ from sqlalchemy.orm import relationship  # type: ignore
 
 from app.models.ingredient import IngredientForRecipe, UpdatedIngredientForRecipe
 from app.models.recipes_ingredients import recipes_ingredients
-from app.resources.recipe_constants import RECIPE_DESCRIPTION_MAX, RECIPE_NAME_MAX
+from app.resources.recipe_constants import (
+    PANTRY_MAX_INGREDIENTS,
+    RECIPE_DESCRIPTION_MAX,
+    RECIPE_NAME_MAX,
+)
 
 Base = declarative_base()
 
@@ -47,6 +51,15 @@ class RecipeModel(BaseModel):
         orm_mode = True
 
 
+class RecipeSearchResult(RecipeModel):
+    rank: float
+
+
+class RecipePantryMatch(RecipeModel):
+    matched: int
+    missing: int
+
+
 class RecipeModelWithIngredients(BaseModel):
     id: uuid.UUID = Field(default_factory=uuid4)
     name: str = Field(max_length=RECIPE_NAME_MAX)
@@ -59,5 +72,13 @@ class RecipeModelWithIngredients(BaseModel):
 class UpdatedRecipeModel(BaseModel):
     name: Optional[str] = Field(max_length=RECIPE_NAME_MAX)
     description: Optional[str] = Field(max_length=RECIPE_DESCRIPTION_MAX)
-    ingredients: List[UpdatedIngredientForRecipe]
+    ingredients: List[UpdatedIngredientForRecipe] = Field(default_factory=list)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PantryModel(BaseModel):
+    ingredients: List[uuid.UUID] = Field(
+        min_items=1,
+        max_items=PANTRY_MAX_INGREDIENTS,
+    )
+    max_missing: int = Field(default=0, ge=0)
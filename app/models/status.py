@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    min_size: int
+    max_size: int
+    size: int
+    in_use: int
+    idle: int
+    waiting: int
+    acquires: int
+    acquire_timeouts: int
+    acquire_mean_ms: float
+    acquire_p95_ms: float
+    acquire_max_ms: float
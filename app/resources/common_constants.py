@@ -2,7 +2,51 @@
 QUERY_DEFAULT_LIMIT = 50
 QUERY_MAX_LIMIT = 200
 QUERY_DEFAULT_OFFSET = 0
+FILTER_DATETIME_FIELDS = ("created_at", "updated_at")
+QUERY_COUNT_REGEX = "^(auto|estimated|exact)$"
+
+# Count constants
+COUNT_AUTO = "auto"
+COUNT_ESTIMATED = "estimated"
+COUNT_EXACT = "exact"
+
+# Search constants
+SEARCH_QUERY_MAX_LENGTH = 200
+SEARCH_CURSOR_SORT = {"rank": "desc"}
+
+# Batch constants
+BATCH_MAX_ITEMS = 50000
+BATCH_COPY_THRESHOLD = 1000
+BATCH_STATUS_CREATED = "created"
+BATCH_STATUS_CONFLICT = "conflict"
+BATCH_STATUS_INVALID = "invalid"
+
+# Export constants
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_REGEX = "^(ndjson|csv)$"
+EXPORT_MEDIA_TYPES = {
+    EXPORT_FORMAT_NDJSON: "application/x-ndjson",
+    EXPORT_FORMAT_CSV: "text/csv",
+}
+EXPORT_CHUNK_ROWS = 1000
+
+# Error messages
+QUERY_INVALID_CURSOR = "Invalid pagination cursor"
+QUERY_INVALID_FILTER = "Invalid filter"
+BATCH_DUPLICATE_ITEM = "Item duplicates an earlier item in the batch"
+
+# Headers
+HEADER_NEXT_CURSOR = "X-Next-Cursor"
+HEADER_ETAG = "ETag"
+HEADER_IF_NONE_MATCH = "If-None-Match"
+HEADER_CONTENT_DISPOSITION = "Content-Disposition"
+HEADER_TOTAL_COUNT = "X-Total-Count"
+HEADER_LINK = "Link"
 
 # Status codes
+STATUS_OK = 200
 STATUS_CREATED = 201
+STATUS_NOT_MODIFIED = 304
 STATUS_NOT_FOUND = 404
+STATUS_UNPROCESSABLE_ENTITY = 422
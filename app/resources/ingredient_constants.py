@@ -1,17 +1,20 @@
 # Error messages Ingredients
 INGREDIENT_DOES_NOT_EXIST = "Ingredient does not exist"
+INGREDIENT_NAME_ALREADY_EXISTS = "Ingredient name already exists"
+INGREDIENT_ID_ALREADY_EXISTS = "Ingredient id already exists"
 
 # Tags Ingredients
 TAG_INGREDIENTS = "ingredients"
 
 # Aliases Ingredients
 ALIAS_INGREDIENT = "ingredient"
+ALIAS_INGREDIENTS = "ingredients"
 
 
 # Query Ingredients regexes
 QUERY_INGREDIENT_SORT_REGEX = "(name|created_at|updated_at):(asc|desc)"
 QUERY_INGREDIENT_FILTER_REGEX = (
-    r"((name)\sLIKE\s'%.*%')|((created_at|updated_at)\s[><=][=]?\s'.*')"
+    r"^((name)\s(I?LIKE|!?=)|(created_at|updated_at)\s([<>]=?|!?=))\s'.*'$"
 )
 
 # Model length constants Ingredients
@@ -0,0 +1,23 @@
+# Tags Metrics
+TAG_METRICS = "metrics"
+
+# Latency histogram buckets in seconds
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Route label for requests no route matched, kept fixed so unknown paths
+# cannot each add a series
+UNMATCHED_ROUTE = "unmatched"
@@ -1,18 +1,28 @@
 # Error messages recipes
 RECIPE_DOES_NOT_EXIST = "Recipe does not exist"
+RECIPE_ALREADY_EXISTS = "Recipe already exists"
 
 # Tags Recipes
 TAG_RECIPES = "recipes"
 
 # Aliases Recipes
 ALIAS_RECIPE = "recipe"
+ALIAS_RECIPES = "recipes"
+ALIAS_PANTRY = "pantry"
 
 # Query Recipes regexes
 QUERY_RECIPE_SORT_REGEX = "(name|created_at|updated_at):(asc|desc)"
 QUERY_RECIPE_FILTER_REGEX = (
-    r"((name)\sLIKE\s'%.*%')|((created_at|updated_at)\s[><=][=]?\s'.*')"
+    r"^((name)\s(I?LIKE|!?=)|(created_at|updated_at)\s([<>]=?|!?=))\s'.*'$"
 )
+QUERY_RECIPE_EXPAND_REGEX = "^(ingredients)$"
+
+# Expand options Recipes
+EXPAND_INGREDIENTS = "ingredients"
 
 # Model length constatns Recipes
 RECIPE_NAME_MAX = 50
 RECIPE_DESCRIPTION_MAX = 500
+
+# Pantry search Recipes
+PANTRY_MAX_INGREDIENTS = 1000
@@ -0,0 +1,2 @@
+# Tags Status
+TAG_STATUS = "status"
@@ -0,0 +1,81 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Union
+
+from fastapi import Response
+
+from app.models.ingredient import IngredientModel
+from app.models.recipe import RecipeModel, RecipeModelWithIngredients
+from app.resources.common_constants import HEADER_ETAG, STATUS_NOT_MODIFIED
+
+ETAG_WILDCARD = "*"
+ETAG_WEAK_PREFIX = "W/"
+ETAG_WEAK_PREFIX_LENGTH = len(ETAG_WEAK_PREFIX)
+ETAG_RELATED_FIELD = "ingredients"
+
+EtagModel = Union[IngredientModel, RecipeModel, RecipeModelWithIngredients]
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+
+    for part in parts:
+        if isinstance(part, datetime):
+            part = part.isoformat()
+
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+
+    return '"{0}"'.format(digest.hexdigest())
+
+
+def entity_etag(
+    id: Any,
+    created_at: datetime,
+    updated_at: Optional[datetime],
+    *related: Any,
+) -> str:
+    # Rows only change through updates that stamp updated_at, so the version
+    # columns stand in for the body and can be read without the full row.
+    return make_etag(id, created_at, updated_at, *related)
+
+
+def model_etag(model: EtagModel) -> str:
+    related = [
+        part
+        for item in getattr(model, ETAG_RELATED_FIELD, ())
+        for part in (item.id, item.name)
+    ]
+
+    return entity_etag(model.id, model.created_at, model.updated_at, *related)
+
+
+def collection_etag(etags: Iterable[str]) -> str:
+    return make_etag(*etags)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+
+        if candidate == ETAG_WILDCARD:
+            return True
+
+        if candidate.startswith(ETAG_WEAK_PREFIX):
+            candidate = candidate[ETAG_WEAK_PREFIX_LENGTH:]
+
+        if candidate == etag:
+            return True
+
+    return False
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        status_code=STATUS_NOT_MODIFIED,
+        headers={**(headers or {}), HEADER_ETAG: etag},
+    )
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from starlette.responses import StreamingResponse
+
+from app.resources.common_constants import (
+    EXPORT_CHUNK_ROWS,
+    EXPORT_FORMAT_CSV,
+    EXPORT_MEDIA_TYPES,
+    HEADER_CONTENT_DISPOSITION,
+)
+
+
+def export_value(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return str(value)
+
+
+def csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=export_value)
+
+    return export_value(value)
+
+
+async def export_rows(
+    rows: AsyncIterator[Dict[str, Any]],
+    columns: List[str],
+    export_format: str,
+) -> AsyncIterator[str]:
+    # Rows are encoded into a buffer that is flushed every EXPORT_CHUNK_ROWS,
+    # one write per chunk instead of per row and never the whole result set.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows_in_buffer = 0
+
+    if export_format == EXPORT_FORMAT_CSV:
+        writer.writerow(columns)
+
+    async for row in rows:
+        if export_format == EXPORT_FORMAT_CSV:
+            writer.writerow([csv_value(row[column]) for column in columns])
+        else:
+            buffer.write(json.dumps(row, default=export_value))
+            buffer.write("\n")
+
+        rows_in_buffer += 1
+
+        if rows_in_buffer == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    rows: AsyncIterator[Dict[str, Any]],
+    columns: List[str],
+    export_format: str,
+    filename: str,
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_rows(rows, columns, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            HEADER_CONTENT_DISPOSITION: 'attachment; filename="{0}.{1}"'.format(
+                filename,
+                export_format,
+            ),
+        },
+    )
@@ -0,0 +1,41 @@
+import re
+from typing import Any, List, NamedTuple
+
+from app.resources.common_constants import FILTER_DATETIME_FIELDS
+from app.utils.timestamps import parse_timestamp
+
+FILTER_OPERATOR_TOKENS = ("LIKE", "ILIKE", "<=", ">=", "!=", "<", ">", "=")
+FILTER_PATTERN = re.compile(
+    r"^\s*(?P<field>[a-z_]+)\s+(?P<operator>{0})\s+'(?P<value>.*)'\s*$".format(
+        "|".join(re.escape(operator) for operator in FILTER_OPERATOR_TOKENS),
+    ),
+    re.DOTALL,
+)
+SQL_QUOTE = "'"
+
+
+class FilterParam(NamedTuple):
+    field: str
+    operator: str
+    value: Any
+
+
+def parse_filter(filter_param: str) -> FilterParam:
+    match = FILTER_PATTERN.match(filter_param)
+
+    if match is None:
+        raise ValueError("Malformed filter {0!r}".format(filter_param))
+
+    field, operator = match.group("field"), match.group("operator")
+    # Values keep the SQL literal syntax clients already send, including ''
+    # for a quote, but are only ever bound as parameters.
+    value: Any = match.group("value").replace(SQL_QUOTE * 2, SQL_QUOTE)
+
+    if field in FILTER_DATETIME_FIELDS:
+        value = parse_timestamp(value)
+
+    return FilterParam(field, operator, value)
+
+
+def parse_filters(filters: List[str]) -> List[FilterParam]:
+    return [parse_filter(filter_param) for filter_param in filters]
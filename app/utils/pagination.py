@@ -0,0 +1,119 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from starlette.datastructures import URL, QueryParams
+
+from app.resources.common_constants import FILTER_DATETIME_FIELDS, SEARCH_CURSOR_SORT
+from app.utils.timestamps import parse_timestamp
+
+CURSOR_ID_KEY = "id"
+CURSOR_RANK_KEY = "rank"
+CURSOR_PARAM = "cursor"
+LINK_FIRST = "first"
+LINK_PREV = "prev"
+LINK_NEXT = "next"
+LINK_LAST = "last"
+
+
+def get_cursor_keys(sort_params: Dict[str, str]) -> List[str]:
+    return [*sort_params.keys(), CURSOR_ID_KEY]
+
+
+def encode_cursor(item: BaseModel, sort_params: Dict[str, str]) -> str:
+    values = {}
+
+    for key in get_cursor_keys(sort_params):
+        value = getattr(item, key)
+
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif value is not None:
+            value = str(value)
+
+        values[key] = value
+
+    payload = json.dumps(values, separators=(",", ":")).encode()
+
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_params: Dict[str, str]) -> Dict[str, Any]:
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        payload = base64.urlsafe_b64decode(cursor + padding)
+        values = json.loads(payload)
+    except (binascii.Error, ValueError) as error:
+        raise ValueError("Malformed cursor") from error
+
+    if not isinstance(values, dict) or list(values) != get_cursor_keys(sort_params):
+        raise ValueError("Cursor does not match sort params")
+
+    if values[CURSOR_ID_KEY] is None:
+        raise ValueError("Cursor is missing an id")
+
+    try:
+        values[CURSOR_ID_KEY] = str(uuid.UUID(str(values[CURSOR_ID_KEY])))
+    except ValueError as error:
+        raise ValueError("Cursor id is not a UUID") from error
+
+    # Values are bound as they are, so they are checked against the column
+    # types here where a bad one is still the client's error.
+    for key in sort_params:
+        if values[key] is None:
+            continue
+
+        if key in FILTER_DATETIME_FIELDS:
+            values[key] = parse_timestamp(values[key])
+        elif not isinstance(values[key], str):
+            raise ValueError("Cursor value for {0} is not a string".format(key))
+
+    return values
+
+
+def decode_search_cursor(cursor: str) -> Dict[str, Any]:
+    values = decode_cursor(cursor, SEARCH_CURSOR_SORT)
+
+    try:
+        values[CURSOR_RANK_KEY] = float(values[CURSOR_RANK_KEY])
+    except (TypeError, ValueError) as error:
+        raise ValueError("Cursor rank is not a number") from error
+
+    return values
+
+
+def pagination_links(
+    url: URL,
+    total: int,
+    limit: int,
+    offset: int,
+    next_cursor: Optional[str] = None,
+) -> str:
+    first = url.remove_query_params(CURSOR_PARAM).include_query_params(offset=0)
+    links = {LINK_FIRST: first}
+
+    # A keyset page only knows the way forward, offset pages can jump around.
+    if CURSOR_PARAM in QueryParams(url.query):
+        if next_cursor:
+            links[LINK_NEXT] = url.include_query_params(cursor=next_cursor)
+    else:
+        if offset > 0:
+            links[LINK_PREV] = first.include_query_params(
+                offset=max(offset - limit, 0),
+            )
+
+        if next_cursor:
+            links[LINK_NEXT] = first.include_query_params(offset=offset + limit)
+
+        links[LINK_LAST] = first.include_query_params(
+            offset=max(total - 1, 0) // max(limit, 1) * max(limit, 1),
+        )
+
+    return ", ".join(
+        '<{0}>; rel="{1}"'.format(link, relation) for relation, link in links.items()
+    )
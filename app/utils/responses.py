@@ -0,0 +1,48 @@
+import uuid
+from typing import Any, Optional, Set
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import FAST_JSON_RESPONSES
+from app.resources.common_constants import STATUS_OK
+
+
+def model_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.dict()
+
+    # asyncpg returns its own UUID subclass, orjson only encodes uuid.UUID.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    raise TypeError
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=model_default)
+
+
+def json_response(
+    content: Any,
+    response: Optional[Response] = None,
+    status_code: int = STATUS_OK,
+    exclude: Optional[Set[str]] = None,
+) -> Any:
+    # Repositories hand back models they already validated. Returning a
+    # response makes FastAPI skip validating them against response_model and
+    # running jsonable_encoder, which still documents the schema.
+    if not FAST_JSON_RESPONSES:
+        return content
+
+    if exclude:
+        content = content.dict(exclude=exclude)
+
+    return FastJSONResponse(
+        content,
+        status_code=status_code,
+        headers=dict(response.headers) if response is not None else None,
+    )
@@ -0,0 +1,16 @@
+from datetime import datetime, timezone
+from typing import Any
+
+
+def parse_timestamp(value: Any) -> datetime:
+    # The timestamp columns are naive UTC, and asyncpg cannot bind an aware
+    # datetime to them, so offsets are folded into UTC and dropped.
+    if not isinstance(value, str):
+        raise ValueError("Timestamp {0!r} is not a string".format(value))
+
+    timestamp = datetime.fromisoformat(value)
+
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return timestamp
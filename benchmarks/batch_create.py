@@ -0,0 +1,110 @@
+"""Measure recipe creation throughput, one request at a time versus batched.
+
+Usage: python -m benchmarks.batch_create [recipes] [ingredients per recipe]
+"""
+import asyncio
+import random
+import sys
+import time
+import uuid
+from typing import List
+
+from sqlalchemy import any_  # type: ignore
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.ingredient import IngredientForRecipe, IngredientModel, IngredientOrm
+from app.models.recipe import RecipeModelWithIngredients, RecipeOrm
+from benchmarks.common import connect
+
+DEFAULT_RECIPES = 5000
+DEFAULT_INGREDIENTS = 5
+INGREDIENT_POOL = 1000
+SINGLE_INSERT_RECIPES = 500
+BATCH_SIZES = (100, 500, 5000)
+
+
+def make_recipes(
+    count: int,
+    pool: List[IngredientModel],
+    per_recipe: int,
+) -> List[RecipeModelWithIngredients]:
+    return [
+        RecipeModelWithIngredients(
+            name=str(uuid.uuid4()),
+            description="benchmark",
+            ingredients=[
+                IngredientForRecipe(id=ingredient.id, name=ingredient.name)
+                for ingredient in random.sample(pool, per_recipe)
+            ],
+        )
+        for _ in range(count)
+    ]
+
+
+async def main(recipe_count: int, per_recipe: int) -> None:
+    db = await connect()
+    ingredient_repo = IngredientRepository(db)
+    recipe_repo = RecipeRepository(db)
+    recipe_ids: List[str] = []
+
+    pool = [
+        IngredientModel(name=str(uuid.uuid4()), description="benchmark")
+        for _ in range(INGREDIENT_POOL)
+    ]
+    await ingredient_repo.create_ingredients(pool)
+
+    try:
+        recipes = make_recipes(SINGLE_INSERT_RECIPES, pool, per_recipe)
+        start = time.perf_counter()
+
+        for recipe in recipes:
+            await recipe_repo.create_recipe(recipe)
+
+        elapsed = time.perf_counter() - start
+        recipe_ids.extend(str(recipe.id) for recipe in recipes)
+        print(
+            "{0:<28} {1:>10.0f} recipes/s".format(
+                "create_recipe x1",
+                len(recipes) / elapsed,
+            ),
+        )
+
+        for batch_size in BATCH_SIZES:
+            recipes = make_recipes(recipe_count, pool, per_recipe)
+            start = time.perf_counter()
+
+            for start_index in range(0, len(recipes), batch_size):
+                end_index = start_index + batch_size
+                await recipe_repo.create_recipes(recipes[start_index:end_index])
+
+            elapsed = time.perf_counter() - start
+            recipe_ids.extend(str(recipe.id) for recipe in recipes)
+            print(
+                "{0:<28} {1:>10.0f} recipes/s".format(
+                    "create_recipes x{0}".format(batch_size),
+                    len(recipes) / elapsed,
+                ),
+            )
+    finally:
+        recipes_table = RecipeOrm.table()
+        ingredients_table = IngredientOrm.table()
+        await db.execute(
+            recipes_table.delete().where(recipes_table.c.id == any_(recipe_ids)),
+        )
+        await db.execute(
+            ingredients_table.delete().where(
+                ingredients_table.c.id
+                == any_([str(ingredient.id) for ingredient in pool]),
+            ),
+        )
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RECIPES,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_INGREDIENTS,
+        ),
+    )
@@ -0,0 +1,108 @@
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from databases import Database
+from dotenv import load_dotenv
+
+MS = 1000
+
+
+def get_database_url() -> str:
+    load_dotenv()
+
+    from app.core.config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+
+    return "postgresql://{user}:{password}@{host}:{port}/{name}".format(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        name=DB_NAME,
+    )
+
+
+async def connect() -> Database:
+    database = Database(get_database_url())
+    await database.connect()
+
+    return database
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index] * MS
+
+    return {
+        "runs": len(ordered),
+        "mean_ms": statistics.mean(ordered) * MS,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "ops_per_s": len(ordered) / sum(ordered) if sum(ordered) else 0.0,
+    }
+
+
+async def time_async(
+    call: Callable[[], Awaitable[Any]],
+    iterations: int,
+    warmup: int = 10,
+) -> Dict[str, float]:
+    for _ in range(warmup):
+        await call()
+
+    timings = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+
+    return summarize(timings)
+
+
+def time_sync(
+    call: Callable[[], Any],
+    iterations: int,
+    warmup: int = 10,
+) -> Dict[str, float]:
+    for _ in range(warmup):
+        call()
+
+    timings = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+
+    return summarize(timings)
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    print(title)
+    print(
+        "{0:<32} {1:>10} {2:>10} {3:>10} {4:>10} {5:>12}".format(
+            "case",
+            "mean ms",
+            "p50 ms",
+            "p95 ms",
+            "p99 ms",
+            "ops/s",
+        ),
+    )
+
+    for case, stats in results.items():
+        print(
+            "{0:<32} {1:>10.3f} {2:>10.3f} {3:>10.3f} {4:>10.3f} {5:>12.1f}".format(
+                case,
+                stats["mean_ms"],
+                stats["p50_ms"],
+                stats["p95_ms"],
+                stats["p99_ms"],
+                stats["ops_per_s"],
+            ),
+        )
@@ -0,0 +1,141 @@
+"""Latency of ingredient updates and deletes under concurrent writers.
+
+Compares the read, write, read-again repository methods with the single
+UPDATE ... RETURNING / DELETE ... RETURNING statements. Every writer works
+through its own share of a fresh set of ingredients, so deletes never miss.
+
+Usage: python -m benchmarks.concurrent_writes [writers] [operations per writer]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.models.ingredient import (
+    IngredientModel,
+    IngredientOrm,
+    UpdatedIngredientModel,
+)
+from benchmarks.common import connect, print_results, summarize
+
+DEFAULT_WRITERS = 8
+DEFAULT_OPERATIONS = 200
+
+
+class LegacyIngredientRepository(IngredientRepository):
+    async def update_ingredient(
+        self,
+        id: str,
+        updated_ingredient: UpdatedIngredientModel,
+    ) -> Optional[IngredientModel]:
+        ingredients_table = IngredientOrm.table()
+
+        if await self.get_one_ingredient(id) is None:
+            return None
+
+        sql = (
+            ingredients_table.update()
+            .where(ingredients_table.c.id == id)
+            .values(**updated_ingredient.dict(exclude_none=True))
+        )
+        await self.db.execute(sql)
+        self._invalidate_cache(id)
+
+        return await self.get_one_ingredient(id)
+
+    async def delete_ingredient(self, id: str) -> Optional[IngredientModel]:
+        ingredient = await self.get_one_ingredient(id)
+
+        if ingredient is None:
+            return None
+
+        ingredients_table = IngredientOrm.table()
+        await self.db.execute(
+            ingredients_table.delete().where(ingredients_table.c.id == id),
+        )
+        self._invalidate_cache(id)
+
+        return ingredient
+
+
+async def run_writers(
+    call: Callable[[str], Awaitable[Optional[IngredientModel]]],
+    shares: List[List[str]],
+) -> Dict[str, float]:
+    timings: List[float] = []
+
+    async def writer(ids: List[str]) -> None:
+        for id in ids:
+            started = time.perf_counter()
+            assert await call(id) is not None
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[writer(ids) for ids in shares])
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(timings)
+    # Throughput of all writers together rather than of one call at a time.
+    stats["ops_per_s"] = len(timings) / elapsed
+
+    return stats
+
+
+async def main(writers: int, operations: int) -> None:
+    db = await connect()
+    repos = {
+        "select + write + select": LegacyIngredientRepository(db),
+        "RETURNING": IngredientRepository(db),
+    }
+    created: List[str] = []
+    results = {}
+
+    async def create_shares() -> List[List[str]]:
+        ingredients = [
+            IngredientModel(name=uuid.uuid4().hex, description="benchmark")
+            for _ in range(writers * operations)
+        ]
+        await IngredientRepository(db).create_ingredients(ingredients)
+        ids = [str(ingredient.id) for ingredient in ingredients]
+        created.extend(ids)
+
+        return [ids[index::writers] for index in range(writers)]
+
+    try:
+        for case, repo in repos.items():
+            shares = await create_shares()
+            results["update, {0}".format(case)] = await run_writers(
+                lambda id, repo=repo: repo.update_ingredient(
+                    id,
+                    UpdatedIngredientModel(description=uuid.uuid4().hex),
+                ),
+                shares,
+            )
+            results["delete, {0}".format(case)] = await run_writers(
+                repo.delete_ingredient,
+                shares,
+            )
+    finally:
+        await db.execute(
+            IngredientOrm.table()
+            .delete()
+            .where(IngredientOrm.table().c.id.in_(created)),
+        )
+        await db.disconnect()
+
+    print_results(
+        "PATCH and DELETE /ingredients/{{id}}, {0} concurrent writers, "
+        "{1} operations each".format(writers, operations),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WRITERS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_OPERATIONS,
+        ),
+    )
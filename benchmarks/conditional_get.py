@@ -0,0 +1,124 @@
+"""Compare full GETs with If-None-Match revalidations that answer 304.
+
+Runs the application in process over ASGI, so the timings include routing,
+validation and serialization but no network.
+
+Usage: python -m benchmarks.conditional_get [iterations] [page size]
+"""
+import asyncio
+import sys
+import uuid
+from typing import Dict
+
+from asgi_lifespan import LifespanManager
+from httpx import AsyncClient
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.ingredient import IngredientForRecipe, IngredientModel, IngredientOrm
+from app.models.recipe import RecipeModelWithIngredients, RecipeOrm
+from benchmarks.common import print_results, time_async
+from main import get_application
+
+DEFAULT_ITERATIONS = 1000
+DEFAULT_PAGE_SIZE = 100
+INGREDIENTS_PER_RECIPE = 10
+
+
+async def main(iterations: int, page_size: int) -> None:
+    app = get_application()
+
+    async with LifespanManager(app), AsyncClient(
+        app=app,
+        base_url="http://benchmark",
+    ) as client:
+        db = app.state.db
+        ingredients = [
+            IngredientModel(name=str(uuid.uuid4()), description="benchmark " * 20)
+            for _ in range(INGREDIENTS_PER_RECIPE)
+        ]
+        recipes = [
+            RecipeModelWithIngredients(
+                name=str(uuid.uuid4()),
+                description="benchmark " * 50,
+                ingredients=[
+                    IngredientForRecipe(id=ingredient.id, name=ingredient.name)
+                    for ingredient in ingredients
+                ],
+            )
+            for _ in range(page_size)
+        ]
+        await IngredientRepository(db).create_ingredients(ingredients)
+        await RecipeRepository(db).create_recipes(recipes)
+
+        routes = {
+            "detail": (
+                app.url_path_for("recipes:get-one-recipe", id=recipes[0].id),
+                {},
+            ),
+            "list": (
+                app.url_path_for("recipes:get-recipes"),
+                {"limit": page_size, "expand": "ingredients"},
+            ),
+        }
+        results = {}
+        sizes: Dict[str, int] = {}
+
+        try:
+            for case, (route, params) in routes.items():
+                response = await client.get(route, params=params)
+                revalidate = {"If-None-Match": response.headers["ETag"]}
+                not_modified = await client.get(
+                    route,
+                    params=params,
+                    headers=revalidate,
+                )
+                sizes["{0} 200".format(case)] = len(response.content)
+                sizes["{0} 304".format(case)] = len(not_modified.content)
+
+                results["{0} 200".format(case)] = await time_async(
+                    lambda: client.get(route, params=params),
+                    iterations,
+                )
+                results["{0} 304".format(case)] = await time_async(
+                    lambda: client.get(route, params=params, headers=revalidate),
+                    iterations,
+                )
+        finally:
+            await db.execute(
+                RecipeOrm.table()
+                .delete()
+                .where(
+                    RecipeOrm.table().c.id.in_([str(recipe.id) for recipe in recipes]),
+                ),
+            )
+            await db.execute(
+                IngredientOrm.table()
+                .delete()
+                .where(
+                    IngredientOrm.table().c.id.in_(
+                        [str(ingredient.id) for ingredient in ingredients],
+                    ),
+                ),
+            )
+
+    print_results(
+        "Conditional GET /recipes, page size {0}, {1} runs".format(
+            page_size,
+            iterations,
+        ),
+        results,
+    )
+    print()
+
+    for case, size in sizes.items():
+        print("{0:<32} {1:>10} body bytes".format(case, size))
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_SIZE,
+        ),
+    )
@@ -0,0 +1,130 @@
+"""Compare raw text() filters with bound filter params on statement reuse.
+
+Each case runs a stream of name and created_at filters with distinct values
+on one pinned connection and counts how many statements the session had to
+prepare, next to the per query timings.
+
+Usage: python -m benchmarks.filter_plans [iterations]
+"""
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from databases import Database
+from sqlalchemy import Table, text  # type: ignore
+from sqlalchemy.orm import Query  # type: ignore
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.models.ingredient import IngredientModel, IngredientOrm
+from app.utils.filters import parse_filters
+from benchmarks.common import connect, print_results, time_async
+
+DEFAULT_ITERATIONS = 2000
+PAGE_SIZE = 50
+PREPARED_STATEMENTS = "SELECT name FROM pg_prepared_statements"
+
+
+def make_filters(index: int) -> List[str]:
+    since = datetime(2020, 1, 1) + timedelta(seconds=index)
+
+    return [
+        "name LIKE '%{0:x}%'".format(index % 4096),
+        "created_at >= '{0}'".format(since.isoformat()),
+    ]
+
+
+async def last_prepared_statement(db: Database) -> int:
+    # asyncpg names statements "__asyncpg_stmt_<hex counter>__", the highest
+    # one tells how many were prepared even after older ones left the cache.
+    names = await db.fetch_all(PREPARED_STATEMENTS)
+
+    return max(
+        (int(name[0].strip("_").split("_")[-1], 16) for name in names),
+        default=0,
+    )
+
+
+class LegacyIngredientRepository(IngredientRepository):
+    def _add_filters(self, query: Query, filters: List[str], table: Table) -> Query:
+        for filter_param in filters:
+            query = query.where(text(filter_param))
+
+        return query
+
+
+async def run_case(
+    db: Database,
+    call: Callable[[List[str]], Any],
+    iterations: int,
+) -> Dict[str, float]:
+    counter = iter(range(iterations * 2))
+
+    async with db.connection():
+        before = await last_prepared_statement(db)
+        stats = await time_async(lambda: call(make_filters(next(counter))), iterations)
+        after = await last_prepared_statement(db)
+
+    stats["prepared"] = after - before
+
+    return stats
+
+
+async def main(iterations: int) -> None:
+    db = await connect()
+    repo = IngredientRepository(db)
+    legacy_repo = LegacyIngredientRepository(db)
+    ingredients = [
+        IngredientModel(name=uuid.uuid4().hex, description="benchmark")
+        for _ in range(1000)
+    ]
+    await repo.create_ingredients(ingredients)
+
+    try:
+        results = {
+            "text() filters": await run_case(
+                db,
+                lambda filters: legacy_repo.get_ingredients(
+                    PAGE_SIZE,
+                    0,
+                    filters=filters,
+                ),
+                iterations,
+            ),
+            "bound filter params": await run_case(
+                db,
+                lambda filters: repo.get_ingredients(
+                    PAGE_SIZE,
+                    0,
+                    filters=parse_filters(filters),
+                ),
+                iterations,
+            ),
+        }
+    finally:
+        await db.execute(
+            IngredientOrm.table()
+            .delete()
+            .where(
+                IngredientOrm.table().c.id.in_(
+                    [str(ingredient.id) for ingredient in ingredients],
+                ),
+            ),
+        )
+        await db.disconnect()
+
+    print_results(
+        "GET /ingredients?filters=..., distinct values, {0} runs".format(iterations),
+        results,
+    )
+    print()
+
+    for case, stats in results.items():
+        print("{0:<32} {1:>10} prepared statements".format(case, stats["prepared"]))
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS),
+    )
@@ -0,0 +1,99 @@
+"""Page through the recipes of the most used ingredient.
+
+Compares LIMIT/OFFSET over the join with the keyset query behind
+GET /ingredients/{id}/recipes, for the first page and for a page deep into
+the result. Expects a seeded database, see benchmarks/search.py.
+
+Usage: python -m benchmarks.ingredient_recipes [iterations] [page size]
+"""
+import asyncio
+import sys
+
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.recipe import RecipeOrm, RecipeModel
+from app.models.recipes_ingredients import recipes_ingredients
+from benchmarks.common import connect, print_results, time_async
+
+DEFAULT_ITERATIONS = 100
+DEFAULT_PAGE_SIZE = 20
+DEEP_PAGE_FRACTION = 0.9
+MOST_USED_INGREDIENT = (
+    "SELECT ingredient_id, count(*) AS uses FROM recipes_ingredients "
+    "GROUP BY ingredient_id ORDER BY uses DESC LIMIT 1"
+)
+
+
+async def main(iterations: int, page_size: int) -> None:
+    db = await connect()
+    repo = RecipeRepository(db)
+    recipes_table = RecipeOrm.table()
+
+    try:
+        row = await db.fetch_one(MOST_USED_INGREDIENT)
+        ingredient_id, uses = str(row["ingredient_id"]), row["uses"]
+        deep_offset = int(uses * DEEP_PAGE_FRACTION)
+        deep_recipe_id = await db.fetch_val(
+            recipes_ingredients.select()
+            .with_only_columns([recipes_ingredients.c.recipe_id])
+            .where(recipes_ingredients.c.ingredient_id == ingredient_id)
+            .order_by(recipes_ingredients.c.recipe_id)
+            .offset(deep_offset)
+            .limit(1),
+        )
+
+        async def offset_page(offset: int):
+            recipes = await db.fetch_all(
+                recipes_table.select()
+                .select_from(
+                    recipes_ingredients.join(
+                        recipes_table,
+                        recipes_table.c.id == recipes_ingredients.c.recipe_id,
+                    ),
+                )
+                .where(recipes_ingredients.c.ingredient_id == ingredient_id)
+                .order_by(recipes_ingredients.c.recipe_id)
+                .offset(offset)
+                .limit(page_size),
+            )
+
+            return [RecipeModel(**recipe) for recipe in recipes]
+
+        results = {
+            "offset, first page": await time_async(
+                lambda: offset_page(0),
+                iterations,
+            ),
+            "offset, deep page": await time_async(
+                lambda: offset_page(deep_offset),
+                iterations,
+            ),
+            "keyset, first page": await time_async(
+                lambda: repo.get_recipes_for_ingredient(ingredient_id, page_size),
+                iterations,
+            ),
+            "keyset, deep page": await time_async(
+                lambda: repo.get_recipes_for_ingredient(
+                    ingredient_id,
+                    page_size,
+                    cursor={"id": str(deep_recipe_id)},
+                ),
+                iterations,
+            ),
+        }
+    finally:
+        await db.disconnect()
+
+    print_results(
+        "GET /ingredients/{{id}}/recipes, {0} recipes, page size {1}, "
+        "deep page at {2}, {3} runs".format(uses, page_size, deep_offset, iterations),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_SIZE,
+        ),
+    )
@@ -0,0 +1,619 @@
+"""HTTP load benchmark over every recipe and ingredient route.
+
+Each route gets one case that is driven by concurrent clients, either in
+process over ASGI or against a running server with --url. Latency
+percentiles and throughput of the best of several rounds per route are
+written to a JSON report. When a baseline exists for the scale, a route
+whose p95 grew or whose throughput fell by more than the tolerance, or that
+returned errors, fails the run.
+
+Writes only touch rows the run creates, every name starts with NAME_PREFIX
+and they are removed when the run ends. --seed-db reseeds the database to the
+chosen scale first, which truncates every table.
+
+Usage: python -m benchmarks.load [--scale small] [--seed-db] [--url URL]
+    [--concurrency 16] [--requests 400] [--update-baseline]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport, AsyncClient, HTTPError
+
+from app.api.routes import ingredients, recipes
+from benchmarks.common import connect, summarize
+from main import get_application
+from seed import WORDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines", "load-{0}.json")
+REPORT_PATH = os.path.join(ROOT, "tmp", "load-{0}.json")
+
+SCALES = {
+    "small": {"ingredients": 1_000, "recipes": 10_000},
+    "medium": {"ingredients": 10_000, "recipes": 100_000},
+    "large": {"ingredients": 50_000, "recipes": 1_000_000},
+}
+DEFAULT_SCALE = "small"
+DEFAULT_CONCURRENCY = 16
+DEFAULT_REQUESTS = 400
+DEFAULT_ROUNDS = 3
+DEFAULT_TOLERANCE = 0.5
+SAMPLE_SIZE = 500
+PAGE_SIZE = 20
+MAX_OFFSET = 1000
+BATCH_SIZE = 20
+RECIPE_INGREDIENTS = 5
+PANTRY_SIZE = 8
+NAME_PREFIX = "load-bench"
+ROUTE_PREFIX = "/api/v1"
+
+Request = Dict[str, Any]
+
+
+class Context(NamedTuple):
+    ingredients: List[Dict[str, str]]
+    recipe_ids: List[str]
+    owned_ingredient_ids: List[str]
+    owned_recipe_ids: List[str]
+
+
+class Case(NamedTuple):
+    build: Callable[[Context, random.Random], Request]
+    share: float = 1.0
+    consumes: str = ""
+
+
+def name() -> str:
+    return "{0} {1}".format(NAME_PREFIX, uuid.uuid4().hex)
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(8))
+
+
+def recipe_ingredients(context: Context, rng: random.Random) -> List[Dict[str, str]]:
+    return rng.sample(context.ingredients, RECIPE_INGREDIENTS)
+
+
+def recipe_body(context: Context, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "name": name(),
+        "description": sentence(rng),
+        "ingredients": recipe_ingredients(context, rng),
+    }
+
+
+def ingredient_body(rng: random.Random) -> Dict[str, Any]:
+    return {"name": name(), "description": sentence(rng)}
+
+
+def get(path: str, **params: Any) -> Request:
+    return {"method": "GET", "url": ROUTE_PREFIX + path, "params": params}
+
+
+def send(method: str, path: str, body: Any) -> Request:
+    return {"method": method, "url": ROUTE_PREFIX + path, "json": body}
+
+
+# Requests are built before the clocks start. A case with a consumes key pops
+# one id created for the run per request, so deletes never miss and updates
+# never touch seeded rows.
+CASES: Dict[str, Case] = {
+    "recipes:search-recipes": Case(
+        lambda context, rng: get(
+            "/recipes/search",
+            q=rng.choice(WORDS),
+            limit=PAGE_SIZE,
+        ),
+    ),
+    "recipes:export-recipes": Case(
+        lambda context, rng: get("/recipes/export", format="ndjson"),
+        share=0.01,
+    ),
+    "recipes:get-one-recipe": Case(
+        lambda context, rng: get(
+            "/recipes/{0}".format(rng.choice(context.recipe_ids)),
+        ),
+    ),
+    "recipes:get-recipes": Case(
+        lambda context, rng: get(
+            "/recipes",
+            limit=PAGE_SIZE,
+            offset=rng.randrange(MAX_OFFSET),
+            sort="created_at:desc",
+            expand="ingredients",
+        ),
+    ),
+    "recipes:create-recipe": Case(
+        lambda context, rng: send(
+            "POST",
+            "/recipes",
+            recipe_body(context, rng),
+        ),
+    ),
+    "recipes:create-recipes-batch": Case(
+        lambda context, rng: send(
+            "POST",
+            "/recipes/batch",
+            [recipe_body(context, rng) for _ in range(BATCH_SIZE)],
+        ),
+        share=0.25,
+    ),
+    "recipes:get-cookable-recipes": Case(
+        lambda context, rng: send(
+            "POST",
+            "/recipes/cookable?limit={0}".format(PAGE_SIZE),
+            {
+                "ingredients": [
+                    ingredient["id"]
+                    for ingredient in rng.sample(context.ingredients, PANTRY_SIZE)
+                ],
+                "max_missing": 2,
+            },
+        ),
+    ),
+    "recipes:update-recipe": Case(
+        lambda context, rng: send(
+            "PATCH",
+            "/recipes/{0}".format(context.owned_recipe_ids.pop()),
+            {
+                "description": sentence(rng),
+                "ingredients": recipe_ingredients(context, rng)[:1],
+            },
+        ),
+        consumes="recipes",
+    ),
+    "recipes:delete-recipe": Case(
+        lambda context, rng: {
+            "method": "DELETE",
+            "url": "{0}/recipes/{1}".format(
+                ROUTE_PREFIX,
+                context.owned_recipe_ids.pop(),
+            ),
+        },
+        consumes="recipes",
+    ),
+    "ingredients:search-ingredients": Case(
+        lambda context, rng: get(
+            "/ingredients/search",
+            q=rng.choice(WORDS),
+            limit=PAGE_SIZE,
+        ),
+    ),
+    "ingredients:export-ingredients": Case(
+        lambda context, rng: get("/ingredients/export", format="csv"),
+        share=0.05,
+    ),
+    "ingredients:get-one-ingredient": Case(
+        lambda context, rng: get(
+            "/ingredients/{0}".format(rng.choice(context.ingredients)["id"]),
+        ),
+    ),
+    "ingredients:get-ingredient-recipes": Case(
+        lambda context, rng: get(
+            "/ingredients/{0}/recipes".format(rng.choice(context.ingredients)["id"]),
+            limit=PAGE_SIZE,
+        ),
+    ),
+    "ingredients:get-ingredients": Case(
+        lambda context, rng: get(
+            "/ingredients",
+            limit=PAGE_SIZE,
+            offset=rng.randrange(MAX_OFFSET),
+            sort="name:asc",
+        ),
+    ),
+    "ingredients:create-ingredient": Case(
+        lambda context, rng: send(
+            "POST",
+            "/ingredients",
+            ingredient_body(rng),
+        ),
+    ),
+    "ingredients:create-ingredients-batch": Case(
+        lambda context, rng: send(
+            "POST",
+            "/ingredients/batch",
+            [ingredient_body(rng) for _ in range(BATCH_SIZE)],
+        ),
+        share=0.25,
+    ),
+    "ingredients:update-ingredient": Case(
+        lambda context, rng: send(
+            "PATCH",
+            "/ingredients/{0}".format(context.owned_ingredient_ids.pop()),
+            {"description": sentence(rng)},
+        ),
+        consumes="ingredients",
+    ),
+    "ingredients:delete-ingredient": Case(
+        lambda context, rng: {
+            "method": "DELETE",
+            "url": "{0}/ingredients/{1}".format(
+                ROUTE_PREFIX,
+                context.owned_ingredient_ids.pop(),
+            ),
+        },
+        consumes="ingredients",
+    ),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default=DEFAULT_SCALE)
+    parser.add_argument(
+        "--seed-db",
+        action="store_true",
+        help="Truncate and reseed the database to the scale before running",
+    )
+    parser.add_argument("--url", help="Drive a running server instead of ASGI")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=DEFAULT_REQUESTS,
+        help="Requests per route, scaled down for exports and batches",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        help="Runs per route, the one with the lowest p95 is reported",
+    )
+    parser.add_argument("--routes", nargs="*", help="Only run these route names")
+    parser.add_argument("--output", help="Report path, tmp/load-<scale>.json")
+    parser.add_argument("--baseline", help="Baseline path, per scale by default")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store this run as the baseline instead of comparing",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+
+    return parser.parse_args()
+
+
+def check_coverage() -> None:
+    routes = {
+        route.name
+        for router in (recipes.router, ingredients.router)
+        for route in router.routes
+    }
+    missing = sorted(routes - set(CASES))
+
+    if missing:
+        raise SystemExit("No load case for routes: {0}".format(", ".join(missing)))
+
+
+def seed_database(scale: str) -> None:
+    subprocess.run(
+        [
+            sys.executable,
+            "seed.py",
+            "--ingredients",
+            str(SCALES[scale]["ingredients"]),
+            "--recipes",
+            str(SCALES[scale]["recipes"]),
+            "--truncate",
+        ],
+        cwd=ROOT,
+        check=True,
+    )
+
+
+def request_count(case: Case, requests: int) -> int:
+    return max(1, int(requests * case.share))
+
+
+async def create_owned(
+    client: AsyncClient,
+    context: Context,
+    rng: random.Random,
+    entity: str,
+    count: int,
+) -> None:
+    for start in range(0, count, BATCH_SIZE * 50):
+        size = min(BATCH_SIZE * 50, count - start)
+
+        if entity == "recipes":
+            body = [recipe_body(context, rng) for _ in range(size)]
+            owned = context.owned_recipe_ids
+        else:
+            body = [ingredient_body(rng) for _ in range(size)]
+            owned = context.owned_ingredient_ids
+
+        response = await client.post(
+            "{0}/{1}/batch".format(ROUTE_PREFIX, entity),
+            json=body,
+        )
+        response.raise_for_status()
+        owned.extend(item["id"] for item in response.json()["items"])
+
+
+async def load_context(
+    client: AsyncClient,
+    cases: Dict[str, Case],
+    requests: int,
+    rounds: int,
+    rng: random.Random,
+) -> Context:
+    db = await connect()
+
+    try:
+        ingredient_rows = await db.fetch_all(
+            "SELECT id, name FROM ingredients ORDER BY random() LIMIT :size",
+            {"size": SAMPLE_SIZE},
+        )
+        recipe_rows = await db.fetch_all(
+            "SELECT id FROM recipes ORDER BY random() LIMIT :size",
+            {"size": SAMPLE_SIZE},
+        )
+    finally:
+        await db.disconnect()
+
+    context = Context(
+        [{"id": str(row["id"]), "name": row["name"]} for row in ingredient_rows],
+        [str(row["id"]) for row in recipe_rows],
+        [],
+        [],
+    )
+
+    for entity in ("recipes", "ingredients"):
+        owned = sum(
+            request_count(case, requests) * rounds
+            for case in cases.values()
+            if case.consumes == entity
+        )
+        await create_owned(client, context, rng, entity, owned)
+
+    return context
+
+
+async def run_case(
+    client: AsyncClient,
+    built: List[Request],
+    concurrency: int,
+) -> Dict[str, float]:
+    pending = iter(built)
+    timings: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+
+        for request in pending:
+            started = time.perf_counter()
+
+            try:
+                response = await client.request(**request)
+                failed = response.status_code >= 400
+            except HTTPError:
+                failed = True
+
+            timings.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    stats = summarize(timings)
+
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "mean_ms": round(stats["mean_ms"], 3),
+        "p50_ms": round(stats["p50_ms"], 3),
+        "p95_ms": round(stats["p95_ms"], 3),
+        "p99_ms": round(stats["p99_ms"], 3),
+        "throughput_rps": round(len(timings) / elapsed, 3),
+    }
+
+
+async def cleanup() -> None:
+    db = await connect()
+
+    try:
+        for table in ("recipes", "ingredients"):
+            await db.execute(
+                "DELETE FROM {0} WHERE name LIKE :prefix".format(table),
+                {"prefix": NAME_PREFIX + " %"},
+            )
+    finally:
+        await db.disconnect()
+
+
+async def run(args: argparse.Namespace, client: AsyncClient) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    cases = {
+        route: case
+        for route, case in CASES.items()
+        if not args.routes or route in args.routes
+    }
+    # In process httpx runs the application in the calling task, and
+    # databases keeps its connection in a context variable. Setup runs in a
+    # task of its own so the workers do not all inherit its connection.
+    context = await asyncio.create_task(
+        load_context(client, cases, args.requests, args.rounds, rng),
+    )
+    endpoints = {}
+
+    try:
+        for route, case in cases.items():
+            # The best round stands for the route, a stall of the machine in
+            # one round does not turn into a regression.
+            results = []
+
+            for _ in range(args.rounds):
+                built = [
+                    case.build(context, rng)
+                    for _ in range(request_count(case, args.requests))
+                ]
+                results.append(await run_case(client, built, args.concurrency))
+
+            endpoints[route] = {
+                **min(results, key=lambda stats: stats["p95_ms"]),
+                "errors": sum(stats["errors"] for stats in results),
+            }
+            print_endpoint(route, endpoints[route])
+    finally:
+        await cleanup()
+
+    return {
+        "scale": args.scale,
+        "target": "url" if args.url else "asgi",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "rounds": args.rounds,
+        "endpoints": endpoints,
+    }
+
+
+async def run_against_target(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.url:
+        async with AsyncClient(base_url=args.url, timeout=None) as client:
+            return await run(args, client)
+
+    app = get_application()
+
+    async with LifespanManager(app):
+        # Application errors come back as 500s, as from a server, rather than
+        # being raised into the worker.
+        transport = ASGITransport(app=app, raise_app_exceptions=False)
+
+        async with AsyncClient(
+            transport=transport,
+            base_url="http://test",
+            timeout=None,
+        ) as client:
+            return await run(args, client)
+
+
+def print_endpoint(route: str, stats: Dict[str, float]) -> None:
+    print(
+        "{0:<40} {1:>6} {2:>6} {3:>9.2f} {4:>9.2f} {5:>9.2f} {6:>10.1f}".format(
+            route,
+            stats["requests"],
+            stats["errors"],
+            stats["p50_ms"],
+            stats["p95_ms"],
+            stats["p99_ms"],
+            stats["throughput_rps"],
+        ),
+    )
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+) -> List[str]:
+    regressions = []
+
+    for key in ("scale", "target", "concurrency"):
+        if report[key] != baseline[key]:
+            return [
+                "baseline was taken with {0} {1}, this run used {2}".format(
+                    key,
+                    baseline[key],
+                    report[key],
+                ),
+            ]
+
+    for route, stats in report["endpoints"].items():
+        if stats["errors"]:
+            regressions.append("{0}: {1} errors".format(route, stats["errors"]))
+
+        expected = baseline["endpoints"].get(route)
+
+        if expected is None:
+            continue
+
+        if stats["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                "{0}: p95 {1:.2f} ms, baseline {2:.2f} ms".format(
+                    route,
+                    stats["p95_ms"],
+                    expected["p95_ms"],
+                ),
+            )
+
+        if stats["throughput_rps"] < expected["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                "{0}: {1:.1f} req/s, baseline {2:.1f} req/s".format(
+                    route,
+                    stats["throughput_rps"],
+                    expected["throughput_rps"],
+                ),
+            )
+
+    return regressions
+
+
+def write_json(path: str, content: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "w") as output:
+        json.dump(content, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def main() -> None:
+    args = parse_args()
+    check_coverage()
+
+    if args.seed_db:
+        seed_database(args.scale)
+
+    print(
+        "{0:<40} {1:>6} {2:>6} {3:>9} {4:>9} {5:>9} {6:>10}".format(
+            "route",
+            "reqs",
+            "errors",
+            "p50 ms",
+            "p95 ms",
+            "p99 ms",
+            "req/s",
+        ),
+    )
+    report = asyncio.run(run_against_target(args))
+    output = args.output or REPORT_PATH.format(args.scale)
+    baseline_path = args.baseline or BASELINE_PATH.format(args.scale)
+    write_json(output, report)
+    print("Report written to {0}".format(output))
+
+    if args.update_baseline:
+        write_json(baseline_path, report)
+        print("Baseline written to {0}".format(baseline_path))
+        return
+
+    if not os.path.exists(baseline_path):
+        print("No baseline at {0}, nothing to compare".format(baseline_path))
+        return
+
+    with open(baseline_path) as baseline:
+        regressions = compare(report, json.load(baseline), args.tolerance)
+
+    if regressions:
+        print("Regressions against {0}:".format(baseline_path))
+
+        for regression in regressions:
+            print("  {0}".format(regression))
+
+        sys.exit(1)
+
+    print("No regressions against {0}".format(baseline_path))
+
+
+if __name__ == "__main__":
+    main()
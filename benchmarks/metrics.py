@@ -0,0 +1,133 @@
+"""Measure what the metrics subsystem adds to a request.
+
+The middleware and the repository timing wrapper are first timed around
+no-op callables, which isolates their own cost, then a single ingredient GET
+is run in process through the application with and without the middleware.
+The last case renders a scrape with every route and status series populated.
+
+Usage: python -m benchmarks.metrics [iterations]
+"""
+import asyncio
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from asgi_lifespan import LifespanManager
+from httpx import AsyncClient
+from prometheus_client import generate_latest
+
+from app.core.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    MetricsMiddleware,
+    metrics_registry,
+    time_repository_method,
+)
+from app.db.repositories.ingredient_repository import IngredientRepository
+from benchmarks.common import print_results, time_async, time_sync
+from main import get_application
+
+DEFAULT_ITERATIONS = 20000
+ROUTE = SimpleNamespace(path="/api/v1/benchmark/{id}")
+SCOPE = {"type": "http", "method": "GET", "path": "/api/v1/benchmark/1"}
+SCRAPE_ROUTES = 40
+SCRAPE_STATUSES = ("200", "304", "404", "422")
+
+
+async def asgi_app(scope: Any, receive: Any, send: Any) -> None:
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive() -> Dict[str, Any]:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Dict[str, Any]) -> None:
+    pass
+
+
+async def repository_method() -> None:
+    pass
+
+
+def build_app(with_metrics: bool) -> Any:
+    app = get_application()
+
+    if not with_metrics:
+        # The stack is built on the first request, so dropping the entry
+        # before then leaves the application otherwise identical.
+        app.user_middleware = [
+            middleware
+            for middleware in app.user_middleware
+            if middleware.cls is not MetricsMiddleware
+        ]
+
+    return app
+
+
+async def request_timings(iterations: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    for label, with_metrics in (("request bare", False), ("request metrics", True)):
+        app = build_app(with_metrics)
+
+        async with LifespanManager(app):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                repository = IngredientRepository(app.state.db)
+                ingredient = (await repository.get_ingredients(1, 0))[0]
+                path = app.url_path_for(
+                    "ingredients:get-one-ingredient",
+                    id=ingredient.id,
+                )
+                results[label] = await time_async(
+                    lambda: client.get(path),
+                    iterations,
+                )
+
+    return results
+
+
+def scrape_render() -> bytes:
+    return generate_latest(metrics_registry)
+
+
+async def main(iterations: int) -> None:
+    middleware = MetricsMiddleware(asgi_app)
+    timed = time_repository_method("BenchmarkRepository", "method", repository_method)
+    results = {
+        "asgi bare": await time_async(
+            lambda: asgi_app(dict(SCOPE), receive, send),
+            iterations,
+        ),
+        "asgi metrics": await time_async(
+            lambda: middleware(dict(SCOPE), receive, send),
+            iterations,
+        ),
+        "repository bare": await time_async(repository_method, iterations),
+        "repository timed": await time_async(timed, iterations),
+    }
+    results.update(await request_timings(iterations // 10))
+
+    for route in range(SCRAPE_ROUTES):
+        for status in SCRAPE_STATUSES:
+            HTTP_REQUESTS.labels("GET", "/route/{0}".format(route), status).inc()
+
+        HTTP_REQUEST_DURATION.labels("GET", "/route/{0}".format(route)).observe(0.01)
+
+    results["scrape render"] = time_sync(scrape_render, iterations // 100)
+
+    print_results(
+        "Metrics overhead, {0} runs, scrape of {1} routes".format(
+            iterations,
+            SCRAPE_ROUTES,
+        ),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS),
+    )
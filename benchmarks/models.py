@@ -0,0 +1,181 @@
+"""Compare validating response models built from rows with trusting the rows.
+
+Reads one page of real rows per repository read path from a seeded database,
+then builds that page's models both ways: through the pydantic constructor
+with full validation, as the repositories used to, and through row_model,
+which fills the fields straight from the row. Recipe details decode the
+aggregated ingredient JSON on both paths.
+
+Usage: python -m benchmarks.models [iterations] [page size]
+"""
+import asyncio
+import json
+import sys
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.db.repositories.base import row_model
+from app.db.repositories.recipe_repository import (
+    GET_ONE_RECIPE_QUERY,
+    GET_RECIPES_INGREDIENTS_QUERY,
+    ID,
+    INGREDIENTS,
+    RECIPE_ID,
+    RecipeRepository,
+)
+from app.models.ingredient import (
+    IngredientForRecipe,
+    IngredientModel,
+    IngredientOrm,
+    IngredientSearchResult,
+)
+from app.models.recipe import (
+    RecipeModel,
+    RecipeModelWithIngredients,
+    RecipeOrm,
+    RecipePantryMatch,
+    RecipeSearchResult,
+)
+from benchmarks.common import connect, print_results, time_sync
+from seed import WORDS
+
+DEFAULT_ITERATIONS = 500
+DEFAULT_PAGE_SIZE = 200
+PANTRY_MATCH = {"matched": 3, "missing": 1}
+
+
+def validated_details(rows: List[Any]) -> List[RecipeModelWithIngredients]:
+    return [
+        RecipeModelWithIngredients(
+            **{**row, INGREDIENTS: json.loads(row[INGREDIENTS])},
+        )
+        for row in rows
+    ]
+
+
+def trusted_details(rows: List[Any]) -> List[RecipeModelWithIngredients]:
+    return [
+        row_model(
+            RecipeModelWithIngredients,
+            row,
+            ingredients=[
+                row_model(IngredientForRecipe, item, id=uuid.UUID(item[ID]))
+                for item in json.loads(row[INGREDIENTS])
+            ],
+        )
+        for row in rows
+    ]
+
+
+def expanded_cases(
+    recipes: List[Any],
+    ingredient_rows: List[Any],
+) -> Tuple[Callable[[], Any], Callable[[], Any]]:
+    def build(make: Callable[..., Any], make_ingredient: Callable[..., Any]) -> Any:
+        ingredients: Dict[str, List[Any]] = {}
+
+        for row in ingredient_rows:
+            ingredients.setdefault(str(row[RECIPE_ID]), []).append(
+                make_ingredient(row),
+            )
+
+        return [
+            make(recipe, ingredients.get(str(recipe[ID]), [])) for recipe in recipes
+        ]
+
+    return (
+        lambda: build(
+            lambda recipe, items: RecipeModelWithIngredients(
+                **recipe,
+                ingredients=items,
+            ),
+            lambda row: IngredientForRecipe(id=row[ID], name=row["name"]),
+        ),
+        lambda: build(
+            lambda recipe, items: row_model(
+                RecipeModelWithIngredients,
+                recipe,
+                ingredients=items,
+            ),
+            lambda row: row_model(IngredientForRecipe, row),
+        ),
+    )
+
+
+async def main(iterations: int, page_size: int) -> None:
+    db = await connect()
+    repository = RecipeRepository(db)
+    ingredients_table = IngredientOrm.table()
+    recipes_table = RecipeOrm.table()
+
+    try:
+        ingredients = await db.fetch_all(ingredients_table.select().limit(page_size))
+        recipes = await db.fetch_all(recipes_table.select().limit(page_size))
+        ingredient_rows = await db.fetch_all(
+            GET_RECIPES_INGREDIENTS_QUERY.bindparams(
+                recipe_ids=[str(recipe[ID]) for recipe in recipes],
+            ),
+        )
+        details = [
+            await db.fetch_one(
+                GET_ONE_RECIPE_QUERY.bindparams(recipe_id=str(recipe[ID])),
+            )
+            for recipe in recipes
+        ]
+        ingredient_hits = await repository._search(
+            ingredients_table,
+            WORDS[0],
+            page_size,
+        )
+        recipe_hits = await repository._search(recipes_table, WORDS[0], page_size)
+    finally:
+        await db.disconnect()
+
+    pantry = [{**recipe, **PANTRY_MATCH} for recipe in recipes]
+    cases: Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]] = {
+        "ingredients": (
+            lambda: [IngredientModel(**row) for row in ingredients],
+            lambda: [row_model(IngredientModel, row) for row in ingredients],
+        ),
+        "ingredient search": (
+            lambda: [IngredientSearchResult(**row) for row in ingredient_hits],
+            lambda: [row_model(IngredientSearchResult, row) for row in ingredient_hits],
+        ),
+        "recipes": (
+            lambda: [RecipeModel(**row) for row in recipes],
+            lambda: [row_model(RecipeModel, row) for row in recipes],
+        ),
+        "recipes expanded": expanded_cases(recipes, ingredient_rows),
+        "recipe search": (
+            lambda: [RecipeSearchResult(**row) for row in recipe_hits],
+            lambda: [row_model(RecipeSearchResult, row) for row in recipe_hits],
+        ),
+        "recipe pantry": (
+            lambda: [RecipePantryMatch(**row) for row in pantry],
+            lambda: [row_model(RecipePantryMatch, row) for row in pantry],
+        ),
+        "recipe details": (
+            lambda: validated_details(details),
+            lambda: trusted_details(details),
+        ),
+    }
+    results = {}
+
+    for case, (validated, trusted) in cases.items():
+        assert validated() == trusted(), case
+        results["{0} validated".format(case)] = time_sync(validated, iterations)
+        results["{0} trusted".format(case)] = time_sync(trusted, iterations)
+
+    print_results(
+        "Model construction, page size {0}, {1} runs".format(page_size, iterations),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_SIZE,
+        ),
+    )
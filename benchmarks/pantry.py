@@ -0,0 +1,99 @@
+"""Score pantries against every recipe with SQL and with the pantry index.
+
+A pantry mixes the most used ingredients, the staples most kitchens have,
+with random ones. The SQL path runs a handful of times only, it reads every
+posting of every pantry ingredient. Expects a seeded database, see
+benchmarks/search.py.
+
+Usage: python -m benchmarks.pantry [iterations] [pantry size]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from app.db.pantry_index import pantry_index
+from app.db.repositories.recipe_repository import RecipeRepository
+from benchmarks.common import connect, print_results, time_async, time_sync
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_PANTRY_SIZE = 50
+SQL_ITERATIONS = 3
+STAPLES = 5
+LIMIT = 50
+MAX_MISSING = 2
+MOST_USED_INGREDIENTS = (
+    "SELECT ingredient_id FROM recipes_ingredients "
+    "GROUP BY ingredient_id ORDER BY count(*) DESC LIMIT :limit"
+)
+
+
+async def main(iterations: int, pantry_size: int) -> None:
+    db = await connect()
+    repo = RecipeRepository(db)
+    rng = random.Random(0)
+
+    try:
+        staples = [
+            str(row[0])
+            for row in await db.fetch_all(
+                MOST_USED_INGREDIENTS,
+                {"limit": STAPLES},
+            )
+        ]
+        ingredient_ids = [
+            str(row[0]) for row in await db.fetch_all("SELECT id FROM ingredients")
+        ]
+        pantries = [
+            staples + rng.sample(ingredient_ids, pantry_size - STAPLES)
+            for _ in range(iterations)
+        ]
+        next_pantry = iter(pantries * 2).__next__
+
+        results = {
+            "SQL": await time_async(
+                lambda: repo.get_cookable_recipes(next_pantry(), MAX_MISSING, LIMIT),
+                SQL_ITERATIONS,
+                warmup=1,
+            ),
+        }
+
+        pantry_index.enabled = True
+        started = time.perf_counter()
+        await repo.refresh_pantry_index()
+        load_seconds = time.perf_counter() - started
+
+        next_pantry = iter(pantries * 2).__next__
+        results["index scoring"] = time_sync(
+            lambda: pantry_index.score(next_pantry(), MAX_MISSING, LIMIT),
+            iterations,
+        )
+        next_pantry = iter(pantries * 2).__next__
+        results["index scoring + recipe rows"] = await time_async(
+            lambda: repo.get_cookable_recipes(next_pantry(), MAX_MISSING, LIMIT),
+            iterations,
+        )
+    finally:
+        await db.disconnect()
+
+    print_results(
+        "POST /recipes/cookable, pantry of {0} ({1} staples), max_missing {2}, "
+        "limit {3}".format(pantry_size, STAPLES, MAX_MISSING, LIMIT),
+        results,
+    )
+    print()
+    print(
+        "pantry index {0} loaded in {1:.1f}s".format(
+            pantry_index.stats(),
+            load_seconds,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PANTRY_SIZE,
+        ),
+    )
@@ -0,0 +1,128 @@
+"""Compare the legacy two-query recipe detail read with the single-statement one.
+
+Usage: python -m benchmarks.recipe_detail [iterations] [ingredients per recipe]
+"""
+import asyncio
+import sys
+import uuid
+from typing import Optional
+
+from databases import Database
+from sqlalchemy import select  # type: ignore
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.ingredient import IngredientForRecipe, IngredientModel, IngredientOrm
+from app.models.recipe import RecipeModelWithIngredients, RecipeOrm
+from app.models.recipes_ingredients import recipes_ingredients
+from benchmarks.common import connect, print_results, time_async
+
+DEFAULT_ITERATIONS = 2000
+DEFAULT_INGREDIENTS = 20
+
+
+async def legacy_get_one_recipe(
+    db: Database,
+    id: str,
+) -> Optional[RecipeModelWithIngredients]:
+    recipes_table = RecipeOrm.table()
+    ingredients_table = IngredientOrm.table()
+
+    join = ingredients_table.join(
+        recipes_ingredients,
+        (ingredients_table.c.id == recipes_ingredients.c.ingredient_id)
+        & (recipes_ingredients.c.recipe_id == id),
+    )
+    ingredients_query = select(
+        [ingredients_table.c.id, ingredients_table.c.name],
+    ).select_from(join)
+    recipe_query = recipes_table.select().where(recipes_table.c.id == id)
+
+    ingredients = await db.fetch_all(ingredients_query)
+    recipe = await db.fetch_one(recipe_query)
+
+    if recipe is None:
+        return None
+
+    return RecipeModelWithIngredients(
+        id=recipe["id"],
+        name=recipe["name"],
+        description=recipe["description"],
+        ingredients=[IngredientForRecipe(**ingredient) for ingredient in ingredients],
+    )
+
+
+async def main(iterations: int, ingredient_count: int) -> None:
+    db = await connect()
+    ingredient_repo = IngredientRepository(db)
+    recipe_repo = RecipeRepository(db)
+
+    ingredients = [
+        await ingredient_repo.create_ingredient(
+            IngredientModel(name=str(uuid.uuid4()), description="benchmark"),
+        )
+        for _ in range(ingredient_count)
+    ]
+    recipe = await recipe_repo.create_recipe(
+        RecipeModelWithIngredients(
+            name=str(uuid.uuid4()),
+            description="benchmark",
+            ingredients=[
+                IngredientForRecipe(id=ingredient.id, name=ingredient.name)
+                for ingredient in ingredients
+            ],
+        ),
+    )
+    recipe_id = str(recipe.id)
+    missing_id = str(uuid.uuid4())
+
+    try:
+        results = {
+            "legacy (hit)": await time_async(
+                lambda: legacy_get_one_recipe(db, recipe_id),
+                iterations,
+            ),
+            "single statement (hit)": await time_async(
+                lambda: recipe_repo.get_one_recipe(recipe_id),
+                iterations,
+            ),
+            "legacy (miss)": await time_async(
+                lambda: legacy_get_one_recipe(db, missing_id),
+                iterations,
+            ),
+            "single statement (miss)": await time_async(
+                lambda: recipe_repo.get_one_recipe(missing_id),
+                iterations,
+            ),
+        }
+    finally:
+        await db.execute(
+            RecipeOrm.table().delete().where(RecipeOrm.table().c.id == recipe_id)
+        )
+        await db.execute(
+            IngredientOrm.table()
+            .delete()
+            .where(
+                IngredientOrm.table().c.id.in_(
+                    [str(ingredient.id) for ingredient in ingredients],
+                ),
+            ),
+        )
+        await db.disconnect()
+
+    print_results(
+        "GET /recipes/{{id}} read path, {0} ingredients, {1} runs".format(
+            ingredient_count,
+            iterations,
+        ),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_INGREDIENTS,
+        ),
+    )
@@ -0,0 +1,214 @@
+"""Time PATCH /recipes/{id} on a recipe with many ingredients.
+
+The loop based update issues one DELETE per removed ingredient in autocommit
+mode; the set based one applies removals and additions with one statement
+each inside a transaction. The ingredient links are restored between runs,
+outside the timings.
+
+Usage: python -m benchmarks.recipe_update [iterations] [ingredients]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from databases import Database
+
+from app.db.cache import entity_key, recipe_cache
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.ingredient import (
+    IngredientForRecipe,
+    IngredientModel,
+    IngredientOrm,
+    UpdatedIngredientForRecipe,
+)
+from app.models.recipe import (
+    RecipeModelWithIngredients,
+    RecipeOrm,
+    UpdatedRecipeModel,
+)
+from app.models.recipes_ingredients import recipes_ingredients
+from benchmarks.common import connect, print_results, summarize
+
+DEFAULT_ITERATIONS = 100
+DEFAULT_INGREDIENTS = 150
+CHANGED_SHARE = 3
+
+
+class LegacyRecipeRepository(RecipeRepository):
+    async def update_recipe(
+        self,
+        id: str,
+        updated_recipe: UpdatedRecipeModel,
+    ) -> Optional[RecipeModelWithIngredients]:
+        recipe_table = RecipeOrm.table()
+        recipe = await self.get_one_recipe(id)
+
+        if recipe is None:
+            return None
+
+        update_values = {
+            recipe_key: recipe_val
+            for recipe_key, recipe_val in updated_recipe.dict().items()
+            if recipe_val is not None
+        }
+        ingredients_to_delete = [
+            ingredient
+            for ingredient in update_values.pop("ingredients")
+            if ingredient.get("is_deleted") is True
+        ]
+        sql = (
+            recipe_table.update().where(recipe_table.c.id == id).values(**update_values)
+        )
+
+        for ingredient in ingredients_to_delete:
+            ingredient_sql = recipes_ingredients.delete().where(
+                recipes_ingredients.c.ingredient_id == ingredient.get("id"),
+            )
+            await self.db.execute(ingredient_sql)
+            recipe_cache.invalidate_tag(entity_key(ingredient.get("id")))
+
+        await self.db.execute(sql)
+        recipe_cache.invalidate(entity_key(id))
+
+        return await self.get_one_recipe(id)
+
+
+async def time_with_reset(
+    call: Callable[[], Awaitable[object]],
+    reset: Callable[[], Awaitable[object]],
+    iterations: int,
+) -> Dict[str, float]:
+    timings = []
+
+    for _ in range(iterations):
+        await reset()
+        started = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - started)
+
+    return summarize(timings)
+
+
+async def reset_links(
+    db: Database,
+    recipe_id: uuid.UUID,
+    ingredients: List[IngredientModel],
+) -> None:
+    async with db.transaction():
+        await db.execute(
+            recipes_ingredients.delete().where(
+                recipes_ingredients.c.recipe_id == recipe_id,
+            ),
+        )
+        await db.execute(
+            recipes_ingredients.insert().values(
+                [(recipe_id, ingredient.id) for ingredient in ingredients],
+            ),
+        )
+
+
+def changes(
+    removed: List[IngredientModel],
+    added: List[IngredientModel],
+) -> UpdatedRecipeModel:
+    return UpdatedRecipeModel(
+        description="Updated {0}".format(uuid.uuid4()),
+        ingredients=[
+            UpdatedIngredientForRecipe(
+                id=ingredient.id,
+                name=ingredient.name,
+                is_deleted=True,
+            )
+            for ingredient in removed
+        ]
+        + [
+            UpdatedIngredientForRecipe(id=ingredient.id, name=ingredient.name)
+            for ingredient in added
+        ],
+    )
+
+
+async def main(iterations: int, ingredient_count: int) -> None:
+    db = await connect()
+    repo = RecipeRepository(db)
+    legacy_repo = LegacyRecipeRepository(db)
+    changed = ingredient_count // CHANGED_SHARE
+    ingredients = [
+        IngredientModel(name=uuid.uuid4().hex, description="benchmark")
+        for _ in range(ingredient_count + changed)
+    ]
+    linked, spare = ingredients[:ingredient_count], ingredients[ingredient_count:]
+    recipe = RecipeModelWithIngredients(
+        name=uuid.uuid4().hex,
+        description="benchmark",
+        ingredients=[
+            IngredientForRecipe(id=ingredient.id, name=ingredient.name)
+            for ingredient in linked
+        ],
+    )
+    recipe_id = str(recipe.id)
+
+    await IngredientRepository(db).create_ingredients(ingredients)
+    await repo.create_recipe(recipe)
+
+    def reset() -> Awaitable[None]:
+        return reset_links(db, recipe.id, linked)
+
+    try:
+        results = {
+            "loop, remove {0}".format(changed): await time_with_reset(
+                lambda: legacy_repo.update_recipe(
+                    recipe_id,
+                    changes(linked[:changed], []),
+                ),
+                reset,
+                iterations,
+            ),
+            "set based, remove {0}".format(changed): await time_with_reset(
+                lambda: repo.update_recipe(recipe_id, changes(linked[:changed], [])),
+                reset,
+                iterations,
+            ),
+            "set based, remove + add {0}".format(changed): await time_with_reset(
+                lambda: repo.update_recipe(
+                    recipe_id,
+                    changes(linked[:changed], spare),
+                ),
+                reset,
+                iterations,
+            ),
+        }
+    finally:
+        await db.execute(
+            RecipeOrm.table().delete().where(RecipeOrm.table().c.id == recipe_id),
+        )
+        await db.execute(
+            IngredientOrm.table()
+            .delete()
+            .where(
+                IngredientOrm.table().c.id.in_(
+                    [str(ingredient.id) for ingredient in ingredients],
+                ),
+            ),
+        )
+        await db.disconnect()
+
+    print_results(
+        "PATCH /recipes/{{id}}, recipe with {0} ingredients, {1} runs".format(
+            ingredient_count,
+            iterations,
+        ),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_INGREDIENTS,
+        ),
+    )
@@ -0,0 +1,142 @@
+"""Compare FastAPI's response_model serialization with the fast JSON path.
+
+Serializes real pages read from a seeded database for each endpoint. The
+default path validates the returned models against the route's
+response_model, runs jsonable_encoder and encodes with the stdlib json
+module; the fast path encodes the models once with orjson.
+
+Usage: python -m benchmarks.responses [iterations] [page size]
+"""
+import asyncio
+import sys
+from typing import Any, Dict, Optional, Set
+
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.routes.api import router
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.batch import BatchItemResult, BatchResult
+from app.models.recipe import RecipePantryMatch
+from app.resources.common_constants import BATCH_STATUS_CREATED
+from app.resources.recipe_constants import EXPAND_INGREDIENTS
+from app.utils.responses import FastJSONResponse
+from benchmarks.common import connect, print_results, time_async, time_sync
+from seed import WORDS
+
+DEFAULT_ITERATIONS = 500
+DEFAULT_PAGE_SIZE = 200
+
+
+def get_route(name: str) -> APIRoute:
+    return next(route for route in router.routes if route.name == name)
+
+
+async def default_response(route: APIRoute, content: Any) -> bytes:
+    serialized = await serialize_response(
+        field=route.response_field,
+        response_content=content,
+    )
+
+    return route.response_class(serialized).body
+
+
+def fast_response(content: Any, exclude: Optional[Set[str]]) -> bytes:
+    if exclude:
+        content = content.dict(exclude=exclude)
+
+    return FastJSONResponse(content).body
+
+
+async def main(iterations: int, page_size: int) -> None:
+    db = await connect()
+    recipe_repo = RecipeRepository(db)
+    ingredient_repo = IngredientRepository(db)
+
+    try:
+        recipes = await recipe_repo.get_recipes(page_size, 0)
+        expanded = await recipe_repo.get_recipes(
+            page_size,
+            0,
+            expand_ingredients=True,
+        )
+        recipe = await recipe_repo.get_one_recipe(str(recipes[0].id))
+        ingredients = await ingredient_repo.get_ingredients(page_size, 0)
+        cases: Dict[str, Any] = {
+            "recipes:get-recipes": (recipes, None),
+            "recipes:get-recipes?expand": (expanded, None),
+            "recipes:search-recipes": (
+                await recipe_repo.search_recipes(WORDS[0], page_size),
+                None,
+            ),
+            "recipes:get-one-recipe": (recipe, None),
+            "recipes:create-recipe": (recipe, {EXPAND_INGREDIENTS}),
+            "recipes:get-cookable-recipes": (
+                [
+                    RecipePantryMatch(**item.dict(), matched=3, missing=1)
+                    for item in recipes
+                ],
+                None,
+            ),
+            "recipes:create-recipes-batch": (
+                BatchResult(
+                    created=len(recipes),
+                    conflicts=0,
+                    items=[
+                        BatchItemResult(
+                            id=item.id,
+                            name=item.name,
+                            status=BATCH_STATUS_CREATED,
+                        )
+                        for item in recipes
+                    ],
+                ),
+                None,
+            ),
+            "ingredients:get-ingredients": (ingredients, None),
+            "ingredients:search-ingredients": (
+                await ingredient_repo.search_ingredients(WORDS[0], page_size),
+                None,
+            ),
+            "ingredients:get-one-ingredient": (ingredients[0], None),
+            "ingredients:get-ingredient-recipes": (
+                await recipe_repo.get_recipes_for_ingredient(
+                    str(ingredients[0].id),
+                    page_size,
+                ),
+                None,
+            ),
+        }
+    finally:
+        await db.disconnect()
+
+    results = {}
+
+    for case, (content, exclude) in cases.items():
+        route = get_route(case.split("?")[0])
+        label = case.split(":")[1]
+        results["{0} default".format(label)] = await time_async(
+            lambda: default_response(route, content),
+            iterations,
+        )
+        results["{0} fast".format(label)] = time_sync(
+            lambda: fast_response(content, exclude),
+            iterations,
+        )
+
+    print_results(
+        "Response serialization, page size {0}, {1} runs".format(
+            page_size,
+            iterations,
+        ),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_SIZE,
+        ),
+    )
@@ -0,0 +1,75 @@
+"""Compare the name LIKE filter with ranked full-text search.
+
+Expects a seeded database, for example:
+
+    python seed.py --ingredients 50000 --recipes 1000000 --truncate
+
+Common terms come from the seeder vocabulary and match a large share of
+recipes, rare terms are the index numbers the seeder appends to names and
+match a single recipe.
+
+Usage: python -m benchmarks.search [iterations] [page size]
+"""
+import asyncio
+import itertools
+import random
+import sys
+
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.utils.filters import parse_filters
+from benchmarks.common import connect, print_results, time_async
+from seed import WORDS
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_PAGE_SIZE = 20
+
+
+async def main(iterations: int, page_size: int) -> None:
+    db = await connect()
+    repo = RecipeRepository(db)
+    recipe_count = await db.fetch_val("SELECT count(*) FROM recipes")
+    rng = random.Random(0)
+    terms = {
+        "common": itertools.cycle(rng.sample(WORDS, len(WORDS))),
+        "rare": itertools.cycle(
+            [str(rng.randrange(recipe_count)) for _ in range(iterations)],
+        ),
+    }
+    results = {}
+
+    try:
+        for kind, kind_terms in terms.items():
+            results["LIKE filter ({0})".format(kind)] = await time_async(
+                lambda: repo.get_recipes(
+                    page_size,
+                    0,
+                    filters=parse_filters(
+                        ["name LIKE '%{0}%'".format(next(kind_terms))],
+                    ),
+                ),
+                iterations,
+            )
+            results["full-text search ({0})".format(kind)] = await time_async(
+                lambda: repo.search_recipes(next(kind_terms), page_size),
+                iterations,
+            )
+    finally:
+        await db.disconnect()
+
+    print_results(
+        "Recipe search over {0} recipes, page size {1}, {2} runs".format(
+            recipe_count,
+            page_size,
+            iterations,
+        ),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_SIZE,
+        ),
+    )
@@ -9,8 +9,20 @@ from starlette.middleware.cors import CORSMiddleware
 from app.api.errors.http_error import http_error_handler
 from app.api.errors.validation_error import http422_error_handler
 from app.api.routes.api import router as api_router
-from app.core.config import API_PREFIX, DEBUG, PROJECT_NAME, VERSION
+from app.api.routes.metrics import router as metrics_router
+from app.core.config import (
+    API_PREFIX,
+    DEBUG,
+    METRICS_ENABLED,
+    PROFILING_DIRECTORY,
+    PROFILING_HEADER,
+    PROFILING_SAMPLE_RATE,
+    PROJECT_NAME,
+    VERSION,
+)
 from app.core.events import create_shutdown_handler, create_startup_handler
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
 
 
 def get_application() -> FastAPI:
@@ -25,8 +37,12 @@ def get_application() -> FastAPI:
         openapi_url=f"{API_PREFIX}/openapi.json",
     )
 
+    if METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
+        application.include_router(metrics_router)
+
     if DEBUG:
-        directory = "{current_dir}/tmp/output.pstats".format(current_dir=os.getcwd())
+        directory = os.path.join(os.getcwd(), PROFILING_DIRECTORY)
 
         application.add_middleware(
             CORSMiddleware,
@@ -36,10 +52,10 @@ def get_application() -> FastAPI:
         )
 
         application.add_middleware(
-            enable=True,
-            server_app=application,
-            filename=directory,
-            strip_dirs=False,
+            ProfilingMiddleware,
+            directory=directory,
+            sample_rate=PROFILING_SAMPLE_RATE,
+            header=PROFILING_HEADER,
             sort_by="cumulative",
         )
 
@@ -1,60 +1,352 @@
 # flake8: noqa
 # type: ignore
 
+"""Seed the database with a deterministic, realistically skewed dataset.
+
+Rows are generated in fixed-size chunks, each chunk from its own seeded RNG, so
+the same arguments always produce the same data no matter how many workers
+run. Chunks are built in worker processes and loaded with COPY over a pool of
+connections. Ingredient popularity follows a Zipf distribution.
+
+Usage: python seed.py --ingredients 50000 --recipes 1000000 --workers 8
+"""
+
+import argparse
 import asyncio
+import bisect
+import itertools
 import os
 import random
 import sys
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Tuple
 
-import sqlalchemy
-from databases import Database
+import asyncpg
 from dotenv import load_dotenv
 
-from app.db.repositories.ingredient_repository import IngredientRepository
-from app.db.repositories.recipe_repository import RecipeRepository
-from app.models.ingredient import IngredientModel
-from app.models.recipe import RecipeModelWithIngredients
-
 sys.path = ["", ".."] + sys.path[1:]
 
+from app.resources.ingredient_constants import INGREDIENT_DESCRIPTION_MAX
+from app.resources.recipe_constants import RECIPE_DESCRIPTION_MAX
 
-async def main() -> None:
+INGREDIENT_COLUMNS = ("id", "name", "description", "created_at", "updated_at")
+RECIPE_COLUMNS = ("id", "name", "description", "created_at", "updated_at")
+RECIPE_INGREDIENT_COLUMNS = ("recipe_id", "ingredient_id")
+
+WORDS = (
+    "smoked roasted fresh dried spicy sweet sour crispy braised grilled pickled "
+    "tomato garlic onion basil thyme lemon ginger pepper chili cumin butter "
+    "cream cheese rice noodle bean lentil potato carrot mushroom spinach chicken "
+    "beef pork salmon tofu egg flour sugar honey vinegar olive sesame coconut"
+).split()
+DATE_SPAN_DAYS = 365
+UPDATED_FRACTION = 0.3
+EPOCH = datetime(2021, 1, 1)
+ID_NAMESPACE = uuid.UUID("6f1c1d2e-8f5e-4f7a-9a51-2d3c0b7e4a10")
+
+_ingredient_cache = {}
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got {0}".format(value))
+
+    return number
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=positive_int, default=10_000)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--min-ingredients", type=int, default=3)
+    parser.add_argument("--max-ingredients", type=int, default=15)
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=1.1,
+        help="Zipf exponent of ingredient popularity, 0 for uniform",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=positive_int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=positive_int, default=20_000)
+    parser.add_argument(
+        "--keep-foreign-keys",
+        action="store_true",
+        help="Check join row foreign keys per row instead of once after loading",
+    )
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="Empty the tables before seeding",
+    )
+
+    return parser.parse_args()
+
+
+def get_database_url() -> str:
     load_dotenv()
 
-    metadata = sqlalchemy.MetaData()
-    db_url = "postgres://{user}:{password}@{host}:{port}/{name}".format(
-        user=os.environ.get("DB_USER"),
-        password=os.environ.get("DB_PASSWORD"),
-        host=os.environ.get("DB_HOST"),
-        port=os.environ.get("DB_PORT"),
-        name=os.environ.get("DB_NAME"),
+    from app.core.config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+
+    return "postgresql://{user}:{password}@{host}:{port}/{name}".format(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        name=DB_NAME,
     )
-    database = Database(db_url)
-    engine = sqlalchemy.create_engine(db_url)
-    metadata.create_all(engine)
-    ingredient_list = []
 
-    await database.connect()
 
-    recipe_repo = RecipeRepository(database)
-    ingredient_repo = IngredientRepository(database)
+def chunk_rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random("{0}:{1}:{2}".format(seed, table, chunk))
 
-    print("Seeding database...")
 
-    for _ in range(0, 1000):
-        ingredient = IngredientModel(name=str(uuid.uuid4()), description=fake.text())
-        ingredient_list.append(ingredient)
-        await ingredient_repo.create_ingredient(ingredient)
+def seeded_uuid(seed: int, table: str, index: int) -> uuid.UUID:
+    return uuid.uuid5(ID_NAMESPACE, "{0}:{1}:{2}".format(seed, table, index))
 
-    for _ in range(0, 1000):
-        ingredients = random.sample(ingredient_list, 5)
-        recipe = RecipeModelWithIngredients(
-            name=str(uuid.uuid4()), description=fake.text(), ingredients=ingredients
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def timestamps(rng: random.Random) -> Tuple[datetime, datetime]:
+    created_at = EPOCH + timedelta(seconds=rng.randrange(DATE_SPAN_DAYS * 86400))
+    updated_at = None
+
+    if rng.random() < UPDATED_FRACTION:
+        updated_at = created_at + timedelta(seconds=rng.randrange(30 * 86400))
+
+    return created_at, updated_at
+
+
+def ingredient_ids(seed: int, count: int) -> List[uuid.UUID]:
+    return [seeded_uuid(seed, "ingredients", index) for index in range(count)]
+
+
+def build_ingredient_chunk(
+    seed: int, chunk: int, start: int, stop: int
+) -> Tuple[List[tuple]]:
+    rng = chunk_rng(seed, "ingredients", chunk)
+    rows = []
+
+    for index in range(start, stop):
+        created_at, updated_at = timestamps(rng)
+        rows.append(
+            (
+                seeded_uuid(seed, "ingredients", index),
+                "{0} {1}".format(text(rng, 2), index),
+                text(rng, rng.randint(8, 40))[:INGREDIENT_DESCRIPTION_MAX],
+                created_at,
+                updated_at,
+            )
         )
-        await recipe_repo.create_recipe(recipe)
 
-    print("Database seeded")
+    return (rows,)
+
+
+def popularity(seed: int, count: int, exponent: float) -> List[float]:
+    # Cumulative Zipf weights over a seeded shuffle of the ingredients, so the
+    # most popular ingredients are not simply the first ones inserted.
+    weights = [1 / (rank**exponent) for rank in range(1, count + 1)]
+    random.Random("{0}:popularity".format(seed)).shuffle(weights)
+
+    return list(itertools.accumulate(weights))
+
+
+def ingredient_popularity(
+    seed: int, count: int, exponent: float
+) -> Tuple[List[uuid.UUID], List[float]]:
+    # Computed once per worker process instead of being pickled into every
+    # chunk, both lists are derived from the seed alone.
+    key = (seed, count, exponent)
+
+    if key not in _ingredient_cache:
+        _ingredient_cache[key] = (
+            ingredient_ids(seed, count),
+            popularity(seed, count, exponent),
+        )
+
+    return _ingredient_cache[key]
+
+
+def build_recipe_chunk(
+    seed: int,
+    chunk: int,
+    start: int,
+    stop: int,
+    ingredient_count: int,
+    exponent: float,
+    min_ingredients: int,
+    max_ingredients: int,
+) -> Tuple[List[tuple], List[tuple]]:
+    rng = chunk_rng(seed, "recipes", chunk)
+    ingredients, cumulative_weights = ingredient_popularity(
+        seed, ingredient_count, exponent
+    )
+    total_weight = cumulative_weights[-1]
+    upper = min(max_ingredients, len(ingredients))
+    recipes, links = [], []
+
+    for index in range(start, stop):
+        recipe_id = seeded_uuid(seed, "recipes", index)
+        created_at, updated_at = timestamps(rng)
+        recipes.append(
+            (
+                recipe_id,
+                "{0} {1}".format(text(rng, 3), index),
+                text(rng, rng.randint(20, 80))[:RECIPE_DESCRIPTION_MAX],
+                created_at,
+                updated_at,
+            )
+        )
+
+        wanted = rng.randint(min(min_ingredients, upper), upper)
+        chosen = set()
+
+        while len(chosen) < wanted:
+            position = bisect.bisect(cumulative_weights, rng.random() * total_weight)
+            chosen.add(min(position, len(ingredients) - 1))
+
+        links.extend((recipe_id, ingredients[position]) for position in chosen)
+
+    return recipes, links
+
+
+def chunks(total: int, size: int) -> List[Tuple[int, int, int]]:
+    return [
+        (chunk, start, min(start + size, total))
+        for chunk, start in enumerate(range(0, total, size))
+    ]
+
+
+async def copy(
+    pool: asyncpg.Pool, table: str, columns: tuple, rows: List[tuple]
+) -> None:
+    async with pool.acquire() as connection:
+        await connection.copy_records_to_table(table, records=rows, columns=columns)
+
+
+async def drop_foreign_keys(pool: asyncpg.Pool, table: str) -> List[Tuple[str, str]]:
+    constraints = await pool.fetch(
+        """
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = $1::regclass AND contype = 'f'
+        """,
+        table,
+    )
+
+    for constraint in constraints:
+        await pool.execute(
+            "ALTER TABLE {0} DROP CONSTRAINT {1}".format(table, constraint["conname"])
+        )
+
+    return [(row["conname"], row["definition"]) for row in constraints]
+
+
+async def restore_foreign_keys(
+    pool: asyncpg.Pool, table: str, constraints: List[Tuple[str, str]]
+) -> None:
+    # One validating pass per constraint is far cheaper than a trigger
+    # lookup for every copied join row.
+    for name, definition in constraints:
+        await pool.execute(
+            "ALTER TABLE {0} ADD CONSTRAINT {1} {2}".format(table, name, definition)
+        )
+
+
+async def main() -> None:
+    args = parse_args()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+
+    pool = await asyncpg.create_pool(
+        get_database_url(),
+        min_size=args.workers,
+        max_size=args.workers,
+        # Seeding is reproducible, losing the tail of it on a crash is fine.
+        init=lambda connection: connection.execute("SET synchronous_commit = off"),
+    )
+    semaphore = asyncio.Semaphore(args.workers * 2)
+
+    async def load(executor, builder, table_copies, *builder_args) -> None:
+        async with semaphore:
+            built = await loop.run_in_executor(executor, builder, *builder_args)
+
+            # Tables are copied in order, recipes before their join rows.
+            for (table, columns), rows in zip(table_copies, built):
+                await copy(pool, table, columns, rows)
+
+    if args.truncate:
+        await pool.execute("TRUNCATE recipes_ingredients, recipes, ingredients")
+
+    foreign_keys = []
+
+    if not args.keep_foreign_keys:
+        foreign_keys = await drop_foreign_keys(pool, "recipes_ingredients")
+
+    print(
+        "Seeding {0} ingredients and {1} recipes with seed {2}...".format(
+            args.ingredients, args.recipes, args.seed
+        )
+    )
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            await asyncio.gather(
+                *[
+                    load(
+                        executor,
+                        build_ingredient_chunk,
+                        [("ingredients", INGREDIENT_COLUMNS)],
+                        args.seed,
+                        chunk,
+                        start,
+                        stop,
+                    )
+                    for chunk, start, stop in chunks(args.ingredients, args.chunk_size)
+                ]
+            )
+            ingredients_done = time.perf_counter()
+            print("Ingredients loaded in {0:.1f}s".format(ingredients_done - started))
+
+            await asyncio.gather(
+                *[
+                    load(
+                        executor,
+                        build_recipe_chunk,
+                        [
+                            ("recipes", RECIPE_COLUMNS),
+                            ("recipes_ingredients", RECIPE_INGREDIENT_COLUMNS),
+                        ],
+                        args.seed,
+                        chunk,
+                        start,
+                        stop,
+                        args.ingredients,
+                        args.zipf,
+                        args.min_ingredients,
+                        args.max_ingredients,
+                    )
+                    for chunk, start, stop in chunks(args.recipes, args.chunk_size)
+                ]
+            )
+
+        print(
+            "Recipes loaded in {0:.1f}s".format(time.perf_counter() - ingredients_done)
+        )
+    finally:
+        await restore_foreign_keys(pool, "recipes_ingredients", foreign_keys)
+
+    await pool.execute("ANALYZE ingredients, recipes, recipes_ingredients")
+    await pool.close()
+
+    print("Database seeded in {0:.1f}s".format(time.perf_counter() - started))
 
 
 if __name__ == "__main__":
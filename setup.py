@@ -28,7 +28,7 @@ setup(
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.8",
     ],
-    packages=find_packages(exclude=["tests.*"]),
+    packages=find_packages(exclude=["tests.*", "benchmarks", "benchmarks.*"]),
     python_requires=">=3.8",
     install_requires=[
         "python-dotenv",
@@ -105,3 +105,41 @@ def db(initialized_app: FastAPI) -> Database:
 @pytest.fixture
 def random_generator() -> Random:
     return Random()
+
+
+@pytest.fixture(autouse=True)
+def cleared_count_cache() -> None:
+    from app.db.cache import count_cache
+
+    # Every test migrates a fresh database, counts must not carry over.
+    count_cache.clear()
+
+
+@pytest.fixture
+def enabled_cache() -> None:
+    from app.db.cache import ingredient_cache, recipe_cache
+
+    caches = (ingredient_cache, recipe_cache)
+
+    for cache in caches:
+        cache.clear()
+        cache.enabled = True
+
+    yield
+
+    for cache in caches:
+        cache.enabled = False
+        cache.clear()
+
+
+@pytest.fixture
+def enabled_pantry_index() -> None:
+    from app.db.pantry_index import pantry_index
+
+    pantry_index.clear()
+    pantry_index.enabled = True
+
+    yield
+
+    pantry_index.enabled = False
+    pantry_index.clear()
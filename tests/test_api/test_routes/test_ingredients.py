@@ -1,5 +1,11 @@
+import base64
+import csv
+import json
+import random
+import string
 import uuid
-from typing import List
+from datetime import timedelta, timezone
+from typing import Any, List
 
 import pytest
 from fastapi import FastAPI
@@ -7,7 +13,13 @@ from httpx import AsyncClient
 from mimesis.random import Random
 from starlette import status
 
-from app.models.ingredient import IngredientModel, UpdatedIngredientModel
+from app.models.ingredient import (
+    IngredientModel,
+    IngredientSearchResult,
+    UpdatedIngredientModel,
+)
+from app.models.recipe import RecipeModel
+from app.utils import export, responses
 from tests.common.constants import INGREDIENT_DESCRIPTION_LENGTH, INGREDIENT_NAME_LENGTH
 
 pytestmark = pytest.mark.asyncio
@@ -15,8 +27,13 @@ pytestmark = pytest.mark.asyncio
 GET_INGREDIENTS_ROUTE = "ingredients:get-ingredients"
 GET_ONE_INGREDIENTS_ROUTE = "ingredients:get-one-ingredient"
 POST_INGREDIENTS_ROUTE = "ingredients:create-ingredient"
+POST_INGREDIENTS_BATCH_ROUTE = "ingredients:create-ingredients-batch"
 UPDATE_INGREDIENTS_ROUTE = "ingredients:update-ingredient"
 DELETE_INGREDIENTS_ROUTE = "ingredients:delete-ingredient"
+SEARCH_INGREDIENTS_ROUTE = "ingredients:search-ingredients"
+GET_INGREDIENT_RECIPES_ROUTE = "ingredients:get-ingredient-recipes"
+EXPORT_INGREDIENTS_ROUTE = "ingredients:export-ingredients"
+POST_RECIPES_BATCH_ROUTE = "recipes:create-recipes-batch"
 
 
 async def test_create_ingredient(
@@ -45,6 +62,80 @@ async def test_create_ingredient(
     assert ingredient.description == new_ingredient.description
 
 
+def ingredient_payload(ingredient: IngredientModel) -> dict:
+    return {
+        "id": str(ingredient.id),
+        "name": ingredient.name,
+        "description": ingredient.description,
+    }
+
+
+async def test_create_ingredients_batch(
+    app: FastAPI, client: AsyncClient, random_generator: Random
+) -> None:
+    new_ingredients = [
+        IngredientModel(
+            name=random_generator.randstr(length=INGREDIENT_NAME_LENGTH),
+            description=random_generator.randstr(length=INGREDIENT_DESCRIPTION_LENGTH),
+        )
+        for _ in range(0, 1200)
+    ]
+
+    response = await client.post(
+        app.url_path_for(POST_INGREDIENTS_BATCH_ROUTE),
+        json=[ingredient_payload(ingredient) for ingredient in new_ingredients],
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+    result = response.json()
+
+    assert result["created"] == len(new_ingredients)
+    assert result["conflicts"] == 0
+    assert [item["id"] for item in result["items"]] == [
+        str(ingredient.id) for ingredient in new_ingredients
+    ]
+
+
+async def test_create_ingredients_batch_with_conflicts(
+    app: FastAPI,
+    client: AsyncClient,
+    random_generator: Random,
+    test_ingredient: IngredientModel,
+) -> None:
+    new_ingredient = IngredientModel(
+        name=random_generator.randstr(length=INGREDIENT_NAME_LENGTH),
+        description=random_generator.randstr(length=INGREDIENT_DESCRIPTION_LENGTH),
+    )
+    existing_name = IngredientModel(
+        name=test_ingredient.name, description=test_ingredient.description
+    )
+    duplicate = IngredientModel(
+        name=new_ingredient.name, description=new_ingredient.description
+    )
+
+    response = await client.post(
+        app.url_path_for(POST_INGREDIENTS_BATCH_ROUTE),
+        json=[
+            ingredient_payload(ingredient)
+            for ingredient in (new_ingredient, existing_name, duplicate)
+        ],
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+    result = response.json()
+
+    assert result["created"] == 1
+    assert result["conflicts"] == 2
+    assert [item["status"] for item in result["items"]] == [
+        "created",
+        "conflict",
+        "conflict",
+    ]
+    assert result["items"][1]["detail"] == "Ingredient name already exists"
+
+
 async def test_get_ingredient(app: FastAPI, client: AsyncClient) -> None:
     response = await client.get(app.url_path_for(GET_INGREDIENTS_ROUTE))
 
@@ -110,6 +201,70 @@ async def test_get_unprocessable_filtered_ingredients(
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+async def test_get_filtered_ingredients_binds_values(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"filters": "name LIKE '%' OR '1'='1%'"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+
+async def test_get_ingredients_filtered_by_date(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    created_at = sorted(
+        ingredient.created_at for ingredient in test_multiple_ingredients
+    )
+    middle = created_at[len(created_at) // 2]
+
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"filters": "created_at >= '{0}'".format(middle.isoformat())},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    ingredients = [IngredientModel(**ingredient) for ingredient in response.json()]
+
+    assert ingredients
+    assert all(ingredient.created_at >= middle for ingredient in ingredients)
+
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"filters": "created_at >= 'yesterday'"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_get_ingredients_filtered_by_offset_date(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    created_at = sorted(
+        ingredient.created_at for ingredient in test_multiple_ingredients
+    )
+    middle = created_at[len(created_at) // 2]
+    offset_middle = middle.replace(tzinfo=timezone.utc).astimezone(
+        timezone(timedelta(hours=2))
+    )
+
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"filters": "created_at >= '{0}'".format(offset_middle.isoformat())},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    ingredients = [IngredientModel(**ingredient) for ingredient in response.json()]
+
+    assert ingredients
+    assert all(ingredient.created_at >= middle for ingredient in ingredients)
+
+
 async def test_get_filtered_and_sorted_ingredients(
     app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
 ) -> None:
@@ -130,6 +285,189 @@ async def test_get_filtered_and_sorted_ingredients(
     )
 
 
+async def test_get_ingredients_with_cursor(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    params = {"sort": "name:asc", "limit": 100}
+
+    first_response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE), params=params
+    )
+
+    assert first_response.status_code == status.HTTP_200_OK
+
+    next_cursor = first_response.headers["X-Next-Cursor"]
+
+    second_response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE), params={**params, "cursor": next_cursor}
+    )
+
+    assert second_response.status_code == status.HTTP_200_OK
+
+    first_page = [IngredientModel(**ingredient) for ingredient in first_response.json()]
+    second_page = [
+        IngredientModel(**ingredient) for ingredient in second_response.json()
+    ]
+    ingredients = first_page + second_page
+
+    assert len(second_page) == 100
+    assert ingredients == sorted(ingredients, key=lambda ingredient: ingredient.name)
+    assert len({ingredient.id for ingredient in ingredients}) == 200
+
+
+async def test_get_ingredients_with_cursor_and_total_count(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    route = app.url_path_for(GET_INGREDIENTS_ROUTE)
+    params = {"sort": "name:asc", "limit": 100, "count": "exact"}
+
+    response = await client.get(route, params=params)
+    response = await client.get(
+        route,
+        params={**params, "cursor": response.headers["X-Next-Cursor"]},
+    )
+
+    assert response.headers["X-Total-Count"] == "500"
+
+    links = response.headers["Link"]
+
+    assert 'rel="first"' in links
+    assert "cursor={0}".format(response.headers["X-Next-Cursor"]) in links
+    assert 'rel="last"' not in links
+
+    await client.post(
+        app.url_path_for(POST_INGREDIENTS_ROUTE),
+        json={"name": "Counted", "description": "Invalidates the cached count"},
+    )
+    response = await client.get(route, params=params)
+
+    assert response.headers["X-Total-Count"] == "501"
+
+
+async def test_get_ingredients_with_invalid_cursor(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE), params={"cursor": "not-a-cursor"}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def forged_cursor(values: Any) -> str:
+    payload = json.dumps(values).encode()
+
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "sort, value",
+    [
+        ("created_at:asc", "not-a-date"),
+        ("created_at:asc", 5),
+        ("name:asc", 5),
+    ],
+)
+async def test_get_ingredients_with_forged_cursor_value(
+    app: FastAPI, client: AsyncClient, sort: str, value: Any
+) -> None:
+    cursor = forged_cursor({sort.split(":")[0]: value, "id": str(uuid.uuid4())})
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"sort": sort, "cursor": cursor},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_get_ingredients_with_offset_cursor_timestamp(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    cursor = forged_cursor(
+        {"created_at": "2021-01-01T02:00:00+02:00", "id": str(uuid.uuid4())}
+    )
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"sort": "created_at:asc", "cursor": cursor},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def test_export_ingredients(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_ingredients: List[IngredientModel],
+    monkeypatch: Any,
+) -> None:
+    # Small chunks so the stream spans several of them.
+    monkeypatch.setattr(export, "EXPORT_CHUNK_ROWS", 7)
+
+    response = await client.get(app.url_path_for(EXPORT_INGREDIENTS_ROUTE))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    ingredients = {
+        ingredient.id: ingredient
+        for ingredient in (
+            IngredientModel(**json.loads(line)) for line in response.text.splitlines()
+        )
+    }
+
+    assert all(
+        ingredients[ingredient.id] == ingredient
+        for ingredient in test_multiple_ingredients
+    )
+
+
+async def test_export_ingredients_as_csv(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_ingredients: List[IngredientModel],
+) -> None:
+    response = await client.get(
+        app.url_path_for(EXPORT_INGREDIENTS_ROUTE),
+        params={"format": "csv"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    reader = csv.DictReader(response.text.splitlines())
+    ingredients = {row["id"]: row for row in reader}
+
+    assert reader.fieldnames == list(IngredientModel.__fields__)
+    assert all(
+        ingredients[str(ingredient.id)]["name"] == ingredient.name
+        for ingredient in test_multiple_ingredients
+    )
+
+
+async def test_search_ingredients(app: FastAPI, client: AsyncClient) -> None:
+    term = "".join(random.choices(string.ascii_lowercase, k=12))
+    ingredient = IngredientModel(
+        name="Smoked {0}".format(term),
+        description="Cured and smoked",
+    )
+
+    await client.post(
+        app.url_path_for(POST_INGREDIENTS_ROUTE),
+        json=ingredient_payload(ingredient),
+    )
+    response = await client.get(
+        app.url_path_for(SEARCH_INGREDIENTS_ROUTE),
+        params={"q": "{0} -unsmoked".format(term)},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    ingredients = [IngredientSearchResult(**found) for found in response.json()]
+
+    assert [found.id for found in ingredients] == [ingredient.id]
+    assert "X-Next-Cursor" not in response.headers
+
+
 async def test_get_one_ingredient(
     app: FastAPI, client: AsyncClient, test_ingredient: IngredientModel
 ) -> None:
@@ -146,6 +484,121 @@ async def test_get_one_ingredient(
     assert ingredient.description == test_ingredient.description
 
 
+async def test_get_one_ingredient_with_fast_json_responses(
+    app: FastAPI,
+    client: AsyncClient,
+    test_ingredient: IngredientModel,
+    monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(responses, "FAST_JSON_RESPONSES", True)
+
+    response = await client.get(
+        app.url_path_for(GET_ONE_INGREDIENTS_ROUTE, id=test_ingredient.id)
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "ETag" in response.headers
+    assert IngredientModel(**response.json()) == test_ingredient
+
+
+async def test_get_one_not_modified_ingredient(
+    app: FastAPI, client: AsyncClient, test_ingredient: IngredientModel
+) -> None:
+    route = app.url_path_for(GET_ONE_INGREDIENTS_ROUTE, id=test_ingredient.id)
+
+    response = await client.get(route)
+    etag = response.headers["ETag"]
+
+    response = await client.get(route, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    await client.patch(
+        app.url_path_for(UPDATE_INGREDIENTS_ROUTE, id=test_ingredient.id),
+        json={"description": "Something else"},
+    )
+    response = await client.get(route, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+async def test_get_not_modified_ingredients(
+    app: FastAPI, client: AsyncClient, test_multiple_ingredients: List[IngredientModel]
+) -> None:
+    params = {"limit": 10}
+
+    response = await client.get(app.url_path_for(GET_INGREDIENTS_ROUTE), params=params)
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params=params,
+        headers={"If-None-Match": "W/{0}".format(etag)},
+    )
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["X-Next-Cursor"]
+
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENTS_ROUTE),
+        params={"limit": 5},
+        headers={"If-None-Match": etag},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def test_get_ingredient_recipes(
+    app: FastAPI, client: AsyncClient, test_ingredient: IngredientModel
+) -> None:
+    ingredients = [{"id": str(test_ingredient.id), "name": test_ingredient.name}]
+    recipes = [
+        {
+            "name": str(uuid.uuid4()),
+            "description": "Uses it",
+            "ingredients": ingredients,
+        }
+        for _ in range(3)
+    ]
+    recipes.append(
+        {"name": str(uuid.uuid4()), "description": "Does not", "ingredients": []},
+    )
+
+    await client.post(app.url_path_for(POST_RECIPES_BATCH_ROUTE), json=recipes)
+
+    route = app.url_path_for(GET_INGREDIENT_RECIPES_ROUTE, id=test_ingredient.id)
+    first_response = await client.get(route, params={"limit": 2})
+    second_response = await client.get(
+        route,
+        params={"limit": 2, "cursor": first_response.headers["X-Next-Cursor"]},
+    )
+
+    assert second_response.status_code == status.HTTP_200_OK
+    assert "X-Next-Cursor" not in second_response.headers
+
+    found = [
+        RecipeModel(**recipe)
+        for recipe in first_response.json() + second_response.json()
+    ]
+
+    assert sorted(recipe.name for recipe in found) == sorted(
+        recipe["name"] for recipe in recipes[:3]
+    )
+
+
+async def test_get_not_found_ingredient_recipes(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_INGREDIENT_RECIPES_ROUTE, id=str(uuid.uuid4())),
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 async def test_get_one_not_found_ingredient(app: FastAPI, client: AsyncClient) -> None:
     ingredient_id = str(uuid.uuid4())
 
@@ -0,0 +1,104 @@
+import uuid
+from typing import Dict, FrozenSet, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client.parser import text_string_to_metric_families
+from starlette import status
+
+from app.core.config import API_PREFIX
+from app.models.ingredient import IngredientModel
+from app.resources.metrics_constants import UNMATCHED_ROUTE
+
+pytestmark = pytest.mark.asyncio
+
+GET_METRICS_ROUTE = "metrics:get-metrics"
+GET_ONE_INGREDIENTS_ROUTE = "ingredients:get-one-ingredient"
+GET_ONE_RECIPE_ROUTE = "recipes:get-one-recipe"
+
+
+Series = Tuple[str, FrozenSet[Tuple[str, str]]]
+
+
+def series(name: str, **labels: str) -> Series:
+    return name, frozenset(labels.items())
+
+
+async def scrape(app: FastAPI, client: AsyncClient) -> Dict[Series, float]:
+    response = await client.get(app.url_path_for(GET_METRICS_ROUTE))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == CONTENT_TYPE_LATEST
+
+    return {
+        series(sample.name, **sample.labels): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+async def test_get_metrics(
+    app: FastAPI, client: AsyncClient, test_ingredient: IngredientModel
+) -> None:
+    ingredient_route = "{0}/ingredients/{{id}}".format(API_PREFIX)
+    recipe_route = "{0}/recipes/{{id}}".format(API_PREFIX)
+    ok_series = series(
+        "http_requests_total",
+        method="GET",
+        route=ingredient_route,
+        status="200",
+    )
+    not_found_series = series(
+        "http_requests_total",
+        method="GET",
+        route=recipe_route,
+        status="404",
+    )
+    duration_series = series(
+        "http_request_duration_seconds_count",
+        method="GET",
+        route=ingredient_route,
+    )
+    repository_series = series(
+        "repository_call_duration_seconds_count",
+        repository="IngredientRepository",
+        method="get_one_ingredient",
+    )
+    statements_series = series("db_statements_total")
+    before = await scrape(app, client)
+
+    for _ in range(3):
+        await client.get(
+            app.url_path_for(GET_ONE_INGREDIENTS_ROUTE, id=test_ingredient.id),
+        )
+
+    await client.get(app.url_path_for(GET_ONE_RECIPE_ROUTE, id=str(uuid.uuid4())))
+    after = await scrape(app, client)
+
+    assert after[ok_series] - before.get(ok_series, 0) == 3
+    assert after[not_found_series] - before.get(not_found_series, 0) == 1
+    assert after[duration_series] - before.get(duration_series, 0) == 3
+    assert after[repository_series] - before.get(repository_series, 0) == 3
+    assert after[series("http_requests_in_flight")] == 1
+    assert after[series("db_pool_acquires_total")] > 0
+    assert after[statements_series] - before[statements_series] >= 4
+    assert series("cache_entries", cache="recipe") in after
+    assert series("pantry_index_ready") in after
+
+
+async def test_get_metrics_unmatched_route(app: FastAPI, client: AsyncClient) -> None:
+    unmatched_series = series(
+        "http_requests_total",
+        method="GET",
+        route=UNMATCHED_ROUTE,
+        status="404",
+    )
+    before = await scrape(app, client)
+
+    await client.get("{0}/{1}".format(API_PREFIX, uuid.uuid4()))
+
+    after = await scrape(app, client)
+
+    assert after[unmatched_series] - before.get(unmatched_series, 0) == 1
@@ -0,0 +1,77 @@
+import pstats
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from app.core.profiling import ProfilingMiddleware
+from app.models.ingredient import IngredientModel
+
+pytestmark = pytest.mark.asyncio
+
+GET_ONE_INGREDIENTS_ROUTE = "ingredients:get-one-ingredient"
+PROFILE_HEADER = "X-Profile"
+PROFILE_NAME = "GET_api_v1_ingredients_id"
+
+
+async def test_profile_requests_with_header(
+    initialized_app: FastAPI,
+    test_ingredient: IngredientModel,
+    tmp_path: Path,
+) -> None:
+    profiled_app = ProfilingMiddleware(
+        initialized_app,
+        directory=str(tmp_path),
+        header=PROFILE_HEADER,
+    )
+    path = initialized_app.url_path_for(
+        GET_ONE_INGREDIENTS_ROUTE,
+        id=test_ingredient.id,
+    )
+
+    async with AsyncClient(app=profiled_app, base_url="http://testserver") as client:
+        response = await client.get(path)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(tmp_path.iterdir()) == []
+
+        for _ in range(2):
+            response = await client.get(path, headers={PROFILE_HEADER: "1"})
+
+            assert response.status_code == status.HTTP_200_OK
+
+    stats = pstats.Stats(str(tmp_path / "{0}.pstats".format(PROFILE_NAME)))
+
+    assert stats.total_calls > 0
+    assert any(
+        function == "get_one_ingredient" for _, _, function in stats.stats.keys()
+    )
+    assert "cumulative" in (tmp_path / "{0}.txt".format(PROFILE_NAME)).read_text()
+
+
+async def test_profile_sampled_requests(
+    initialized_app: FastAPI,
+    test_ingredient: IngredientModel,
+    tmp_path: Path,
+) -> None:
+    profiled_app = ProfilingMiddleware(
+        initialized_app,
+        directory=str(tmp_path),
+        sample_rate=1.0,
+    )
+
+    async with AsyncClient(app=profiled_app, base_url="http://testserver") as client:
+        await client.get(
+            initialized_app.url_path_for(
+                GET_ONE_INGREDIENTS_ROUTE,
+                id=test_ingredient.id,
+            ),
+        )
+        await client.get("/unknown")
+
+    assert sorted(path.name for path in tmp_path.glob("*.pstats")) == [
+        "{0}.pstats".format(PROFILE_NAME),
+        "GET_unmatched.pstats",
+    ]
@@ -1,19 +1,29 @@
+import csv
+import json
 import random
+import string
 import uuid
-from typing import List
+from typing import Any, Dict, List
 
 import pytest
+from databases import Database
 from fastapi import FastAPI
-from httpx import AsyncClient
+from httpx import URL, AsyncClient
 from mimesis.random import Random
 from starlette import status
 
+from app.db.cache import recipe_cache
+from app.db.repositories.recipe_repository import RecipeRepository
 from app.models.ingredient import IngredientModel
 from app.models.recipe import (
     RecipeModel,
     RecipeModelWithIngredients,
+    RecipePantryMatch,
+    RecipeSearchResult,
     UpdatedRecipeModel,
 )
+from app.resources.common_constants import BATCH_DUPLICATE_ITEM
+from app.utils import responses
 from tests.common.constants import RECIPE_DESCRIPTION_LENGTH, RECIPE_NAME_LENGTH
 
 pytestmark = pytest.mark.asyncio
@@ -22,8 +32,13 @@ pytestmark = pytest.mark.asyncio
 GET_RECIPES_ROUTE = "recipes:get-recipes"
 GET_ONE_RECIPES_ROUTE = "recipes:get-one-recipe"
 POST_RECIPES_ROUTE = "recipes:create-recipe"
+POST_RECIPES_BATCH_ROUTE = "recipes:create-recipes-batch"
 UPDATE_RECIPES_ROUTE = "recipes:update-recipe"
+SEARCH_RECIPES_ROUTE = "recipes:search-recipes"
+GET_COOKABLE_RECIPES_ROUTE = "recipes:get-cookable-recipes"
+EXPORT_RECIPES_ROUTE = "recipes:export-recipes"
 DELETE_RECIPES_ROUTE = "recipes:delete-recipe"
+UPDATE_INGREDIENTS_ROUTE = "ingredients:update-ingredient"
 
 
 async def test_create_recipe(
@@ -65,6 +80,94 @@ async def test_create_recipe(
     assert recipe.description == new_recipe.description
 
 
+async def test_create_recipe_with_fast_json_responses(
+    app: FastAPI,
+    client: AsyncClient,
+    random_generator: Random,
+    test_ingredient: IngredientModel,
+    monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(responses, "FAST_JSON_RESPONSES", True)
+
+    response = await client.post(
+        app.url_path_for(POST_RECIPES_ROUTE),
+        json={
+            "name": random_generator.randstr(length=RECIPE_NAME_LENGTH),
+            "description": random_generator.randstr(length=RECIPE_DESCRIPTION_LENGTH),
+            "ingredients": [
+                {"id": str(test_ingredient.id), "name": test_ingredient.name},
+            ],
+        },
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert list(response.json()) == list(RecipeModel.__fields__)
+
+
+async def test_create_recipes_batch(
+    app: FastAPI,
+    client: AsyncClient,
+    random_generator: Random,
+    test_multiple_ingredients: List[IngredientModel],
+) -> None:
+    recipes = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": random_generator.randstr(length=RECIPE_NAME_LENGTH),
+            "description": random_generator.randstr(length=RECIPE_DESCRIPTION_LENGTH),
+            "ingredients": [
+                {"id": str(ingredient.id), "name": ingredient.name}
+                for ingredient in random.sample(test_multiple_ingredients, 5)
+            ],
+        }
+        for _ in range(0, 3)
+    ]
+    missing_ingredients = [{"id": str(uuid.uuid4()), "name": "Missing"}]
+    recipes.append({**recipes[0], "name": "Duplicated"})
+    recipes.append(
+        {
+            **recipes[1],
+            "id": str(uuid.uuid4()),
+            "name": random_generator.randstr(length=RECIPE_NAME_LENGTH),
+            "ingredients": missing_ingredients,
+        }
+    )
+    recipes.append({**recipes[2], "id": str(uuid.uuid4())})
+    recipes.append(
+        {**recipes[1], "id": str(uuid.uuid4()), "ingredients": missing_ingredients}
+    )
+
+    response = await client.post(
+        app.url_path_for(POST_RECIPES_BATCH_ROUTE), json=recipes
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+    result = response.json()
+
+    assert result["created"] == 3
+    assert result["conflicts"] == 3
+    assert result["invalid"] == 1
+    assert [item["status"] for item in result["items"]] == [
+        "created",
+        "created",
+        "created",
+        "conflict",
+        "invalid",
+        "conflict",
+        "conflict",
+    ]
+    assert result["items"][5]["detail"] == BATCH_DUPLICATE_ITEM
+    assert result["items"][6]["detail"] == BATCH_DUPLICATE_ITEM
+
+    detail_response = await client.get(
+        app.url_path_for(GET_ONE_RECIPES_ROUTE, id=recipes[0]["id"])
+    )
+    recipe = RecipeModelWithIngredients(**detail_response.json())
+
+    assert len(recipe.ingredients) == 5
+
+
 async def test_create_unprocessable_recipe(app: FastAPI, client: AsyncClient) -> None:
     response = await client.post(
         app.url_path_for(POST_RECIPES_ROUTE), json={"stuff": "something"}
@@ -115,6 +218,94 @@ async def test_get_filtered_recipes(
     )
 
 
+def parse_links(header: str) -> Dict[str, Dict[str, str]]:
+    links = {}
+
+    for link in header.split(","):
+        target, relation = link.split(";")
+        url = URL(target.strip()[1:-1])
+        links[relation.split('"')[1]] = dict(url.params)
+
+    return links
+
+
+async def test_get_recipes_with_total_count(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE),
+        params={"count": "exact", "limit": 200, "offset": 200},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Total-Count"] == "500"
+
+    links = parse_links(response.headers["Link"])
+
+    assert {relation: link["offset"] for relation, link in links.items()} == {
+        "first": "0",
+        "prev": "0",
+        "next": "400",
+        "last": "400",
+    }
+    assert links["next"]["limit"] == "200"
+
+
+async def test_get_recipes_with_estimated_total_count(
+    app: FastAPI,
+    client: AsyncClient,
+    db: Database,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    route = app.url_path_for(GET_RECIPES_ROUTE)
+
+    # Before the first ANALYZE there are no statistics to estimate from.
+    response = await client.get(route, params={"count": "estimated"})
+
+    assert response.headers["X-Total-Count"] == "500"
+
+    await db.execute("ANALYZE recipes")
+
+    response = await client.get(route, params={"count": "estimated"})
+
+    assert response.headers["X-Total-Count"] == "500"
+
+    response = await client.get(
+        route,
+        params={"count": "estimated", "filters": "created_at < '2100-01-01'"},
+    )
+
+    assert int(response.headers["X-Total-Count"]) > 0
+
+
+async def test_get_filtered_recipes_with_total_count(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    name = test_multiple_recipes[0].name
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE),
+        params={"count": "auto", "filters": "name = '{0}'".format(name)},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Total-Count"] == "1"
+    assert "next" not in parse_links(response.headers["Link"])
+
+
+async def test_get_recipes_with_unprocessable_count(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE), params={"count": "approximate"}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 async def test_get_unprocessable_sorted_recipes(
     app: FastAPI, client: AsyncClient
 ) -> None:
@@ -151,6 +342,317 @@ async def test_get_filtered_and_sorted_recipes(
     assert recipes == list(filter(lambda recipe: "s" in recipe.name, recipes))
 
 
+async def test_get_recipes_with_cursor(
+    app: FastAPI, client: AsyncClient, test_multiple_recipes: List[RecipeModel]
+) -> None:
+    params = {"sort": ["created_at:desc", "name:desc"], "limit": 100}
+
+    first_response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE), params=params
+    )
+
+    assert first_response.status_code == status.HTTP_200_OK
+
+    next_cursor = first_response.headers["X-Next-Cursor"]
+
+    second_response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE), params={**params, "cursor": next_cursor}
+    )
+
+    assert second_response.status_code == status.HTTP_200_OK
+
+    recipes = [
+        RecipeModel(**recipe)
+        for recipe in first_response.json() + second_response.json()
+    ]
+
+    assert recipes == sorted(
+        recipes, key=lambda recipe: recipe.created_at, reverse=True
+    )
+    assert len({recipe.id for recipe in recipes}) == 200
+
+
+async def test_get_recipes_with_mismatched_cursor(
+    app: FastAPI, client: AsyncClient, test_multiple_recipes: List[RecipeModel]
+) -> None:
+    first_response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE), params={"sort": "name:asc"}
+    )
+
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE),
+        params={"cursor": first_response.headers["X-Next-Cursor"]},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_get_recipes_with_ingredients(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE),
+        params={"expand": "ingredients", "limit": 200},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    recipes = [RecipeModelWithIngredients(**recipe) for recipe in response.json()]
+    expected_ingredients = test_multiple_recipes[0].ingredients
+
+    assert len(recipes) == 200
+    assert all(recipe.ingredients == expected_ingredients for recipe in recipes)
+
+
+async def test_get_recipes_with_fast_json_responses(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+    monkeypatch: Any,
+) -> None:
+    route = app.url_path_for(GET_RECIPES_ROUTE)
+    params = {"expand": "ingredients", "limit": 200, "sort": "created_at:desc"}
+
+    expected = await client.get(route, params=params)
+
+    monkeypatch.setattr(responses, "FAST_JSON_RESPONSES", True)
+
+    response = await client.get(route, params=params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["ETag"] == expected.headers["ETag"]
+    assert response.headers["X-Next-Cursor"] == expected.headers["X-Next-Cursor"]
+    assert response.json() == expected.json()
+
+
+async def test_get_unprocessable_expanded_recipes(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_RECIPES_ROUTE), params={"expand": "everything"}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_export_recipes_with_ingredients(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    response = await client.get(
+        app.url_path_for(EXPORT_RECIPES_ROUTE),
+        params={"expand": "ingredients"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    recipes = [
+        RecipeModelWithIngredients(**json.loads(line))
+        for line in response.text.splitlines()
+    ]
+    exported = {recipe.id: recipe for recipe in recipes}
+
+    assert [recipe.id for recipe in recipes] == sorted(exported, key=str)
+    assert all(exported[recipe.id] == recipe for recipe in test_multiple_recipes)
+
+
+async def test_export_recipes_as_csv(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_recipes: List[RecipeModelWithIngredients],
+) -> None:
+    response = await client.get(
+        app.url_path_for(EXPORT_RECIPES_ROUTE),
+        params={"format": "csv"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "recipes.csv" in response.headers["content-disposition"]
+
+    reader = csv.DictReader(response.text.splitlines())
+    recipes = {
+        recipe.id: recipe
+        for recipe in (
+            RecipeModel(**{key: value or None for key, value in row.items()})
+            for row in reader
+        )
+    }
+
+    assert reader.fieldnames == list(RecipeModel.__fields__)
+    assert all(
+        recipes[recipe.id] == RecipeModel(**recipe.dict())
+        for recipe in test_multiple_recipes
+    )
+
+
+async def test_export_unprocessable_format_recipes(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(EXPORT_RECIPES_ROUTE), params={"format": "xml"}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_search_recipes(app: FastAPI, client: AsyncClient) -> None:
+    term = "".join(random.choices(string.ascii_lowercase, k=12))
+    recipes = [
+        {"name": "{0} soup".format(term), "description": "Simmered slowly"},
+        {"name": "Stew", "description": "Tastes like {0}".format(term)},
+        {"name": "Bread", "description": "Nothing special"},
+    ]
+
+    await client.post(
+        app.url_path_for(POST_RECIPES_BATCH_ROUTE),
+        json=[{**recipe, "ingredients": []} for recipe in recipes],
+    )
+
+    route = app.url_path_for(SEARCH_RECIPES_ROUTE)
+    params = {"q": term, "limit": 1}
+    pages = []
+
+    response = await client.get(route, params=params)
+
+    while response.headers.get("X-Next-Cursor"):
+        pages.append(response.json())
+        response = await client.get(
+            route,
+            params={**params, "cursor": response.headers["X-Next-Cursor"]},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+    found = [RecipeSearchResult(**recipe) for page in pages for recipe in page]
+
+    # A name match outranks a description match.
+    assert [recipe.name for recipe in found] == [
+        recipe["name"] for recipe in recipes[:2]
+    ]
+    assert found[0].rank > found[1].rank
+
+
+async def test_search_recipes_with_invalid_cursor(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for(SEARCH_RECIPES_ROUTE),
+        params={"q": "soup", "cursor": "eyJyYW5rIjoiYSIsImlkIjoiYiJ9"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def create_pantry_recipes(
+    app: FastAPI,
+    client: AsyncClient,
+    ingredients: List[IngredientModel],
+) -> Dict[str, Any]:
+    pantry = ingredients[:2] + ingredients[3:4]
+    recipe_ingredients = [
+        ingredients[:2],
+        ingredients[:1],
+        ingredients[:3],
+        ingredients[2:3],
+        [ingredients[0], ingredients[2], ingredients[3]],
+    ]
+    recipes = [
+        {
+            "name": str(uuid.uuid4()),
+            "description": "Pantry recipe",
+            "ingredients": [
+                {"id": str(ingredient.id), "name": ingredient.name}
+                for ingredient in used
+            ],
+        }
+        for used in recipe_ingredients
+    ]
+
+    await client.post(app.url_path_for(POST_RECIPES_BATCH_ROUTE), json=recipes)
+
+    return {
+        "pantry": {
+            "ingredients": [str(ingredient.id) for ingredient in pantry],
+            "max_missing": 1,
+        },
+        # (name, matched, missing) for every recipe but the one with nothing
+        # from the pantry, fewest missing first, then most matched, then id.
+        "expected": [
+            (recipes[index]["name"], matched, missing)
+            for index, matched, missing in [(0, 2, 0), (1, 1, 0), (2, 2, 1), (4, 2, 1)]
+        ],
+    }
+
+
+def ranked(found: List[RecipePantryMatch], expected: List[Any]) -> List[Any]:
+    ids = {recipe.name: str(recipe.id) for recipe in found}
+
+    return sorted(
+        expected,
+        key=lambda match: (match[2], -match[1], ids.get(match[0], "")),
+    )
+
+
+async def test_get_cookable_recipes(
+    app: FastAPI,
+    client: AsyncClient,
+    test_multiple_ingredients: List[IngredientModel],
+) -> None:
+    pantry = await create_pantry_recipes(app, client, test_multiple_ingredients)
+
+    response = await client.post(
+        app.url_path_for(GET_COOKABLE_RECIPES_ROUTE),
+        json=pantry["pantry"],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    found = [RecipePantryMatch(**recipe) for recipe in response.json()]
+
+    assert [(recipe.name, recipe.matched, recipe.missing) for recipe in found] == (
+        ranked(found, pantry["expected"])
+    )
+
+
+async def test_get_cookable_recipes_from_pantry_index(
+    app: FastAPI,
+    client: AsyncClient,
+    db: Database,
+    enabled_pantry_index: None,
+    test_multiple_ingredients: List[IngredientModel],
+) -> None:
+    pantry = await create_pantry_recipes(app, client, test_multiple_ingredients)
+    await RecipeRepository(db).refresh_pantry_index()
+
+    route = app.url_path_for(GET_COOKABLE_RECIPES_ROUTE)
+    response = await client.post(route, json=pantry["pantry"])
+
+    assert response.status_code == status.HTTP_200_OK
+
+    found = [RecipePantryMatch(**recipe) for recipe in response.json()]
+
+    assert [(recipe.name, recipe.matched, recipe.missing) for recipe in found] == (
+        ranked(found, pantry["expected"])
+    )
+
+    response = await client.post(
+        route,
+        params={"limit": 1},
+        json={**pantry["pantry"], "max_missing": 0},
+    )
+
+    assert [recipe["name"] for recipe in response.json()] == [
+        pantry["expected"][0][0],
+    ]
+
+
 async def test_get_one_recipe(
     app: FastAPI, client: AsyncClient, test_recipe: RecipeModel
 ) -> None:
@@ -166,6 +668,76 @@ async def test_get_one_recipe(
     assert recipe.description == test_recipe.description
 
 
+async def test_get_one_recipe_with_ingredients(
+    app: FastAPI, client: AsyncClient, test_recipe: RecipeModelWithIngredients
+) -> None:
+    response = await client.get(
+        app.url_path_for(GET_ONE_RECIPES_ROUTE, id=test_recipe.id)
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    recipe = RecipeModelWithIngredients(**response.json())
+
+    assert recipe.ingredients == test_recipe.ingredients
+    assert recipe.created_at == test_recipe.created_at
+
+
+async def test_get_one_cached_recipe_after_ingredient_update(
+    app: FastAPI,
+    client: AsyncClient,
+    enabled_cache: None,
+    test_recipe: RecipeModelWithIngredients,
+) -> None:
+    recipe_route = app.url_path_for(GET_ONE_RECIPES_ROUTE, id=test_recipe.id)
+    ingredient = test_recipe.ingredients[0]
+    hits = recipe_cache.hits
+
+    await client.get(recipe_route)
+    response = await client.get(recipe_route)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert recipe_cache.hits == hits + 1
+
+    response = await client.patch(
+        app.url_path_for(UPDATE_INGREDIENTS_ROUTE, id=ingredient.id),
+        json={"name": "Renamed Ingredient"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get(recipe_route)
+    recipe = RecipeModelWithIngredients(**response.json())
+
+    assert recipe.ingredients[0].name == "Renamed Ingredient"
+
+
+async def test_get_one_not_modified_recipe(
+    app: FastAPI,
+    client: AsyncClient,
+    test_recipe: RecipeModelWithIngredients,
+) -> None:
+    route = app.url_path_for(GET_ONE_RECIPES_ROUTE, id=test_recipe.id)
+
+    response = await client.get(route)
+    etag = response.headers["ETag"]
+
+    response = await client.get(route, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    # Renaming an embedded ingredient changes the recipe representation.
+    await client.patch(
+        app.url_path_for(UPDATE_INGREDIENTS_ROUTE, id=test_recipe.ingredients[0].id),
+        json={"name": "Renamed Ingredient"},
+    )
+    response = await client.get(route, headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
 async def test_get_one_not_found_recipe(app: FastAPI, client: AsyncClient) -> None:
     recipe_id = str(uuid.uuid4())
 
@@ -180,7 +752,6 @@ async def test_update_recipe(
     test_recipe: RecipeModelWithIngredients,
     test_ingredient: IngredientModel,
 ) -> None:
-
     ingredients = [
         {"id": str(ingredient.id), "name": ingredient.name, "is_deleted": True}
         for ingredient in test_recipe.ingredients
@@ -211,6 +782,48 @@ async def test_update_recipe(
     assert len(recipe.ingredients) != len(updated_recipe.ingredients)
 
 
+async def test_update_recipe_ingredients_of_that_recipe_only(
+    app: FastAPI,
+    client: AsyncClient,
+    test_recipe: RecipeModelWithIngredients,
+    test_ingredient: IngredientModel,
+) -> None:
+    shared = test_recipe.ingredients[0]
+    other_recipe = {
+        "id": str(uuid.uuid4()),
+        "name": str(uuid.uuid4()),
+        "description": "Shares an ingredient",
+        "ingredients": [{"id": str(shared.id), "name": shared.name}],
+    }
+    await client.post(app.url_path_for(POST_RECIPES_ROUTE), json=other_recipe)
+
+    response = await client.patch(
+        app.url_path_for(UPDATE_RECIPES_ROUTE, id=test_recipe.id),
+        json={
+            "ingredients": [
+                {"id": str(shared.id), "name": shared.name, "is_deleted": True},
+                {"id": str(test_ingredient.id), "name": test_ingredient.name},
+                {"id": str(uuid.uuid4()), "name": "Does not exist"},
+            ],
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    updated_recipe = RecipeModelWithIngredients(**response.json())
+
+    assert updated_recipe.name == test_recipe.name
+    assert [ingredient.id for ingredient in updated_recipe.ingredients] == [
+        test_ingredient.id,
+    ]
+
+    response = await client.get(
+        app.url_path_for(GET_ONE_RECIPES_ROUTE, id=other_recipe["id"]),
+    )
+
+    assert RecipeModelWithIngredients(**response.json()).ingredients == [shared]
+
+
 async def test_update_not_found_recipe(app: FastAPI, client: AsyncClient) -> None:
     recipe_id = str(uuid.uuid4())
 
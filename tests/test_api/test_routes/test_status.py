@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from app.core.config import DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE, DB_POOL_PREWARM
+from app.db.pool import InstrumentedPool
+from app.models.ingredient import IngredientModel
+from app.models.status import PoolStats
+
+pytestmark = pytest.mark.asyncio
+
+GET_POOL_STATS_ROUTE = "status:get-pool-stats"
+GET_ONE_INGREDIENTS_ROUTE = "ingredients:get-one-ingredient"
+
+
+class FailingSecondAcquirePool:
+    def __init__(self, pool: Any) -> None:
+        self.pool = pool
+        self.acquires = 0
+
+    def get_max_size(self) -> int:
+        return self.pool.get_max_size()
+
+    async def acquire(self) -> Any:
+        self.acquires += 1
+
+        if self.acquires == 2:
+            raise ConnectionError
+
+        return await self.pool.acquire()
+
+    async def release(self, connection: Any) -> None:
+        await self.pool.release(connection)
+
+
+async def test_get_pool_stats(
+    app: FastAPI, client: AsyncClient, test_ingredient: IngredientModel
+) -> None:
+    await client.get(app.url_path_for(GET_ONE_INGREDIENTS_ROUTE, id=test_ingredient.id))
+
+    response = await client.get(app.url_path_for(GET_POOL_STATS_ROUTE))
+
+    assert response.status_code == status.HTTP_200_OK
+
+    stats = PoolStats(**response.json())
+
+    assert stats.min_size == DB_POOL_MIN_SIZE
+    assert stats.max_size == DB_POOL_MAX_SIZE
+    assert stats.in_use + stats.idle == stats.size
+    assert stats.size >= min(DB_POOL_PREWARM, DB_POOL_MAX_SIZE)
+    assert stats.waiting == 0
+    assert stats.acquires > 0
+    assert stats.acquire_max_ms >= stats.acquire_mean_ms > 0
+
+
+async def test_pool_acquire_timeout(initialized_app: FastAPI) -> None:
+    pool = initialized_app.state.db_pool
+    pool.acquire_timeout = 0.05
+    connections = [await pool.acquire() for _ in range(pool.get_max_size())]
+
+    try:
+        assert pool.stats()["waiting"] == 0
+
+        blocked = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+
+        assert pool.stats()["waiting"] == 1
+
+        with pytest.raises(asyncio.TimeoutError):
+            await blocked
+
+        assert pool.stats()["waiting"] == 0
+        assert pool.stats()["acquire_timeouts"] == 1
+        assert pool.stats()["in_use"] == pool.get_max_size()
+    finally:
+        for connection in connections:
+            await pool.release(connection)
+
+
+async def test_failed_prewarm_releases_connections(initialized_app: FastAPI) -> None:
+    pool = initialized_app.state.db_pool
+    failing = InstrumentedPool(FailingSecondAcquirePool(pool._pool), None)
+
+    with pytest.raises(ConnectionError):
+        await failing.prewarm(3)
+
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from app.db.events import start_pantry_index, stop_pantry_index
+from app.db.pantry_index import pantry_index
+
+pytestmark = pytest.mark.asyncio
+
+STOP_SECONDS = 5
+
+
+async def test_stop_right_after_start(
+    initialized_app: FastAPI,
+    enabled_pantry_index: None,
+) -> None:
+    start_pantry_index(initialized_app)
+    task = initialized_app.state.pantry_index_task
+
+    await asyncio.sleep(0)
+    await asyncio.wait_for(stop_pantry_index(initialized_app), STOP_SECONDS)
+
+    assert task.done()
+
+
+async def test_stop_after_first_refresh(
+    initialized_app: FastAPI,
+    enabled_pantry_index: None,
+) -> None:
+    start_pantry_index(initialized_app)
+    task = initialized_app.state.pantry_index_task
+
+    while not pantry_index.ready:
+        await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(stop_pantry_index(initialized_app), STOP_SECONDS)
+
+    assert task.done()
+    assert not task.cancelled()
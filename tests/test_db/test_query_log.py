@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any, Iterator, List
+
+import pytest
+from databases import Database
+from fastapi import FastAPI
+from loguru import logger
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.models.ingredient import IngredientModel
+
+pytestmark = pytest.mark.asyncio
+
+POOL_WAIT_SECONDS = 0.3
+APPEND_DESCRIPTION_QUERY = (
+    "UPDATE ingredients SET description = description || 'x' WHERE id = :id"
+)
+
+
+@pytest.fixture
+def log_messages() -> Iterator[List[str]]:
+    messages: List[str] = []
+    handler_id = logger.add(messages.append, format="{message}", level="WARNING")
+
+    yield messages
+
+    logger.remove(handler_id)
+
+
+async def test_fast_queries_are_not_logged(
+    db: Database,
+    test_ingredient: IngredientModel,
+    log_messages: List[str],
+) -> None:
+    statements = db.statements
+
+    await IngredientRepository(db).get_one_ingredient(str(test_ingredient.id))
+
+    assert db.statements == statements + 1
+    assert log_messages == []
+
+
+async def test_slow_queries_are_logged(
+    db: Database,
+    test_ingredient: IngredientModel,
+    log_messages: List[str],
+    monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(db, "threshold", 0.0)
+
+    await IngredientRepository(db).get_one_ingredient(str(test_ingredient.id))
+
+    assert len(log_messages) == 1
+    assert "IngredientRepository.get_one_ingredient" in log_messages[0]
+    assert "FROM ingredients" in log_messages[0]
+    assert str(test_ingredient.id) in log_messages[0]
+    assert db.explains == set()
+
+
+async def test_pool_waits_are_not_logged(
+    initialized_app: FastAPI,
+    log_messages: List[str],
+    monkeypatch: Any,
+) -> None:
+    db = initialized_app.state.db
+    pool = initialized_app.state.db_pool
+    monkeypatch.setattr(db, "threshold", POOL_WAIT_SECONDS / 2)
+    held = [await pool.acquire() for _ in range(pool.get_max_size())]
+
+    try:
+        query = asyncio.create_task(db.fetch_val("SELECT 1"))
+        await asyncio.sleep(POOL_WAIT_SECONDS)
+        await pool.release(held.pop())
+
+        assert await query == 1
+    finally:
+        for connection in held:
+            await pool.release(connection)
+
+    assert log_messages == []
+
+
+async def test_slow_queries_are_explained_and_rolled_back(
+    db: Database,
+    test_ingredient: IngredientModel,
+    log_messages: List[str],
+    monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(db, "threshold", 0.0)
+    monkeypatch.setattr(db, "explain_rate", 1.0)
+
+    await db.execute(APPEND_DESCRIPTION_QUERY, {"id": str(test_ingredient.id)})
+    await db.wait_for_explains()
+    monkeypatch.setattr(db, "threshold", float("inf"))
+
+    explain = log_messages[-1]
+    ingredient = await IngredientRepository(db).get_one_ingredient(
+        str(test_ingredient.id),
+    )
+
+    assert "EXPLAIN of slow query" in explain
+    assert "Update on ingredients" in explain
+    assert "actual time=" in explain
+    assert "Buffers:" in explain
+    assert ingredient is not None
+    assert ingredient.description == test_ingredient.description + "x"
@@ -0,0 +1,164 @@
+import json
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from databases import Database
+from sqlalchemy.sql import ClauseElement  # type: ignore
+
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.recipe import RecipeModelWithIngredients
+from app.models.recipes_ingredients import recipes_ingredients
+from app.utils.filters import parse_filters
+
+pytestmark = pytest.mark.asyncio
+
+SEQ_SCAN = "Seq Scan"
+INGREDIENT_ID_INDEX = "ix_recipes_ingredients_ingredient_id"
+
+
+@pytest.fixture
+def recorded_queries(db: Database, monkeypatch: Any) -> List[ClauseElement]:
+    queries: List[ClauseElement] = []
+
+    for method in ("fetch_all", "fetch_one"):
+
+        async def record(query: ClauseElement, values: Any = None, method=method):
+            queries.append(query)
+            return await getattr(Database, method)(db, query, values)
+
+        monkeypatch.setattr(db, method, record)
+
+    return queries
+
+
+def plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(
+    db: Database,
+    queries: List[ClauseElement],
+) -> List[Dict[str, Any]]:
+    # Seq scans are priced out instead of forbidden, so the planner still
+    # falls back to one when no index can serve the query at all.
+    nodes: List[Dict[str, Any]] = []
+
+    async with db.connection() as connection:
+        raw_connection = connection.raw_connection
+        await raw_connection.execute("SET enable_seqscan = off")
+
+        try:
+            for query in queries:
+                sql, args, _ = connection._connection._compile(query)
+                explained = await raw_connection.fetchval(
+                    "EXPLAIN (FORMAT JSON) {0}".format(sql),
+                    *args,
+                )
+                nodes.extend(plan_nodes(json.loads(explained)[0]["Plan"]))
+        finally:
+            await raw_connection.execute("RESET enable_seqscan")
+
+    return nodes
+
+
+def seq_scanned(nodes: List[Dict[str, Any]]) -> List[str]:
+    return [node["Relation Name"] for node in nodes if node["Node Type"] == SEQ_SCAN]
+
+
+async def has_trigram_indexes(db: Database) -> bool:
+    return bool(
+        await db.fetch_val(
+            "SELECT count(*) FROM pg_indexes WHERE indexname LIKE '%_name_trgm'",
+        ),
+    )
+
+
+async def test_list_queries_use_indexes(
+    db: Database,
+    test_recipe: RecipeModelWithIngredients,
+    recorded_queries: List[ClauseElement],
+) -> None:
+    ingredient_repo = IngredientRepository(db)
+    recipe_repo = RecipeRepository(db)
+
+    await ingredient_repo.get_ingredients(10, 0, sort_params={"created_at": "desc"})
+    await ingredient_repo.get_ingredients(
+        10,
+        0,
+        filters=parse_filters(["updated_at >= '2021-01-01'"]),
+    )
+    await recipe_repo.get_recipes(
+        10,
+        0,
+        sort_params={"updated_at": "asc"},
+        expand_ingredients=True,
+    )
+    await recipe_repo.get_recipes(
+        10,
+        0,
+        filters=parse_filters(["created_at < '2100-01-01'"]),
+    )
+
+    assert seq_scanned(await explain(db, recorded_queries)) == []
+
+
+async def test_single_entity_queries_use_indexes(
+    db: Database,
+    test_recipe: RecipeModelWithIngredients,
+    recorded_queries: List[ClauseElement],
+) -> None:
+    ingredient_id = str(test_recipe.ingredients[0].id)
+
+    await RecipeRepository(db).get_one_recipe(str(test_recipe.id))
+    await IngredientRepository(db).get_one_ingredient(ingredient_id)
+
+    assert seq_scanned(await explain(db, recorded_queries)) == []
+
+    # The lookup behind ON DELETE CASCADE when an ingredient is deleted. The
+    # primary key leads with recipe_id and could only be read in full.
+    nodes = await explain(
+        db,
+        [
+            recipes_ingredients.select().where(
+                recipes_ingredients.c.ingredient_id == ingredient_id,
+            ),
+        ],
+    )
+
+    assert INGREDIENT_ID_INDEX in [node.get("Index Name") for node in nodes]
+
+
+async def test_name_filters_use_trigram_indexes(
+    db: Database,
+    test_recipe: RecipeModelWithIngredients,
+    recorded_queries: List[ClauseElement],
+) -> None:
+    if not await has_trigram_indexes(db):
+        pytest.skip("pg_trgm is not available on this server")
+
+    filters = parse_filters(["name LIKE '%a%'"])
+
+    await IngredientRepository(db).get_ingredients(10, 0, filters=filters)
+    await RecipeRepository(db).get_recipes(10, 0, filters=filters)
+
+    assert seq_scanned(await explain(db, recorded_queries)) == []
+
+
+async def test_ingredient_recipes_query_uses_ingredient_index(
+    db: Database,
+    test_recipe: RecipeModelWithIngredients,
+    recorded_queries: List[ClauseElement],
+) -> None:
+    await RecipeRepository(db).get_recipes_for_ingredient(
+        str(test_recipe.ingredients[0].id),
+        10,
+        cursor={"id": str(test_recipe.id)},
+    )
+    nodes = await explain(db, recorded_queries)
+
+    assert seq_scanned(nodes) == []
+    assert INGREDIENT_ID_INDEX in [node.get("Index Name") for node in nodes]
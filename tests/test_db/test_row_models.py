@@ -0,0 +1,68 @@
+import uuid
+from typing import List
+
+import pytest
+from databases import Database
+from pydantic import BaseModel
+
+from app.db.repositories.base import row_model
+from app.db.repositories.ingredient_repository import IngredientRepository
+from app.db.repositories.recipe_repository import RecipeRepository
+from app.models.ingredient import IngredientModel
+from app.models.recipe import RecipeModelWithIngredients
+
+pytestmark = pytest.mark.asyncio
+
+
+def assert_matches_validated(models: List[BaseModel]) -> None:
+    for model in models:
+        validated = type(model)(**model.dict())
+
+        assert model == validated
+        assert model.json() == validated.json()
+        assert model.__fields_set__ == validated.__fields_set__
+
+
+async def test_row_model_drops_extra_columns(
+    db: Database,
+    test_ingredient: IngredientModel,
+) -> None:
+    row = await db.fetch_one(
+        "SELECT *, 1 AS extra FROM ingredients WHERE id = :id",
+        {"id": str(test_ingredient.id)},
+    )
+    model = row_model(IngredientModel, row, name="renamed")
+
+    assert list(model.dict()) == list(IngredientModel.__fields__)
+    assert model.name == "renamed"
+    assert model.description == test_ingredient.description
+
+
+async def test_trusted_ingredients_match_validated(
+    db: Database,
+    test_multiple_ingredients: List[IngredientModel],
+) -> None:
+    repository = IngredientRepository(db)
+
+    assert_matches_validated(await repository.get_ingredients(200, 0))
+    assert_matches_validated(
+        [await repository.get_one_ingredient(str(test_multiple_ingredients[0].id))],
+    )
+
+
+async def test_trusted_recipes_match_validated(
+    db: Database,
+    test_recipe: RecipeModelWithIngredients,
+) -> None:
+    repository = RecipeRepository(db)
+    recipes = await repository.get_recipes(200, 0, expand_ingredients=True)
+    recipe = await repository.get_one_recipe(str(test_recipe.id))
+
+    assert_matches_validated(recipes)
+    assert_matches_validated([recipe])
+    assert recipe == test_recipe
+    assert all(
+        isinstance(ingredient.id, uuid.UUID)
+        for model in [*recipes, recipe]
+        for ingredient in model.ingredients
+    )